@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark del extractor de zips
+Compara zipfile.extractall con extract_zip en serie y repartido entre hilos
+para un paquete de iconos con muchos archivos pequeños (los hilos solo se usan
+si se piden con GNOME_THEME_LOADER_EXTRACT_WORKERS)
+"""
+
+import sys
+import os
+import shutil
+import stat
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.utils.extractor import extract_zip
+
+def build_zip(base: Path, files=20000, file_size=4096) -> Path:
+    """Crear un zip comprimido con un tema de iconos sintético y enlaces simbólicos"""
+    zip_path = base / "icon-pack.zip"
+    payload = (b"<svg>" + os.urandom(file_size // 4).hex().encode())[:file_size]
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("Pack/index.theme", "[Icon Theme]\nName=Pack\nDirectories=scalable/apps\n")
+        for i in range(files):
+            zf.writestr(f"Pack/scalable/apps/app-{i // 1000}/icon-{i}.svg", payload)
+        # Enlace simbólico relativo como los que crea `zip -y`
+        link = zipfile.ZipInfo("Pack/scalable/apps/default.svg")
+        link.create_system = 3
+        link.external_attr = (stat.S_IFLNK | 0o777) << 16
+        zf.writestr(link, "app-0/icon-0.svg")
+    return zip_path
+
+def run(label, func, files):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:28} {elapsed * 1000:8.1f} ms  {files / elapsed:9.0f} archivos/s")
+    return elapsed
+
+def main():
+    print("📊 BENCHMARK DEL EXTRACTOR DE ZIPS")
+    print("="*60)
+    print(f"CPUs: {os.cpu_count()}")
+
+    base = Path(tempfile.mkdtemp())
+    try:
+        zip_path = build_zip(base)
+        with zipfile.ZipFile(zip_path) as zf:
+            files = len(zf.infolist())
+        print(f"{zip_path.name}: {files} miembros, {zip_path.stat().st_size / 1024 / 1024:.1f} MiB\n")
+
+        def extractall(dest):
+            with zipfile.ZipFile(zip_path) as zf:
+                zf.extractall(dest)
+
+        baseline = run("zipfile.extractall", lambda: extractall(base / "out-baseline"), files)
+        for workers in (1, 2, 4, 8):
+            dest = base / f"out-{workers}"
+            elapsed = run(f"extract_zip workers={workers}", lambda: extract_zip(zip_path, dest, workers), files)
+            assert (dest / "Pack" / "scalable" / "apps" / "default.svg").is_symlink()
+            print(f"{'':28} x{baseline / elapsed:.2f} respecto a extractall")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark de aplicación de temas
+Compara la latencia de aplicar una combinación (GTK, iconos y cursor) con un
+proceso gsettings por clave (implementación anterior) y con Gio.Settings en
+proceso, con una sola transacción delay()/apply()
+
+Por defecto usa un HOME temporal con el backend keyfile de GSettings para no
+tocar la configuración real; con --session mide sobre dconf y restaura los
+valores originales al terminar.
+"""
+
+import sys
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+SESSION = "--session" in sys.argv
+BENCH_HOME = None
+if not SESSION:
+    # Antes de importar gi: el backend se elige al crear el primer Gio.Settings
+    BENCH_HOME = tempfile.mkdtemp(prefix="bench-gsettings-")
+    os.environ["HOME"] = BENCH_HOME
+    os.environ["XDG_CONFIG_HOME"] = os.path.join(BENCH_HOME, ".config")
+    os.environ["GSETTINGS_BACKEND"] = "keyfile"
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.utils import gsettings
+
+ROUNDS = 20
+# Se alterna entre dos combinaciones para que cada escritura cambie de verdad los valores
+COMBOS = [
+    {"gtk": "Adwaita", "icons": "Adwaita", "cursor": "Adwaita"},
+    {"gtk": "HighContrast", "icons": "HighContrast", "cursor": "DMZ-White"},
+]
+
+def legacy_apply(themes):
+    """Implementación anterior: un proceso gsettings por clave"""
+    for kind, name in themes.items():
+        schema, key = gsettings.THEME_KEYS[kind]
+        subprocess.run(["gsettings", "set", schema, key, name], check=True)
+
+def read_current():
+    values = {}
+    for kind, (schema, key) in gsettings.THEME_KEYS.items():
+        result = subprocess.run(["gsettings", "get", schema, key], capture_output=True, text=True)
+        if result.returncode == 0:
+            values[kind] = result.stdout.strip().strip("'")
+    return values
+
+def run(label, func):
+    samples = []
+    for i in range(ROUNDS):
+        themes = COMBOS[i % len(COMBOS)]
+        start = time.perf_counter()
+        func(themes)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:34} media {statistics.mean(samples):7.2f} ms  "
+          f"mediana {statistics.median(samples):7.2f} ms  primera {samples[0]:7.2f} ms")
+    return statistics.median(samples)
+
+def main():
+    print("📊 BENCHMARK DE APLICACIÓN DE TEMAS")
+    print("="*60)
+    print(f"Backend: {'dconf (sesión)' if SESSION else 'keyfile en ' + BENCH_HOME}")
+    original = read_current()
+    if "gtk" not in original:
+        print(f"❌ El esquema {gsettings.INTERFACE_SCHEMA} no está instalado")
+        return
+    if gsettings.settings_backend() != "gio":
+        print("❌ PyGObject (gi) no está disponible: solo existe la ruta con subprocess")
+        return
+
+    try:
+        print(f"\nCombinación de {len(COMBOS[0])} temas, {ROUNDS} rondas")
+        old = run("  Antes (un gsettings por clave)", legacy_apply)
+        new = run("  Gio.Settings (una transacción)", gsettings.set_themes)
+        print(f"  Reducción: {100 * (1 - new / old):.0f}%")
+        assert read_current()["gtk"] == COMBOS[(ROUNDS - 1) % len(COMBOS)]["gtk"]
+    finally:
+        if SESSION:
+            gsettings.set_themes({kind: original[kind] for kind in COMBOS[0] if kind in original})
+        if BENCH_HOME:
+            shutil.rmtree(BENCH_HOME, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
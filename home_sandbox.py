@@ -0,0 +1,36 @@
+"""
+Home sandbox for GNOME Theme Loader tests
+Runs code or the CLI in a fresh interpreter with a temporary HOME (and the XDG
+cache/data dirs inside it), so tests never touch the user's themes, trash,
+caches or manifest
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def sandbox_env(home: str, **extra) -> dict:
+    """Entorno con HOME temporal; extra añade o sustituye variables"""
+    env = dict(os.environ, HOME=home, XDG_CACHE_HOME=os.path.join(home, ".cache"),
+               XDG_DATA_HOME=os.path.join(home, ".local", "share"), XDG_DATA_DIRS=home)
+    env.update(extra)
+    return env
+
+def run_python(code: str, *args: str, env: dict = None) -> str:
+    """Ejecutar código en un intérprete nuevo (sin módulos ya importados) y devolver su salida"""
+    result = subprocess.run([sys.executable, "-c", code, *args], cwd=PROJECT_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+def run_in_home(home: str, code: str, *args: str) -> dict:
+    """Ejecutar código con HOME temporal y leer el JSON de su última línea de salida"""
+    return json.loads(run_python(code, *args, env=sandbox_env(home)).splitlines()[-1])
+
+def run_cli(home: str, *args: str) -> str:
+    """Ejecutar `python -m theme_loader` con HOME temporal"""
+    result = subprocess.run([sys.executable, "-m", "theme_loader", *args], cwd=PROJECT_DIR, env=sandbox_env(home),
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Prueba de arranque de la API
+Comprueba que theme_loader.api se importa rápido y que escanear temas no carga GTK
+"""
+
+import os
+import tempfile
+
+from home_sandbox import run_python, sandbox_env
+
+# Tiempo máximo de `import theme_loader.api` en un intérprete nuevo
+MAX_IMPORT_SECONDS = 0.050
+
+def test_api_import_time():
+    """Importar la API debe costar menos de 50 ms"""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import theme_loader.api\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    # El mejor de varios intentos, para no depender de la carga de la máquina
+    elapsed = min(float(run_python(code)) for _ in range(3))
+    print(f"import theme_loader.api: {elapsed * 1000:.1f} ms")
+    assert elapsed < MAX_IMPORT_SECONDS
+
+def test_api_does_not_load_gtk():
+    """Importar la API, el core y escanear temas no debe cargar gi"""
+    with tempfile.TemporaryDirectory() as home:
+        theme = os.path.join(home, ".themes", "Prueba", "gtk-3.0")
+        os.makedirs(theme)
+        open(os.path.join(theme, "gtk.css"), "w").close()
+        code = (
+            "import sys\n"
+            "import theme_loader.api as api\n"
+            "import theme_loader.core, theme_loader.utils\n"
+            "names = [t.name for t in api.scan_themes()['gtk']]\n"
+            "print(names, 'gi' in sys.modules)\n"
+        )
+        output = run_python(code, env=sandbox_env(home))
+    assert output == "['Prueba'] False"
+
+def main():
+    print("🚀 PRUEBA DE ARRANQUE DE LA API")
+    print("="*50)
+    test_api_import_time()
+    test_api_does_not_load_gtk()
+    print("✅ La API arranca sin GTK")
+
+if __name__ == "__main__":
+    main()
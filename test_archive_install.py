@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Prueba de instalación desde archivos
+Comprueba que se instalan los temas que están en la raíz del archivo y los de
+paquetes con varias carpetas, con un HOME temporal
+"""
+
+import os
+import io
+import tarfile
+import tempfile
+import zipfile
+
+from home_sandbox import run_in_home, run_cli
+
+INSTALL_CODE = (
+    "import json, sys\n"
+    "from pathlib import Path\n"
+    "from theme_loader.utils.installer import install_archive, list_archive_variants\n"
+    "messages = []\n"
+    "results = []\n"
+    "for archive in sys.argv[1:]:\n"
+    "    variants = [(v.folder, v.name, v.kind) for v in list_archive_variants(Path(archive))]\n"
+    "    installed = install_archive(Path(archive), lambda m, l: messages.append(l), auto_apply=False)\n"
+    "    results.append([variants, installed])\n"
+    "print(json.dumps({'results': results, 'errors': messages.count('error')}))\n"
+)
+
+def run_install(home: str, *archives: str) -> dict:
+    """Instalar archivos en un intérprete nuevo con HOME temporal y devolver variantes e instalados"""
+    return run_in_home(home, INSTALL_CODE, *archives)
+
+def write_zip(path: str, files: dict):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+
+def test_root_level_theme():
+    """Un tema con gtk-3.0/ en la raíz del archivo se instala con el nombre del archivo"""
+    with tempfile.TemporaryDirectory() as home:
+        archive = os.path.join(home, "MyTheme.zip")
+        write_zip(archive, {"gtk-3.0/gtk.css": "* {}\n", "index.theme": "[Desktop Entry]\n"})
+        output = run_install(home, archive)
+        assert output["results"] == [[[["", "MyTheme", "gtk"]], [["MyTheme", "gtk"]]]]
+        assert output["errors"] == 0
+        assert os.path.isfile(os.path.join(home, ".themes", "MyTheme", "gtk-3.0", "gtk.css"))
+
+def test_renamed_copy_uses_its_own_name():
+    """Una copia renombrada del mismo archivo (misma huella en caché) se instala con su nombre"""
+    with tempfile.TemporaryDirectory() as home:
+        first = os.path.join(home, "MyTheme.zip")
+        write_zip(first, {"gtk-3.0/gtk.css": "* {}\n"})
+        second = os.path.join(home, "Other.zip")
+        with open(first, "rb") as src, open(second, "wb") as dst:
+            dst.write(src.read())
+        output = run_install(home, first, second)
+        assert [r[1] for r in output["results"]] == [[["MyTheme", "gtk"]], [["Other", "gtk"]]]
+        assert os.path.isdir(os.path.join(home, ".themes", "Other", "gtk-3.0"))
+
+def test_nested_pack():
+    """Un paquete con varias carpetas instala cada variante por su nombre"""
+    with tempfile.TemporaryDirectory() as home:
+        archive = os.path.join(home, "Pack.zip")
+        write_zip(archive, {
+            "Pack/A/gtk-3.0/gtk.css": "* {}\n",
+            "Pack/B/index.theme": "[Icon Theme]\nName=B\n",
+            "Pack/B/48x48/apps/app.png": "png",
+        })
+        output = run_install(home, archive)
+        assert output["results"][0][1] == [["A", "gtk"], ["B", "icons"]]
+        assert os.path.isfile(os.path.join(home, ".icons", "B", "index.theme"))
+
+def test_damaged_archive_is_reported():
+    """Un archivo dañado con la clasificación en caché se informa como error en lugar de lanzar"""
+    with tempfile.TemporaryDirectory() as home:
+        archive = os.path.join(home, "MyTheme.zip")
+        write_zip(archive, {"gtk-3.0/gtk.css": "* {}\n", "gtk-3.0/assets.bin": os.urandom(512 * 1024)})
+        assert run_install(home, archive)["errors"] == 0
+        # Datos dañados a mitad del archivo: la huella (principio, final, directorio central) no cambia
+        with open(archive, "r+b") as f:
+            f.seek(256 * 1024)
+            f.write(b"\0" * 1024)
+        output = run_install(home, archive)
+        assert output["results"] == [[[["", "MyTheme", "gtk"]], []]]
+        assert output["errors"] == 1
+
+DECOMPRESS_CODE = (
+    "import json, sys\n"
+    "from pathlib import Path\n"
+    "from theme_loader.utils import archive_formats\n"
+    "opens = []\n"
+    "gz_open = archive_formats._TAR_OPENERS['tar.gz']\n"
+    "archive_formats._TAR_OPENERS['tar.gz'] = lambda path: opens.append(path) or gz_open(path)\n"
+    "from theme_loader.core.theme_manager import ThemeManager\n"
+    "from theme_loader.utils.installer import install_archive, list_archive_variants\n"
+    "counts = []\n"
+    "ok, _ = ThemeManager().install_theme_archive(Path(sys.argv[1]), auto_apply=False)\n"
+    "counts.append(len(opens))\n"
+    "list_archive_variants(Path(sys.argv[2]))\n"
+    "installed = install_archive(Path(sys.argv[2]), lambda m, l: None, auto_apply=False)\n"
+    "counts.append(len(opens) - counts[0])\n"
+    "print(json.dumps({'ok': ok, 'installed': installed, 'counts': counts}))\n"
+)
+
+def write_tar_gz(path: str, files: dict):
+    with tarfile.open(path, "w:gz") as tf:
+        for name, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+def test_tar_decompressed_twice():
+    """Un tar.gz nuevo se descomprime dos veces: una para listar (clasificar y límites) y otra para extraer"""
+    with tempfile.TemporaryDirectory() as home:
+        first = os.path.join(home, "First.tar.gz")
+        write_tar_gz(first, {"First/gtk-3.0/gtk.css": "* {}\n"})
+        second = os.path.join(home, "Second.tar.gz")
+        write_tar_gz(second, {"Second/gtk-3.0/gtk.css": "* { color: red; }\n"})
+        output = run_in_home(home, DECOMPRESS_CODE, first, second)
+        assert output == {"ok": True, "installed": [["Second", "gtk"]], "counts": [2, 2]}
+
+UNINSTALL_CODE = (
+    "import json, sys\n"
+    "from pathlib import Path\n"
+    "from theme_loader import api\n"
+    "from theme_loader.utils.trash import get_trash\n"
+    "api.install(sys.argv[1])\n"
+    "theme = Path.home() / '.themes' / 'MyTheme'\n"
+    "(theme / 'gtk-3.0' / 'user.css').write_text('extra')\n"
+    "api.uninstall('MyTheme')\n"
+    "trashed = [p for p in get_trash().trash_dir.rglob('gtk.css')]\n"
+    "print(json.dumps({'kept': sorted(str(p.relative_to(theme)) for p in theme.rglob('*') if p.is_file()),\n"
+    "                  'trashed': len(trashed), 'installs': len(api.list_installs('MyTheme'))}))\n"
+)
+
+def test_uninstall_keeps_added_files():
+    """Desinstalar aparta el tema a la papelera y deja en su sitio solo los archivos añadidos"""
+    with tempfile.TemporaryDirectory() as home:
+        archive = os.path.join(home, "MyTheme.zip")
+        write_zip(archive, {"gtk-3.0/gtk.css": "* {}\n"})
+        output = run_in_home(home, UNINSTALL_CODE, archive)
+        assert output == {"kept": ["gtk-3.0/user.css"], "trashed": 1, "installs": 0}
+
+def test_cli_leaves_no_trash():
+    """La CLI borra al salir lo que aparta (sustituir, desinstalar) y las carpetas .trash-* caducadas"""
+    with tempfile.TemporaryDirectory() as home:
+        archive = os.path.join(home, "MyTheme.zip")
+        write_zip(archive, {"gtk-3.0/gtk.css": "* {}\n"})
+        stale = os.path.join(home, ".themes", ".trash-old", "Viejo")
+        os.makedirs(stale)
+        os.utime(os.path.dirname(stale), (0, 0))
+        for args in (["install", archive], ["install", archive], ["uninstall", "MyTheme"]):
+            run_cli(home, *args)
+        trash_dir = os.path.join(home, ".cache", "gnome-theme-loader", "trash")
+        assert os.listdir(trash_dir) == []
+        assert os.listdir(os.path.join(home, ".themes")) == []
+
+def main():
+    print("📦 PRUEBA DE INSTALACIÓN DESDE ARCHIVOS")
+    print("="*50)
+    test_root_level_theme()
+    test_renamed_copy_uses_its_own_name()
+    test_nested_pack()
+    test_damaged_archive_is_reported()
+    test_tar_decompressed_twice()
+    test_uninstall_keeps_added_files()
+    test_cli_leaves_no_trash()
+    print("✅ Los temas se instalan y desinstalan correctamente")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Prueba de los límites de extracción
+Comprueba el número de miembros, el tamaño total, la tasa de compresión y el
+escritor limitado de zip y tar antes y durante la extracción
+"""
+
+import sys
+import os
+import io
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from home_sandbox import run_python, sandbox_env
+from theme_loader.utils.archive_formats import (
+    extract_archive, get_format, ArchiveLimitError, ByteBudget, ExtractionLimits, MiB,
+)
+
+def expect_limit_error(func) -> str:
+    try:
+        func()
+    except ArchiveLimitError as e:
+        return str(e)
+    raise AssertionError("Se esperaba ArchiveLimitError")
+
+def write_zip(path: Path, files: dict, compression=zipfile.ZIP_STORED) -> Path:
+    with zipfile.ZipFile(path, "w", compression) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return path
+
+def write_tar_gz(path: Path, files: dict) -> Path:
+    with tarfile.open(path, "w:gz") as tf:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    return path
+
+def test_member_limit():
+    """Un archivo con más miembros que el límite se rechaza sin escribir nada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = write_zip(Path(tmp) / "many.zip", {f"Theme/icon-{i}.png": b"png" for i in range(20)})
+        dest = Path(tmp) / "out"
+        message = expect_limit_error(lambda: extract_archive(archive, dest, limits=ExtractionLimits(max_members=10)))
+        assert "20 archivos" in message
+        assert not dest.exists()
+
+def test_total_size_limit():
+    """El tamaño descomprimido declarado se comprueba antes de extraer"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = write_zip(Path(tmp) / "big.zip", {"Theme/a.bin": os.urandom(2 * MiB)})
+        dest = Path(tmp) / "out"
+        expect_limit_error(lambda: extract_archive(archive, dest, limits=ExtractionLimits(max_total_bytes=MiB)))
+        assert not dest.exists()
+
+def test_compression_ratio_limit():
+    """Un miembro que se descomprime mucho más de lo esperable se trata como bomba"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = write_zip(Path(tmp) / "bomb.zip", {"Theme/zeros.bin": bytes(4 * MiB)}, zipfile.ZIP_DEFLATED)
+        dest = Path(tmp) / "out"
+        message = expect_limit_error(lambda: extract_archive(archive, dest, limits=ExtractionLimits(max_ratio=200)))
+        assert "tasa de compresión" in message
+        assert not dest.exists()
+        # Sin límite de tasa el mismo archivo se extrae
+        extract_archive(archive, dest, limits=ExtractionLimits(max_ratio=0))
+        assert (dest / "Theme" / "zeros.bin").stat().st_size == 4 * MiB
+
+def test_capped_writer():
+    """El escritor corta la extracción al superar el presupuesto, en zip y en tar"""
+    files = {"Theme/a.bin": os.urandom(MiB), "Theme/b.bin": os.urandom(MiB)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for archive in (write_zip(Path(tmp) / "pack.zip", files), write_tar_gz(Path(tmp) / "pack.tar.gz", files)):
+            dest = Path(tmp) / f"out-{archive.name}"
+            budget = ByteBudget(MiB + 1)
+            expect_limit_error(lambda: get_format(archive).extract(archive, dest, None, None, budget))
+            assert budget.written > budget.max_bytes
+            # Con presupuesto suficiente se escribe todo
+            budget = ByteBudget(2 * MiB)
+            assert get_format(archive).extract(archive, dest, None, None, budget) == 2
+            assert budget.written == 2 * MiB
+
+def test_capped_writer_threads():
+    """El presupuesto se comparte entre los hilos de extracción de un zip"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {f"Theme/icon-{i}.png": os.urandom(16 * 1024) for i in range(128)}
+        archive = write_zip(Path(tmp) / "icons.zip", files)
+        budget = ByteBudget(64 * 16 * 1024)
+        expect_limit_error(lambda: get_format(archive).extract(archive, Path(tmp) / "out", None, 4, budget))
+
+def test_invalid_env_limits():
+    """Un valor no válido en el entorno usa el límite por defecto en lugar de impedir la importación"""
+    with tempfile.TemporaryDirectory() as home:
+        env = sandbox_env(home, GNOME_THEME_LOADER_MAX_EXTRACT_MB="mucho", GNOME_THEME_LOADER_MAX_EXTRACT_RATIO="-1",
+                          GNOME_THEME_LOADER_EXTRACT_RESERVE_MB="16")
+        code = ("from theme_loader.utils.archive_formats import DEFAULT_LIMITS as l, ExtractionLimits as E, MiB\n"
+                "d = E()\n"
+                "print(l.max_total_bytes == d.max_total_bytes, l.max_ratio == d.max_ratio, l.reserve_bytes == 16 * MiB)\n")
+        output = run_python(code, env=env)
+    assert output.splitlines()[-1] == "True True True"
+    assert "GNOME_THEME_LOADER_MAX_EXTRACT_MB" in output
+
+def main():
+    print("🛡️ PRUEBA DE LÍMITES DE EXTRACCIÓN")
+    print("="*50)
+    test_member_limit()
+    test_total_size_limit()
+    test_compression_ratio_limit()
+    test_capped_writer()
+    test_capped_writer_threads()
+    test_invalid_env_limits()
+    print("✅ Los límites de extracción se respetan")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Prueba de enlaces simbólicos al extraer
+Comprueba que una cadena de enlaces dentro del archivo no permite escribir
+ni enlazar fuera del destino, y que los enlaces legítimos se conservan
+"""
+
+import sys
+import os
+import io
+import stat
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.utils.archive_formats import extract_archive
+
+def links_outside(dest: Path) -> list:
+    """Enlaces bajo dest que apuntan fuera de dest"""
+    real_dest = os.path.realpath(dest)
+    return [str(p) for p in dest.rglob("*")
+            if p.is_symlink() and os.path.commonpath([os.path.realpath(p), real_dest]) != real_dest]
+
+def write_tar(path: Path, entries: list) -> Path:
+    """entries: (nombre, "dir" | "link" | "file", destino del enlace o contenido)"""
+    with tarfile.open(path, "w") as tf:
+        for name, kind, value in entries:
+            info = tarfile.TarInfo(name)
+            if kind == "dir":
+                info.type = tarfile.DIRTYPE
+                tf.addfile(info)
+            elif kind == "link":
+                info.type = tarfile.SYMTYPE
+                info.linkname = value
+                tf.addfile(info)
+            else:
+                info.size = len(value)
+                tf.addfile(info, io.BytesIO(value))
+    return path
+
+def test_tar_symlink_chain():
+    """x/a -> .. y x/a/b -> .. no permiten escribir x/a/b/victim.txt fuera del destino"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "home" / "dest"
+        dest.mkdir(parents=True)
+        victim = Path(tmp) / "home" / "victim.txt"
+        victim.write_text("original")
+        archive = write_tar(Path(tmp) / "evil.tar", [
+            ("x", "dir", None),
+            ("x/a", "link", ".."),
+            ("x/a/b", "link", ".."),
+            ("x/a/b/victim.txt", "file", b"owned"),
+        ])
+        extract_archive(archive, dest)
+        assert victim.read_text() == "original"
+        assert links_outside(dest) == []
+
+def test_tar_relative_links_kept():
+    """Los enlaces que se quedan dentro del destino (alias de iconos) se crean"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "dest"
+        archive = write_tar(Path(tmp) / "icons.tar", [
+            ("Icons/48x48/apps/app.png", "file", b"png"),
+            ("Icons/48x48/apps/alias.png", "link", "app.png"),
+            ("Icons/scalable", "link", "48x48"),
+        ])
+        extract_archive(archive, dest)
+        assert (dest / "Icons" / "48x48" / "apps" / "alias.png").read_bytes() == b"png"
+        assert (dest / "Icons" / "scalable").is_symlink()
+
+def write_zip_links(path: Path, links: dict, files: dict = None) -> Path:
+    """Zip con enlaces simbólicos al estilo de `zip -y` y archivos normales"""
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in (files or {}).items():
+            zf.writestr(name, content)
+        for name, link_target in links.items():
+            info = zipfile.ZipInfo(name)
+            info.create_system = 3
+            info.external_attr = (stat.S_IFLNK | 0o777) << 16
+            zf.writestr(info, link_target)
+    return path
+
+def test_zip_symlink_chain():
+    """En un zip, y/b -> ../x/a/.. tras x/a -> .. (dentro del destino a simple vista) no sale de él"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "dest"
+        archive = write_zip_links(Path(tmp) / "evil.zip", {"x/a": "..", "y/b": "../x/a/.."}, {"x/keep.txt": "ok"})
+        extract_archive(archive, dest)
+        assert (dest / "x" / "keep.txt").read_text() == "ok"
+        assert links_outside(dest) == []
+
+def test_zip_link_over_directory():
+    """Un enlace con la ruta de un directorio del zip se omite sin abortar la extracción"""
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = Path(tmp) / "dest"
+        archive = write_zip_links(Path(tmp) / "clash.zip", {"x/a": "..", "x/a/b": ".."}, {"x/a/file.txt": "ok"})
+        extract_archive(archive, dest)
+        assert (dest / "x" / "a").is_dir() and not (dest / "x" / "a").is_symlink()
+        assert (dest / "x" / "a" / "file.txt").read_text() == "ok"
+        assert links_outside(dest) == []
+
+def main():
+    print("🔗 PRUEBA DE ENLACES SIMBÓLICOS AL EXTRAER")
+    print("="*50)
+    test_tar_symlink_chain()
+    test_tar_relative_links_kept()
+    test_zip_symlink_chain()
+    test_zip_link_over_directory()
+    print("✅ Los enlaces no salen del destino")
+
+if __name__ == "__main__":
+    main()
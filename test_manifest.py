@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Prueba del manifiesto de instalación
+Comprueba la verificación y la desinstalación por manifiesto en un intérprete
+nuevo con HOME temporal (la papelera y el manifiesto viven bajo HOME)
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from home_sandbox import run_in_home
+
+VERIFY_CODE = (
+    "import json, os, sys\n"
+    "from pathlib import Path\n"
+    "from theme_loader.utils.manifest import ThemeManifest\n"
+    "theme = Path(sys.argv[1])\n"
+    "manifest = ThemeManifest()\n"
+    "manifest.record(theme, 'Icons', 'icons')\n"
+    "clean = manifest.verify(theme)\n"
+    "(theme / 'apps' / 'a.png').write_bytes(b'A' * 10)\n"
+    "(theme / 'apps' / 'b.png').unlink()\n"
+    "(theme / 'apps' / 'added.png').write_bytes(b'new')\n"
+    "st = (theme / 'index.theme').stat()\n"
+    "os.utime(theme / 'index.theme', ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))\n"
+    "result = manifest.verify(theme)\n"
+    "print(json.dumps({'clean': clean.ok and clean.extra == [], 'ok': result.ok, 'missing': result.missing,\n"
+    "                  'modified': result.modified, 'extra': result.extra}))\n"
+)
+
+UNINSTALL_CODE = (
+    "import json, sys\n"
+    "from pathlib import Path\n"
+    "from theme_loader.utils.manifest import ThemeManifest\n"
+    "from theme_loader.utils.trash import get_trash\n"
+    "first, second = Path(sys.argv[1]), Path(sys.argv[2])\n"
+    "manifest = ThemeManifest()\n"
+    "manifest.record(first, 'Icons', 'icons')\n"
+    "manifest.record(second, 'Other', 'icons')\n"
+    "(first / 'apps' / 'added.png').write_bytes(b'new')\n"
+    "token = manifest.uninstall(first)\n"
+    "gone = not first.exists()\n"
+    "kept = manifest.keep_extra_files(first, token)\n"
+    "left = sorted(str(p.relative_to(first)) for p in first.rglob('*') if p.is_file())\n"
+    "forgotten = manifest.get(first) is None\n"
+    "manifest.uninstall(second)\n"
+    "get_trash().flush()\n"
+    "pruned = manifest.prune()\n"
+    "print(json.dumps({'gone': gone, 'kept': kept, 'left': left, 'forgotten': forgotten, 'pruned': pruned,\n"
+    "                  'installs': [r.name for r in manifest.list_installs()]}))\n"
+)
+
+def make_theme(path: Path) -> Path:
+    (path / "apps").mkdir(parents=True)
+    (path / "index.theme").write_text("[Icon Theme]\nName=Icons\nDirectories=apps\n")
+    (path / "apps" / "a.png").write_bytes(b"a" * 10)
+    (path / "apps" / "b.png").write_bytes(b"b" * 10)
+    return path
+
+def test_verify():
+    """Se detectan los archivos modificados, borrados y añadidos; un mtime nuevo sin cambios no cuenta"""
+    with tempfile.TemporaryDirectory() as home:
+        theme = make_theme(Path(home) / ".icons" / "Icons")
+        output = run_in_home(home, VERIFY_CODE, str(theme))
+        assert output["clean"]
+        assert not output["ok"]
+        assert output["missing"] == ["apps/b.png"]
+        assert output["modified"] == ["apps/a.png"]
+        assert output["extra"] == ["apps/added.png"]
+
+def test_uninstall_by_manifest():
+    """Desinstalar aparta el tema, conserva solo lo añadido y prune olvida las rutas que ya no existen"""
+    with tempfile.TemporaryDirectory() as home:
+        first = make_theme(Path(home) / ".icons" / "Icons")
+        second = make_theme(Path(home) / ".icons" / "Other")
+        output = run_in_home(home, UNINSTALL_CODE, str(first), str(second))
+        assert output["gone"]
+        assert output["kept"] == ["apps/added.png"]
+        assert output["left"] == ["apps/added.png"]
+        assert output["forgotten"]
+        assert output["pruned"] == 1
+        assert output["installs"] == []
+        assert not second.exists()
+        assert os.listdir(Path(home) / ".cache" / "gnome-theme-loader" / "trash") == []
+
+def main():
+    print("📋 PRUEBA DEL MANIFIESTO DE INSTALACIÓN")
+    print("="*50)
+    test_verify()
+    test_uninstall_by_manifest()
+    print("✅ El manifiesto verifica y desinstala los temas")
+
+if __name__ == "__main__":
+    main()
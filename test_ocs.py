@@ -69,7 +69,7 @@ def test_theme_listing():
     print(f"Temas instalados: {len(themes)}")
     
     for theme in themes[:5]:  # Mostrar solo los primeros 5
-        print(f"  - {theme['name']} ({theme['type']})")
+        print(f"  - {theme.name} ({theme.type})")
     
     if not themes:
         print("  No hay temas instalados")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Prueba del escáner de temas y su índice
+Comprueba la caché de tamaños y la invalidación del índice de temas con un
+índice temporal
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.core.theme_scanner import ThemeScanner
+from theme_loader.core.theme_index import ThemeIndex, INDEX_VERSION
+
+INDEX_THEME = "[Icon Theme]\nName=Icons\nDirectories=48x48/apps\n"
+
+def make_scanner(base: Path) -> ThemeScanner:
+    """Escáner con un índice propio y sin raíces del sistema"""
+    scanner = ThemeScanner(index=ThemeIndex(base / "index.json"))
+    scanner.theme_dirs = [base / "themes"]
+    scanner.icon_dirs = [base / "icons"]
+    return scanner
+
+def count_walks(scanner: ThemeScanner) -> list:
+    """Contar los recorridos completos del árbol que hace el escáner"""
+    walks = []
+    walk_tree = scanner._walk_tree
+    scanner._walk_tree = lambda path: walks.append(path) or walk_tree(path)
+    return walks
+
+def test_directory_stats_cache():
+    """Un acierto no recorre el árbol; una carpeta nueva o un tema reinstalado sí"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        theme = base / "icons" / "Icons"
+        (theme / "48x48" / "apps").mkdir(parents=True)
+        (theme / "48x48" / "apps" / "app.png").write_bytes(b"x" * 100)
+        (theme / "index.theme").write_text(INDEX_THEME)
+        scanner = make_scanner(base)
+        walks = count_walks(scanner)
+
+        stats = scanner.get_directory_stats(theme)
+        assert (stats["size"], stats["files_count"], len(walks)) == (100 + len(INDEX_THEME), 2, 1)
+        scanner.get_directory_stats(theme)
+        assert len(walks) == 1
+
+        # Carpeta de tamaño nueva: cambia el mtime de la raíz del tema
+        (theme / "64x64").mkdir()
+        (theme / "64x64" / "app.png").write_bytes(b"x" * 50)
+        assert scanner.get_directory_stats(theme)["files_count"] == 3
+        assert len(walks) == 2
+
+        # Archivo nuevo en una carpeta de primer nivel: cambia su mtime
+        (theme / "64x64" / "other.png").write_bytes(b"x")
+        assert scanner.get_directory_stats(theme)["files_count"] == 4
+
+        # Tema reinstalado (otra carpeta renombrada en su sitio): cambia el inodo
+        shutil.copytree(theme, base / "icons" / ".new")
+        (base / "icons" / ".new" / "48x48" / "apps" / "app.png").unlink()
+        shutil.rmtree(theme)
+        os.rename(base / "icons" / ".new", theme)
+        assert scanner.get_directory_stats(theme)["files_count"] == 3
+
+        # La caché se conserva en disco para el siguiente proceso
+        scanner.index.save()
+        reloaded = make_scanner(base)
+        walks = count_walks(reloaded)
+        assert reloaded.get_directory_stats(theme)["files_count"] == 3
+        assert walks == []
+
+def counting_classify(calls: list):
+    """Clasificador de prueba que anota cada tema que clasifica"""
+    def classify(path: Path) -> dict:
+        calls.append(path.name)
+        return {"name": path.name, "files": len(os.listdir(path))}
+    return classify
+
+def test_index_invalidation():
+    """Un tema solo se re-clasifica si cambia su mtime o inodo, o si se invalida"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        root = base / "icons"
+        theme = root / "Icons"
+        theme.mkdir(parents=True)
+        index = ThemeIndex(base / "index.json")
+        calls = []
+        classify = counting_classify(calls)
+
+        assert index.list_root(root) == [theme]
+        assert index.get_entry(theme, classify)["files"] == 0
+        assert index.get_entry(theme, classify)["files"] == 0
+        assert calls == ["Icons"]
+
+        # Un archivo nuevo cambia el mtime del tema
+        (theme / "index.theme").write_text(INDEX_THEME)
+        assert index.get_entry(theme, classify)["files"] == 1
+        assert len(calls) == 2
+
+        index.invalidate(theme)
+        index.get_entry(theme, classify)
+        assert len(calls) == 3
+
+        # La entrada se conserva en disco para el siguiente proceso
+        index.save()
+        reloaded = ThemeIndex(base / "index.json")
+        assert reloaded.get_entry(theme, classify)["files"] == 1
+        assert len(calls) == 3
+
+        # Un tema borrado desaparece del listado y del índice
+        shutil.rmtree(theme)
+        assert reloaded.list_root(root) == []
+        assert str(theme) not in reloaded._themes
+        assert reloaded.get_entry(theme, classify) is None
+
+def test_index_version_mismatch():
+    """Un índice guardado por otra versión se descarta al cargarlo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        theme = base / "icons" / "Icons"
+        theme.mkdir(parents=True)
+        index = ThemeIndex(base / "index.json")
+        calls = []
+        index.get_entry(theme, counting_classify(calls))
+        index.save()
+
+        data = json.loads((base / "index.json").read_text())
+        data["version"] = INDEX_VERSION - 1
+        (base / "index.json").write_text(json.dumps(data))
+        ThemeIndex(base / "index.json").get_entry(theme, counting_classify(calls))
+        assert len(calls) == 2
+
+        (base / "index.json").write_text("{roto")
+        ThemeIndex(base / "index.json").get_entry(theme, counting_classify(calls))
+        assert len(calls) == 3
+
+def main():
+    print("🔍 PRUEBA DEL ESCÁNER DE TEMAS")
+    print("="*50)
+    test_directory_stats_cache()
+    test_index_invalidation()
+    test_index_version_mismatch()
+    print("✅ El escáner y su índice funcionan correctamente")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Prueba de la papelera de temas
+Comprueba apartar, deshacer y purgar temas con una papelera temporal
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from theme_loader.utils.trash import ThemeTrash
+
+def make_theme(path: Path, content: str) -> Path:
+    path.mkdir(parents=True)
+    (path / "index.theme").write_text(content)
+    return path
+
+def wait_purges(trash: ThemeTrash):
+    """Esperar a los borrados en segundo plano antes de limpiar el directorio temporal"""
+    for thread in list(trash._threads):
+        thread.join()
+
+def test_move_and_restore():
+    """El tema desaparece de su ruta al apartarlo y vuelve intacto al deshacer"""
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = ThemeTrash(trash_dir=Path(tmp) / "trash", keep_seconds=60)
+        theme = make_theme(Path(tmp) / "themes" / "MyTheme", "original")
+        token = trash.move(theme)
+        assert token is not None and not theme.exists()
+        assert (trash.trashed_path(token) / "index.theme").read_text() == "original"
+        assert trash.restore(token)
+        assert (theme / "index.theme").read_text() == "original"
+        assert trash.trashed_path(token) is None
+        # Un token ya usado no se puede deshacer otra vez
+        assert not trash.restore(token)
+        assert trash.move(Path(tmp) / "themes" / "Missing") is None
+        wait_purges(trash)
+        assert list((Path(tmp) / "trash").iterdir()) == []
+
+def test_restore_after_purge():
+    """Tras purgar una entrada ya no se puede deshacer y su carpeta se borra"""
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = ThemeTrash(trash_dir=Path(tmp) / "trash", keep_seconds=60)
+        theme = make_theme(Path(tmp) / "themes" / "MyTheme", "original")
+        token = trash.move(theme)
+        trash.purge(token)
+        assert not trash.restore(token)
+        assert not theme.exists()
+        wait_purges(trash)
+        assert list((Path(tmp) / "trash").iterdir()) == []
+
+def test_restore_over_replacement():
+    """Deshacer una sustitución devuelve el tema anterior y aparta la versión nueva"""
+    with tempfile.TemporaryDirectory() as tmp:
+        trash = ThemeTrash(trash_dir=Path(tmp) / "trash", keep_seconds=60)
+        theme = make_theme(Path(tmp) / "themes" / "MyTheme", "v1")
+        token = trash.move(theme)
+        make_theme(theme, "v2")
+        assert trash.restore(token)
+        assert (theme / "index.theme").read_text() == "v1"
+        replaced = [t for t, (original, _) in trash._entries.items() if original == theme]
+        assert len(replaced) == 1
+        assert (trash.trashed_path(replaced[0]) / "index.theme").read_text() == "v2"
+        trash.purge(replaced[0])
+        wait_purges(trash)
+
+def main():
+    print("🗑️ PRUEBA DE LA PAPELERA DE TEMAS")
+    print("="*50)
+    test_move_and_restore()
+    test_restore_after_purge()
+    test_restore_over_replacement()
+    print("✅ La papelera aparta y recupera los temas")
+
+if __name__ == "__main__":
+    main()
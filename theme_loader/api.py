@@ -0,0 +1,177 @@
+"""
+Public API for GNOME Theme Loader
+Stable, GTK-free entry point to scan, install and apply themes. Submodules are
+imported on first use (module __getattr__), so importing this module is cheap
+and never needs a display.
+
+    from theme_loader import api
+    api.scan_themes()["icons"]
+    api.install("Tema.tar.xz", apply_variant="Tema-Dark")
+    api.apply("cursor", "Bibata")
+    api.apply_profile({"gtk": "Tema-Dark", "icons": "Papirus"})
+    api.verify("Tema-Dark")
+"""
+
+import importlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Nombre público -> (submódulo, atributo), importados al primer acceso
+_LAZY_ATTRS = {
+    "ThemeRecord": (".utils.theme_record", "ThemeRecord"),
+    "ThemeType": (".utils.theme_record", "ThemeType"),
+    "ArchiveVariant": (".utils.installer", "ArchiveVariant"),
+    "ExtractionLimits": (".utils.archive_formats", "ExtractionLimits"),
+    "ArchiveLimitError": (".utils.archive_formats", "ArchiveLimitError"),
+    "UnsupportedArchiveError": (".utils.archive_formats", "UnsupportedArchiveError"),
+    "InstallRecord": (".utils.manifest", "InstallRecord"),
+    "VerifyResult": (".utils.manifest", "VerifyResult"),
+    "ManifestDiff": (".utils.manifest", "ManifestDiff"),
+    "DedupResult": (".utils.dedup", "DedupResult"),
+    "DEDUP_ON_INSTALL": (".utils.dedup", "DEDUP_ON_INSTALL"),
+    "ThemeScanner": (".core.theme_scanner", "ThemeScanner"),
+    "ThemeManager": (".core.theme_manager", "ThemeManager"),
+    "ThemeApplier": (".core.theme_applier", "ThemeApplier"),
+}
+
+APPLY_TYPES = ("gtk", "shell", "icons", "cursor", "grub")
+# Procesos para instalar varios archivos a la vez
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+
+MessageCallback = Callable[[str, str], None]
+Installed = List[Tuple[str, str]]
+
+def __getattr__(name: str):
+    try:
+        module_name, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __package__), attr)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
+
+def _quiet(message: str, level: str):
+    pass
+
+def scan_themes() -> Dict[str, list]:
+    """Temas instalados por tipo (listas de ThemeRecord), con el índice persistente"""
+    from .core.theme_scanner import ThemeScanner
+    return ThemeScanner().scan_all_themes()
+
+def list_variants(path: Union[str, Path]) -> Optional[list]:
+    """Variantes (ArchiveVariant) de un archivo sin extraerlo; None si no se puede leer"""
+    from .utils.installer import list_archive_variants
+    return list_archive_variants(Path(path))
+
+def install(path: Union[str, Path], variants: Optional[Iterable[str]] = None, apply_variant: Optional[str] = None,
+            callback: Optional[MessageCallback] = None, dedup_files: Optional[bool] = None) -> Installed:
+    """Instalar un archivo; solo se aplica apply_variant, si se indica. Devuelve [(nombre, tipo)]"""
+    from .utils.installer import install_archive
+    return install_archive(Path(path), callback or _quiet, auto_apply=False,
+                           variants=variants, apply_variant=apply_variant, dedup_files=dedup_files)
+
+def _install_in_worker(path: str, variants: Optional[List[str]]) -> Tuple[str, Installed, List[Tuple[str, str]]]:
+    """Instalar en un proceso del pool, guardando los mensajes para mostrarlos en orden"""
+    messages: List[Tuple[str, str]] = []
+    try:
+        # La deduplicación se hace una vez al final, no en cada proceso a la vez
+        installed = install(path, variants, callback=lambda msg, level: messages.append((msg, level)),
+                            dedup_files=False)
+    except Exception as e:
+        messages.append((f"❌ Error instalando {Path(path).name}: {e}", "error"))
+        installed = []
+    return path, installed, messages
+
+def install_many(paths: Iterable[Union[str, Path]], variants: Optional[Iterable[str]] = None,
+                 jobs: Optional[int] = None) -> List[Tuple[str, Installed, List[Tuple[str, str]]]]:
+    """Instalar varios archivos en paralelo en procesos separados, sin aplicar ninguno
+
+    Devuelve, en el orden de paths, (ruta, [(nombre, tipo)], [(mensaje, nivel)]).
+    """
+    paths = [str(p) for p in paths]
+    variants = list(variants) if variants is not None else None
+    jobs = min(jobs or DEFAULT_JOBS, len(paths))
+    if jobs <= 1:
+        return [_install_in_worker(path, variants) for path in paths]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_install_in_worker, paths, [variants] * len(paths)))
+
+def apply(theme_type: str, name: str, callback: Optional[MessageCallback] = None) -> bool:
+    """Aplicar un tema instalado (gtk, shell, icons, cursor o grub)"""
+    from .core.theme_applier import ThemeApplier
+    return ThemeApplier(callback=callback or _quiet).apply_theme(theme_type, name)
+
+def load_profile(path: Union[str, Path]) -> Dict[str, str]:
+    """Leer un perfil JSON ({"gtk": ..., "icons": ...} o {"themes": {...}}); ValueError si no es válido"""
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    themes = profile.get("themes", profile) if isinstance(profile, dict) else None
+    if not isinstance(themes, dict):
+        raise ValueError(f"Perfil inválido: {path}")
+    unknown = [kind for kind in themes if kind not in APPLY_TYPES]
+    if unknown:
+        raise ValueError(f"Tipos de tema desconocidos en el perfil: {', '.join(unknown)}")
+    return themes
+
+def apply_profile(profile: Union[Dict[str, str], str, Path], callback: Optional[MessageCallback] = None) -> bool:
+    """Aplicar un tema por tipo desde un perfil (dict o ruta a un JSON)"""
+    from .core.theme_applier import ThemeApplier
+    themes = profile if isinstance(profile, dict) else load_profile(profile)
+    return ThemeApplier(callback=callback or _quiet).apply_theme_combo(themes)
+
+def list_installs(name: Optional[str] = None) -> list:
+    """Instalaciones registradas en el manifiesto (InstallRecord), opcionalmente de un solo tema"""
+    from .utils.manifest import get_manifest
+    manifest = get_manifest()
+    return manifest.find(name) if name else manifest.list_installs()
+
+def verify(name: Optional[str] = None) -> Dict[str, object]:
+    """Verificar los temas instalados contra el manifiesto: ruta -> VerifyResult"""
+    from .utils.manifest import get_manifest
+    manifest = get_manifest()
+    return {record.path: manifest.verify(Path(record.path)) for record in list_installs(name)}
+
+def diff(name: str) -> Dict[str, object]:
+    """Cambios entre la versión anterior y la actual de un tema: ruta -> ManifestDiff (o None)"""
+    from .utils.manifest import get_manifest
+    manifest = get_manifest()
+    return {record.path: manifest.diff(Path(record.path)) for record in list_installs(name)}
+
+def user_theme_roots() -> List[Path]:
+    """Directorios de temas e iconos del usuario (sin los exportados por flatpak)"""
+    from .core.theme_roots import get_theme_roots, get_root_source
+    roots = get_theme_roots()
+    return [root for root in roots.theme_dirs + roots.icon_dirs
+            if get_root_source(root) == "user" and "flatpak" not in root.parts]
+
+def dedup(mode: str = "auto", dry_run: bool = False, only_under: Optional[Iterable[Union[str, Path]]] = None):
+    """Enlazar (reflink o enlace duro) los archivos idénticos de los temas del usuario; devuelve DedupResult"""
+    from .utils.dedup import dedup as dedup_roots
+    only = [Path(p) for p in only_under] if only_under is not None else None
+    return dedup_roots(user_theme_roots(), only_under=only, mode=mode, dry_run=dry_run)
+
+def uninstall(name: str) -> List[str]:
+    """Desinstalar exactamente los archivos registrados de un tema; devuelve las rutas afectadas
+
+    Cada tema se aparta a la papelera y se conservan en su sitio los archivos
+    añadidos después de instalarlo.
+    """
+    from .utils.manifest import get_manifest
+    manifest = get_manifest()
+    paths = [record.path for record in manifest.find(name)]
+    for path in paths:
+        token = manifest.uninstall(Path(path))
+        manifest.keep_extra_files(Path(path), token)
+    return paths
+
+__all__ = [
+    "scan_themes", "list_variants", "install", "install_many", "apply", "load_profile", "apply_profile",
+    "list_installs", "verify", "diff", "uninstall", "user_theme_roots", "dedup",
+    "APPLY_TYPES", *_LAZY_ATTRS,
+]
@@ -0,0 +1,221 @@
+"""
+Command line interface for GNOME Theme Loader
+Scan, install and apply themes without loading GTK (usable over SSH)
+
+    python3 -m theme_loader scan
+    python3 -m theme_loader list [TIPO] --json
+    python3 -m theme_loader install TEMA.tar.xz OTRO.zip [--variant NOMBRE] [--apply NOMBRE]
+    python3 -m theme_loader apply icons Papirus
+    python3 -m theme_loader profile apply perfil.json
+    python3 -m theme_loader verify [NOMBRE]
+    python3 -m theme_loader dedup [--dry-run]
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from . import api
+
+PROG = "gnome-theme-loader"
+
+def _print_message(message: str, level: str = "info"):
+    """Callback de mensajes: los errores van a stderr"""
+    stream = sys.stderr if level == "error" else sys.stdout
+    print(message, file=stream, flush=True)
+
+def cmd_scan(args) -> int:
+    themes = api.scan_themes()
+    for kind, records in themes.items():
+        print(f"{kind}: {len(records)}")
+        if args.verbose:
+            for record in records:
+                print(f"  {record.name} ({record.source}) {record.path}")
+    return 0
+
+def cmd_list(args) -> int:
+    themes = api.scan_themes()
+    if args.type:
+        themes = {args.type: themes.get(args.type, [])}
+    if args.json:
+        json.dump({kind: [record.to_dict() for record in records] for kind, records in themes.items()},
+                  sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+    for kind, records in themes.items():
+        for record in records:
+            print(f"{kind}\t{record.name}\t{record.source}\t{record.path}")
+    return 0
+
+def cmd_install(args) -> int:
+    if args.list_variants:
+        for file in args.files:
+            variants = api.list_variants(file)
+            if variants is None:
+                _print_message(f"Formato no soportado: {file}", "error")
+                continue
+            for variant in variants:
+                print(f"{file}\t{variant.name}\t{variant.kind}\t{variant.folder or '.'}")
+        return 0
+
+    # Un archivo se instala en este proceso; varios, en paralelo en procesos separados
+    results = api.install_many(args.files, args.variant, args.jobs)
+    installed = []
+    failed = 0
+    for path, done, messages in results:
+        for message, level in messages:
+            _print_message(message, level)
+        if not done:
+            failed += 1
+        installed.extend(done)
+
+    if (args.dedup or api.DEDUP_ON_INSTALL) and installed:
+        new_paths = [record.path for name, kind in installed for record in api.list_installs(name)]
+        _print_dedup(api.dedup(only_under=new_paths))
+
+    # Como mucho se aplica un tema al final
+    if args.apply:
+        match = next((item for item in installed if item[0] == args.apply), None)
+        if match is None:
+            _print_message(f"No se instaló ningún tema llamado {args.apply}", "error")
+            return 1
+        if not api.apply(match[1], match[0], _print_message):
+            return 1
+    return 1 if failed else 0
+
+def cmd_apply(args) -> int:
+    return 0 if api.apply(args.type, args.name, _print_message) else 1
+
+def cmd_profile(args) -> int:
+    try:
+        themes = api.load_profile(args.file)
+    except (OSError, ValueError) as e:
+        _print_message(f"No se pudo leer el perfil {args.file}: {e}", "error")
+        return 1
+    return 0 if api.apply_profile(themes, _print_message) else 1
+
+def cmd_verify(args) -> int:
+    results = api.verify(args.name)
+    if not results:
+        _print_message("No hay instalaciones registradas" + (f" de {args.name}" if args.name else ""), "error")
+        return 1
+    failed = 0
+    for path, result in results.items():
+        if result is None:
+            continue
+        if result.ok:
+            print(f"✅ {path}" + (f" ({len(result.extra)} archivos añadidos)" if result.extra else ""))
+            continue
+        failed += 1
+        print(f"❌ {path}")
+        for rel in result.missing:
+            print(f"  falta       {rel}")
+        for rel in result.modified:
+            print(f"  modificado  {rel}")
+    return 1 if failed else 0
+
+def cmd_diff(args) -> int:
+    results = api.diff(args.name)
+    if not results:
+        _print_message(f"No hay instalaciones registradas de {args.name}", "error")
+        return 1
+    for path, changes in results.items():
+        print(path)
+        if changes is None:
+            print("  sin versión anterior registrada")
+            continue
+        if not any(changes):
+            print("  sin cambios")
+        for label, names in (("+", changes.added), ("-", changes.removed), ("~", changes.changed)):
+            for rel in names:
+                print(f"  {label} {rel}")
+    return 0
+
+def _print_dedup(result, dry_run: bool = False):
+    verb = "se enlazarían" if dry_run else "enlazados"
+    print(f"♻️ {result.files} archivos duplicados {verb} en {result.groups} grupos "
+          f"({result.bytes_saved / 1024 / 1024:.1f} MiB)")
+
+def cmd_dedup(args) -> int:
+    _print_dedup(api.dedup(args.mode, args.dry_run), args.dry_run)
+    return 0
+
+def cmd_uninstall(args) -> int:
+    paths = api.uninstall(args.name)
+    if not paths:
+        _print_message(f"No hay instalaciones registradas de {args.name}", "error")
+        return 1
+    for path in paths:
+        print(f"🗑️ {path}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=PROG, description="Gestor de temas de GNOME sin interfaz gráfica")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="Escanear los temas instalados")
+    scan.add_argument("-v", "--verbose", action="store_true", help="Mostrar cada tema")
+    scan.set_defaults(func=cmd_scan)
+
+    listing = commands.add_parser("list", help="Listar los temas instalados")
+    listing.add_argument("type", nargs="?", choices=[t.value for t in api.ThemeType if t is not api.ThemeType.OTHER])
+    listing.add_argument("--json", action="store_true", help="Salida en JSON")
+    listing.set_defaults(func=cmd_list)
+
+    install = commands.add_parser("install", help="Instalar temas desde archivos comprimidos")
+    install.add_argument("files", nargs="+", metavar="FILE")
+    install.add_argument("--variant", action="append", metavar="NOMBRE",
+                         help="Instalar solo esta variante (se puede repetir)")
+    install.add_argument("--apply", metavar="NOMBRE", help="Aplicar esta variante al terminar")
+    install.add_argument("--list-variants", action="store_true", help="Mostrar las variantes sin instalar")
+    install.add_argument("-j", "--jobs", type=int, help=f"Procesos en paralelo (por defecto {api.DEFAULT_JOBS})")
+    install.add_argument("--dedup", action="store_true", help="Enlazar los archivos idénticos a los de otros temas")
+    install.set_defaults(func=cmd_install)
+
+    apply = commands.add_parser("apply", help="Aplicar un tema instalado")
+    apply.add_argument("type", choices=api.APPLY_TYPES)
+    apply.add_argument("name")
+    apply.set_defaults(func=cmd_apply)
+
+    profile = commands.add_parser("profile", help="Perfiles de temas (JSON con un tema por tipo)")
+    profile_commands = profile.add_subparsers(dest="profile_command", required=True)
+    profile_apply = profile_commands.add_parser("apply", help="Aplicar todos los temas de un perfil")
+    profile_apply.add_argument("file", metavar="PERFIL.json")
+    profile_apply.set_defaults(func=cmd_profile)
+
+    verify = commands.add_parser("verify", help="Comprobar los temas instalados contra el manifiesto")
+    verify.add_argument("name", nargs="?", metavar="NOMBRE")
+    verify.set_defaults(func=cmd_verify)
+
+    diff = commands.add_parser("diff", help="Cambios entre la versión anterior y la actual de un tema")
+    diff.add_argument("name", metavar="NOMBRE")
+    diff.set_defaults(func=cmd_diff)
+
+    uninstall = commands.add_parser("uninstall", help="Desinstalar exactamente los archivos de un tema")
+    uninstall.add_argument("name", metavar="NOMBRE")
+    uninstall.set_defaults(func=cmd_uninstall)
+
+    dedup = commands.add_parser("dedup", help="Enlazar los archivos idénticos entre los temas del usuario")
+    dedup.add_argument("--mode", choices=("auto", "reflink", "hardlink"), default="auto",
+                       help="auto: reflink si el sistema de archivos lo permite, si no enlace duro")
+    dedup.add_argument("--dry-run", action="store_true", help="Solo calcular el ahorro")
+    dedup.set_defaults(func=cmd_dedup)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Borrar lo que quede en la papelera de sesiones anteriores y olvidar temas que ya no existen
+    from .utils.trash import get_trash
+    from .utils.manifest import get_manifest
+    trash = get_trash()
+    trash.purge_expired()
+    get_manifest().prune()
+    try:
+        return args.func(args)
+    finally:
+        # Sin bucle principal no hay deshacer: borrar ahora lo apartado en esta ejecución
+        trash.flush()
+
+if __name__ == "__main__":
+    sys.exit(main())
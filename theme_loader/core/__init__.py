@@ -3,8 +3,22 @@ Core module for GNOME Theme Loader
 Contains theme management, scanning, and application logic
 """
 
-from .theme_manager import ThemeManager
-from .theme_scanner import ThemeScanner
-from .theme_applier import ThemeApplier
+import importlib
 
-__all__ = ['ThemeManager', 'ThemeScanner', 'ThemeApplier'] 
\ No newline at end of file
+# Los submódulos se importan al primer acceso para que importar el paquete sea barato
+_LAZY_ATTRS = {
+    'ThemeManager': '.theme_manager',
+    'ThemeScanner': '.theme_scanner',
+    'ThemeApplier': '.theme_applier',
+    'ThemeStateService': '.theme_state',
+    'OperationFuture': '.operations',
+}
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = ['ThemeManager', 'ThemeScanner', 'ThemeApplier']
@@ -0,0 +1,80 @@
+"""
+Icon Inheritance module for GNOME Theme Loader
+Inheritance graph of installed icon themes with memoized fallback-chain resolution
+"""
+
+from typing import Dict, List, Set, Tuple
+
+# Tema de respaldo obligatorio según la especificación de temas de iconos
+FALLBACK_THEME = "hicolor"
+
+class IconInheritanceGraph:
+    """Grafo de herencia (Inherits=) de los temas de iconos instalados"""
+
+    def __init__(self, parents: Dict[str, List[str]]):
+        # nombre del tema -> padres declarados en Inherits, en orden
+        self._parents = {name: tuple(p) for name, p in parents.items()}
+        self._chains: Dict[str, Tuple[str, ...]] = {}
+        self._missing: Dict[str, Tuple[str, ...]] = {}
+        self._cycles: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._parents
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def get_parents(self, name: str) -> List[str]:
+        """Padres directos declarados por un tema"""
+        return list(self._parents.get(name, ()))
+
+    def resolve(self, name: str) -> List[str]:
+        """Cadena de búsqueda del tema (él mismo, sus padres en profundidad y hicolor)"""
+        if name not in self._chains:
+            self._build(name)
+        return list(self._chains[name])
+
+    def get_missing_parents(self, name: str) -> List[str]:
+        """Temas referenciados en la cadena de herencia que no están instalados"""
+        if name not in self._chains:
+            self._build(name)
+        return list(self._missing[name])
+
+    def get_cycles(self, name: str) -> List[Tuple[str, str]]:
+        """Aristas (hijo, padre) que cierran un ciclo en la cadena del tema"""
+        if name not in self._chains:
+            self._build(name)
+        return list(self._cycles[name])
+
+    def _build(self, root: str):
+        """Recorrer la herencia en profundidad una vez y memoizar el resultado"""
+        chain: List[str] = []
+        seen: Set[str] = set()
+        missing: List[str] = []
+        cycles: List[Tuple[str, str]] = []
+        visiting: Set[str] = set()
+
+        def visit(name: str):
+            if name in seen:
+                return
+            if name not in self._parents:
+                if name not in missing:
+                    missing.append(name)
+                return
+            seen.add(name)
+            visiting.add(name)
+            chain.append(name)
+            for parent in self._parents[name]:
+                if parent in visiting:
+                    cycles.append((name, parent))
+                    continue
+                visit(parent)
+            visiting.discard(name)
+
+        visit(root)
+        if FALLBACK_THEME not in seen and root != FALLBACK_THEME:
+            visit(FALLBACK_THEME)
+
+        self._chains[root] = tuple(chain)
+        self._missing[root] = tuple(m for m in missing if m != root)
+        self._cycles[root] = tuple(cycles)
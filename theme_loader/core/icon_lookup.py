@@ -0,0 +1,246 @@
+"""
+Icon Lookup module for GNOME Theme Loader
+Freedesktop Icon Theme spec lookup engine backed by a persisted per-theme icon index
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .theme_index import CACHE_DIR
+from .theme_scanner import ThemeScanner
+from ..utils.index_theme import read_index_theme
+
+ICON_CACHE_DIR = CACHE_DIR / "icons"
+ICON_INDEX_VERSION = 1
+# Orden de preferencia de extensiones según la especificación
+ICON_EXTENSIONS = (".png", ".svg", ".xpm")
+
+def _to_int(value, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+class IconThemeIndex:
+    """Índice nombre de icono -> directorios donde existe, para un tema"""
+
+    def __init__(self, name: str, bases: List[Path], directories: List[Dict], icons: Dict[str, List[List]]):
+        self.name = name
+        self.bases = bases
+        # Descriptores de directorio: path, size, scale, type, min_size, max_size, threshold
+        self.directories = directories
+        # nombre -> [[índice de directorio, índice de base, extensión], ...]
+        self.icons = icons
+
+    @classmethod
+    def build(cls, name: str, bases: List[Path]) -> Optional["IconThemeIndex"]:
+        """Construir el índice recorriendo los directorios declarados en index.theme"""
+        data = None
+        for base in bases:
+            data = read_index_theme(base, sections=None)
+            if data:
+                break
+        if not data or "Icon Theme" not in data:
+            return None
+
+        header = data["Icon Theme"]
+        names = []
+        for key in ("Directories", "ScaledDirectories"):
+            for subdir in header.get(key, "").split(","):
+                subdir = subdir.strip()
+                if subdir and subdir not in names:
+                    names.append(subdir)
+
+        directories = []
+        for subdir in names:
+            section = data.get(subdir, {})
+            size = _to_int(section.get("Size"), 0)
+            if size <= 0:
+                continue
+            directories.append({
+                "path": subdir,
+                "size": size,
+                "scale": _to_int(section.get("Scale"), 1),
+                "type": section.get("Type", "Threshold"),
+                "min_size": _to_int(section.get("MinSize"), size),
+                "max_size": _to_int(section.get("MaxSize"), size),
+                "threshold": _to_int(section.get("Threshold"), 2),
+            })
+
+        icons: Dict[str, List[List]] = {}
+        for dir_idx, directory in enumerate(directories):
+            for base_idx, base in enumerate(bases):
+                try:
+                    with os.scandir(base / directory["path"]) as it:
+                        for entry in it:
+                            stem, ext = os.path.splitext(entry.name)
+                            if ext in ICON_EXTENSIONS:
+                                icons.setdefault(stem, []).append([dir_idx, base_idx, ext])
+                except OSError:
+                    continue
+        return cls(name, bases, directories, icons)
+
+    def signature(self) -> List[Tuple[str, int]]:
+        """mtimes de index.theme y de cada directorio de iconos, para validar la caché"""
+        paths = []
+        for base in self.bases:
+            paths.append(base / "index.theme")
+            paths.extend(base / directory["path"] for directory in self.directories)
+        signature = []
+        for path in paths:
+            try:
+                signature.append((str(path), os.stat(path).st_mtime_ns))
+            except OSError:
+                signature.append((str(path), 0))
+        return signature
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": ICON_INDEX_VERSION,
+            "name": self.name,
+            "bases": [str(b) for b in self.bases],
+            "directories": self.directories,
+            "icons": self.icons,
+            "signature": self.signature(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional["IconThemeIndex"]:
+        if data.get("version") != ICON_INDEX_VERSION:
+            return None
+        index = cls(data["name"], [Path(b) for b in data["bases"]], data["directories"], data["icons"])
+        if [list(s) for s in index.signature()] != [list(s) for s in data.get("signature", [])]:
+            return None
+        return index
+
+    def lookup(self, icon_name: str, size: int, scale: int = 1) -> Optional[str]:
+        """Buscar la mejor ruta de un icono en este tema (algoritmo LookupIcon de la especificación)"""
+        candidates = self.icons.get(icon_name)
+        if not candidates:
+            return None
+
+        best = None
+        best_key = None
+        for dir_idx, base_idx, ext in candidates:
+            directory = self.directories[dir_idx]
+            matches = self._matches_size(directory, size, scale)
+            distance = 0 if matches else self._size_distance(directory, size, scale)
+            # Coincidencia exacta primero, luego menor distancia, luego extensión preferida
+            key = (not matches, distance, ICON_EXTENSIONS.index(ext))
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (dir_idx, base_idx, ext)
+
+        dir_idx, base_idx, ext = best
+        return str(self.bases[base_idx] / self.directories[dir_idx]["path"] / f"{icon_name}{ext}")
+
+    @staticmethod
+    def _matches_size(directory: Dict, size: int, scale: int) -> bool:
+        if directory["scale"] != scale:
+            return False
+        if directory["type"] == "Fixed":
+            return directory["size"] == size
+        if directory["type"] == "Scalable":
+            return directory["min_size"] <= size <= directory["max_size"]
+        return directory["size"] - directory["threshold"] <= size <= directory["size"] + directory["threshold"]
+
+    @staticmethod
+    def _size_distance(directory: Dict, size: int, scale: int) -> int:
+        target = size * scale
+        dir_scale = directory["scale"]
+        if directory["type"] == "Fixed":
+            return abs(directory["size"] * dir_scale - target)
+        if directory["type"] == "Scalable":
+            low, high = directory["min_size"], directory["max_size"]
+        else:
+            low = directory["size"] - directory["threshold"]
+            high = directory["size"] + directory["threshold"]
+        if target < low * dir_scale:
+            return low * dir_scale - target
+        if target > high * dir_scale:
+            return target - high * dir_scale
+        return 0
+
+class IconLookup:
+    """Motor de búsqueda de iconos por tema con herencia y caché persistente"""
+
+    def __init__(self, scanner: Optional[ThemeScanner] = None, cache_dir: Path = ICON_CACHE_DIR):
+        self.scanner = scanner or ThemeScanner()
+        self.cache_dir = Path(cache_dir)
+        self._indexes: Dict[str, Optional[IconThemeIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get_theme_index(self, theme_name: str) -> Optional[IconThemeIndex]:
+        """Obtener el índice de un tema (memoria, después disco, después construcción)"""
+        with self._lock:
+            if theme_name in self._indexes:
+                return self._indexes[theme_name]
+
+        bases = self._find_theme_bases(theme_name)
+        index = None
+        if bases:
+            cache_file = self._cache_file(theme_name, bases)
+            index = self._load_cached(cache_file)
+            if index is None:
+                index = IconThemeIndex.build(theme_name, bases)
+                if index is not None:
+                    self._save_cached(cache_file, index)
+
+        with self._lock:
+            self._indexes[theme_name] = index
+        return index
+
+    def lookup_icon(self, icon_name: str, size: int, theme_name: str, scale: int = 1) -> Optional[str]:
+        """Mejor ruta para un icono en un tema, recorriendo su cadena de herencia"""
+        for name in self.scanner.get_icon_theme_chain(theme_name) or [theme_name]:
+            index = self.get_theme_index(name)
+            if index is None:
+                continue
+            path = index.lookup(icon_name, size, scale)
+            if path:
+                return path
+        return None
+
+    def list_theme_icons(self, theme_name: str, size: int = 48) -> List[str]:
+        """Mejor ruta de cada icono de un tema (sin herencia) para el tamaño dado"""
+        index = self.get_theme_index(theme_name)
+        if index is None:
+            return []
+        return sorted(index.lookup(name, size) for name in index.icons)
+
+    def invalidate(self, theme_name: Optional[str] = None):
+        """Olvidar los índices en memoria (todos o el de un tema)"""
+        with self._lock:
+            if theme_name is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(theme_name, None)
+
+    def _find_theme_bases(self, theme_name: str) -> List[Path]:
+        """Directorios base de un tema en todas las raíces de iconos, en orden de precedencia"""
+        return [root / theme_name for root in self.scanner.icon_dirs if (root / theme_name).is_dir()]
+
+    def _cache_file(self, theme_name: str, bases: List[Path]) -> Path:
+        digest = hashlib.blake2b("\0".join(str(b) for b in bases).encode(), digest_size=8).hexdigest()
+        return self.cache_dir / f"{theme_name}-{digest}.json"
+
+    def _load_cached(self, cache_file: Path) -> Optional[IconThemeIndex]:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                return IconThemeIndex.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_cached(self, cache_file: Path, index: IconThemeIndex):
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(index.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"No se pudo guardar el índice de iconos de {index.name}: {e}")
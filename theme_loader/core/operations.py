@@ -0,0 +1,113 @@
+"""
+Operations module for GNOME Theme Loader
+Runs long theme operations (apply, install, reset, GRUB) on a small worker
+pool and returns cancellable futures; progress messages and completion
+callbacks are delivered on the GLib main loop
+"""
+
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Optional
+import threading
+
+# Pocas operaciones a la vez: casi todo el tiempo se espera a gsettings, pkexec o al disco
+OPERATION_WORKERS = 2
+
+class OperationFuture(Future):
+    """Future que también se puede cancelar mientras se ejecuta.
+
+    cancel() descarta una operación pendiente; si ya se está ejecutando activa
+    cancel_event, que la operación comprueba entre pasos (antes de extraer,
+    antes de mover los temas a su sitio, entre temas de una combinación). Una
+    operación cancelada termina con CancelledError.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> bool:
+        if self.done():
+            return False
+        self.cancel_event.set()
+        super().cancel()
+        return True
+
+    def cancel_requested(self) -> bool:
+        return self.cancel_event.is_set()
+
+_glib = None
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _load_glib():
+    """GLib de PyGObject, importado al primer uso; None si gi no está instalado"""
+    global _glib
+    if _glib is None:
+        try:
+            from gi.repository import GLib
+            _glib = GLib
+        except (ImportError, ValueError):
+            _glib = False
+    return _glib or None
+
+def main_loop_dispatch(func: Callable, *args):
+    """Ejecutar func(*args) en el bucle principal de GLib (directamente si no hay gi)"""
+    GLib = _load_glib()
+    if GLib is None:
+        func(*args)
+        return
+
+    def idle():
+        func(*args)
+        return False
+    GLib.idle_add(idle)
+
+def call_directly(func: Callable, *args):
+    """Ejecutar func(*args) en el hilo de la operación (para usos sin bucle principal)"""
+    func(*args)
+
+def get_operations_executor() -> ThreadPoolExecutor:
+    """Pool compartido por todas las operaciones del proceso"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=OPERATION_WORKERS, thread_name_prefix="theme-ops")
+        return _executor
+
+def run_operation(func: Callable, *args, callback: Optional[Callable] = None, done: Optional[Callable] = None,
+                  dispatch: Optional[Callable] = None, **kwargs) -> OperationFuture:
+    """Ejecutar func(*args, callback=..., cancel_event=..., **kwargs) en el pool de operaciones.
+
+    callback(mensaje, nivel) y done(future) se entregan con dispatch (por
+    defecto en el bucle principal de GLib), así que pueden tocar la interfaz.
+    """
+    dispatch = dispatch or main_loop_dispatch
+    future = OperationFuture()
+
+    def forward(message, level):
+        if callback:
+            dispatch(callback, message, level)
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args, callback=forward, cancel_event=future.cancel_event, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            if future.cancel_event.is_set():
+                future.set_exception(CancelledError())
+            else:
+                future.set_result(result)
+
+    if done:
+        future.add_done_callback(lambda f: dispatch(done, f))
+    get_operations_executor().submit(run)
+    return future
+
+def operation_result(future: Future, default=None):
+    """Resultado de una operación terminada; default si se canceló o falló"""
+    if future.cancelled() or future.exception() is not None:
+        return default
+    return future.result()
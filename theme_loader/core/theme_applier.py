@@ -3,23 +3,29 @@ Theme Applier module for GNOME Theme Loader
 Handles theme application with feedback and error handling
 """
 
-import gi
-gi.require_version("Gtk", "4.0")
-from gi.repository import Gtk, GLib
 from pathlib import Path
 from typing import Callable, Optional
 import subprocess
+import threading
 import os
 
 # Importar módulos locales
-from ..utils.gsettings import set_gtk_theme, set_shell_theme, set_icon_theme, set_cursor_theme
+from ..utils.gsettings import set_gtk_theme, set_shell_theme, set_icon_theme, set_cursor_theme, set_themes, THEME_KEYS
 from ..utils.grub import apply_grub_theme
+from .theme_scanner import ThemeScanner
+from .theme_state import ThemeStateService
+from .operations import OperationFuture, run_operation
 
 class ThemeApplier:
     """Aplicador de temas con manejo de errores y feedback"""
     
-    def __init__(self, callback: Optional[Callable] = None):
+    def __init__(self, callback: Optional[Callable] = None, scanner: Optional[ThemeScanner] = None,
+                 state: Optional[ThemeStateService] = None):
         self.callback = callback
+        # Escáner para comprobar la herencia de temas de iconos
+        self.scanner = scanner or ThemeScanner()
+        # Servicio con los temas aplicados en el sistema (no solo los de este proceso)
+        self.state = state
         self.current_themes = {
             "gtk": None,
             "shell": None,
@@ -28,7 +34,8 @@ class ThemeApplier:
             "grub": None
         }
     
-    def apply_theme(self, theme_type: str, theme_name: str, callback: Optional[Callable] = None) -> bool:
+    def apply_theme(self, theme_type: str, theme_name: str, callback: Optional[Callable] = None,
+                    cancel_event: Optional[threading.Event] = None) -> bool:
         """Aplicar un tema específico con feedback"""
         try:
             # Usar callback local si se proporciona, sino el global
@@ -37,6 +44,9 @@ class ThemeApplier:
             if local_callback:
                 local_callback(f"Aplicando tema {theme_name}...", "info")
             
+            if cancel_event and cancel_event.is_set():
+                return False
+            
             success = False
             
             if theme_type == "gtk":
@@ -55,7 +65,7 @@ class ThemeApplier:
                 return False
             
             if success:
-                self.current_themes[theme_type] = theme_name
+                self._set_current(theme_type, theme_name)
                 if local_callback:
                     local_callback(f"Tema {theme_name} aplicado correctamente", "success")
                 return True
@@ -70,7 +80,8 @@ class ThemeApplier:
                 callback(error_msg, "error")
             return False
     
-    def apply_theme_combo(self, themes: dict, callback: Optional[Callable] = None) -> bool:
+    def apply_theme_combo(self, themes: dict, callback: Optional[Callable] = None,
+                          cancel_event: Optional[threading.Event] = None) -> bool:
         """Aplicar múltiples temas a la vez"""
         try:
             local_callback = callback or self.callback
@@ -81,9 +92,27 @@ class ThemeApplier:
             success_count = 0
             total_count = len(themes)
             
+            # Los temas de gsettings se escriben juntos, en una transacción por esquema
+            batch = {t: n for t, n in themes.items() if n and t in THEME_KEYS}
+            if cancel_event and cancel_event.is_set():
+                batch = {}
+            if "icons" in batch:
+                self._warn_icon_inheritance(batch["icons"], local_callback)
+            for theme_type, ok in set_themes(batch).items():
+                theme_name = batch[theme_type]
+                if ok:
+                    success_count += 1
+                    self._set_current(theme_type, theme_name)
+                    if local_callback:
+                        local_callback(f"Tema {theme_name} aplicado correctamente", "success")
+                        if theme_type == "shell":
+                            local_callback("Reinicia GNOME Shell para ver los cambios (Alt+F2, r)", "info")
+                elif local_callback:
+                    local_callback(f"Error al aplicar el tema {theme_name}", "error")
+            
             for theme_type, theme_name in themes.items():
-                if theme_name:
-                    if self.apply_theme(theme_type, theme_name, local_callback):
+                if theme_name and theme_type not in batch:
+                    if self.apply_theme(theme_type, theme_name, local_callback, cancel_event):
                         success_count += 1
             
             if success_count == total_count:
@@ -144,6 +173,8 @@ class ThemeApplier:
             if callback:
                 callback(f"Aplicando tema de iconos: {theme_name}", "info")
             
+            self._warn_icon_inheritance(theme_name, callback)
+            
             success = set_icon_theme(theme_name)
             
             if success and callback:
@@ -156,6 +187,17 @@ class ThemeApplier:
                 callback(f"Error aplicando tema de iconos: {str(e)}", "error")
             return False
     
+    def _warn_icon_inheritance(self, theme_name: str, callback: Optional[Callable] = None):
+        """Avisar si los temas padre (Inherits=) no están instalados o forman un ciclo"""
+        graph = self.scanner.get_icon_inheritance_graph()
+        missing = graph.get_missing_parents(theme_name)
+        if missing and callback:
+            callback(f"El tema {theme_name} hereda de temas no instalados: {', '.join(missing)}. "
+                     "Algunos iconos podrían no mostrarse", "warning")
+        for child, parent in graph.get_cycles(theme_name):
+            if callback:
+                callback(f"Herencia circular en temas de iconos: {child} → {parent}", "warning")
+    
     def _apply_cursor_theme(self, theme_name: str, callback: Optional[Callable] = None) -> bool:
         """Aplicar tema de cursor"""
         try:
@@ -180,11 +222,14 @@ class ThemeApplier:
             if callback:
                 callback(f"Aplicando tema GRUB: {theme_name}", "info")
             
-            success = apply_grub_theme(theme_name)
+            # apply_grub_theme devuelve (éxito, mensaje)
+            success, message = apply_grub_theme(theme_name)
             
             if success and callback:
                 callback(f"Tema GRUB {theme_name} aplicado", "success")
                 callback("Los cambios se verán en el próximo reinicio", "info")
+            elif callback:
+                callback(message, "error")
             
             return success
             
@@ -193,11 +238,19 @@ class ThemeApplier:
                 callback(f"Error aplicando tema GRUB: {str(e)}", "error")
             return False
     
+    def _set_current(self, theme_type: str, theme_name: str):
+        self.current_themes[theme_type] = theme_name
+        if self.state:
+            self.state.update(theme_type, theme_name)
+    
     def get_current_themes(self) -> dict:
         """Obtener los temas actualmente aplicados"""
+        if self.state:
+            return self.state.snapshot()
         return self.current_themes.copy()
     
-    def reset_to_defaults(self, callback: Optional[Callable] = None) -> bool:
+    def reset_to_defaults(self, callback: Optional[Callable] = None,
+                          cancel_event: Optional[threading.Event] = None) -> bool:
         """Restablecer a temas por defecto"""
         try:
             local_callback = callback or self.callback
@@ -213,7 +266,7 @@ class ThemeApplier:
                 "cursor": "Adwaita"
             }
             
-            success = self.apply_theme_combo(default_themes, local_callback)
+            success = self.apply_theme_combo(default_themes, local_callback, cancel_event)
             
             if success and local_callback:
                 local_callback("Temas restablecidos a valores por defecto", "success")
@@ -226,6 +279,23 @@ class ThemeApplier:
                 callback(error_msg, "error")
             return False
     
+    def apply_async(self, theme_type: str, theme_name: str, callback: Optional[Callable] = None,
+                    done: Optional[Callable] = None, dispatch: Optional[Callable] = None) -> OperationFuture:
+        """Aplicar un tema en segundo plano; los mensajes y done(future) llegan al bucle principal"""
+        return run_operation(self.apply_theme, theme_type, theme_name,
+                             callback=callback or self.callback, done=done, dispatch=dispatch)
+    
+    def apply_combo_async(self, themes: dict, callback: Optional[Callable] = None,
+                          done: Optional[Callable] = None, dispatch: Optional[Callable] = None) -> OperationFuture:
+        """Aplicar varios temas en segundo plano (ver apply_async)"""
+        return run_operation(self.apply_theme_combo, themes,
+                             callback=callback or self.callback, done=done, dispatch=dispatch)
+    
+    def reset_async(self, callback: Optional[Callable] = None, done: Optional[Callable] = None,
+                    dispatch: Optional[Callable] = None) -> OperationFuture:
+        """Restablecer los temas por defecto en segundo plano (ver apply_async)"""
+        return run_operation(self.reset_to_defaults, callback=callback or self.callback, done=done, dispatch=dispatch)
+    
     def refresh_gtk_cache(self, callback: Optional[Callable] = None) -> bool:
         """Refrescar caché de GTK"""
         try:
@@ -0,0 +1,191 @@
+"""
+Theme Index module for GNOME Theme Loader
+Persistent on-disk index of theme directories with mtime-based incremental rescans
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "gnome-theme-loader"
+INDEX_FILE = CACHE_DIR / "theme_index.json"
+INDEX_VERSION = 3
+
+class ThemeIndex:
+    """Índice persistente de temas clasificados, invalidado por mtime/inodo"""
+
+    def __init__(self, index_file: Optional[Path] = None):
+        self.index_file = Path(index_file) if index_file else INDEX_FILE
+        self._roots: Dict[str, Dict] = {}
+        self._themes: Dict[str, Dict] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        # Una escritura a la vez: todas usan el mismo archivo temporal
+        self._save_lock = threading.Lock()
+        self._save_thread: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self):
+        """Cargar el índice desde disco (se ignora si está corrupto o es de otra versión)"""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return
+            self._roots = data.get("roots", {})
+            self._themes = data.get("themes", {})
+            self._stats = data.get("stats", {})
+        except (OSError, ValueError):
+            self._roots = {}
+            self._themes = {}
+            self._stats = {}
+
+    def save(self):
+        """Guardar el índice en disco de forma atómica si hubo cambios"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": INDEX_VERSION, "roots": dict(self._roots), "themes": dict(self._themes),
+                    "stats": dict(self._stats)}
+            self._dirty = False
+        with self._save_lock:
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.index_file.with_name(f".{self.index_file.name}.{os.getpid()}.tmp")
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_file, self.index_file)
+            except OSError as e:
+                print(f"No se pudo guardar el índice de temas: {e}")
+
+    def save_in_background(self):
+        """Guardar el índice en otro hilo si hubo cambios, sin esperar a la escritura.
+
+        El hilo no es daemon: al salir, el intérprete espera a que termine de
+        escribir. Los cambios hechos mientras se guarda se guardan a continuación.
+        """
+        with self._lock:
+            if not self._dirty or self._save_thread is not None:
+                return
+            self._save_thread = threading.Thread(target=self._save_pending, name="theme-index-save")
+            self._save_thread.start()
+
+    def _save_pending(self):
+        while True:
+            self.save()
+            with self._lock:
+                if not self._dirty:
+                    self._save_thread = None
+                    return
+
+    def wait_saved(self):
+        """Esperar a que termine el guardado en segundo plano, si hay uno"""
+        with self._lock:
+            thread = self._save_thread
+        if thread is not None:
+            thread.join()
+
+    def list_root(self, root: Path) -> List[Path]:
+        """Listar los subdirectorios de una raíz, reutilizando el listado si su mtime no cambió"""
+        key = str(root)
+        try:
+            st = os.stat(root)
+        except OSError:
+            with self._lock:
+                if self._roots.pop(key, None) is not None:
+                    self._dirty = True
+            return []
+
+        with self._lock:
+            cached = self._roots.get(key)
+            if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["inode"] == st.st_ino:
+                return [root / name for name in cached["children"]]
+
+        children = []
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            children.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return []
+        children.sort()
+
+        with self._lock:
+            # Olvidar los temas que ya no existen bajo esta raíz
+            previous = set(cached["children"]) if cached else set()
+            for name in previous.difference(children):
+                self._themes.pop(str(root / name), None)
+                self._stats.pop(str(root / name), None)
+            self._roots[key] = {"mtime_ns": st.st_mtime_ns, "inode": st.st_ino, "children": children}
+            self._dirty = True
+        return [root / name for name in children]
+
+    def get_entry(self, theme_path: Path, classify: Callable[[Path], Dict]) -> Optional[Dict]:
+        """Obtener la entrada de un tema, re-clasificándolo solo si cambió su mtime/inodo"""
+        key = str(theme_path)
+        try:
+            st = os.stat(theme_path)
+        except OSError:
+            self.invalidate(theme_path)
+            return None
+
+        with self._lock:
+            cached = self._themes.get(key)
+            if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["inode"] == st.st_ino:
+                return cached
+
+        entry = dict(classify(Path(theme_path)))
+        entry["mtime_ns"] = st.st_mtime_ns
+        entry["inode"] = st.st_ino
+        with self._lock:
+            self._themes[key] = entry
+            self._dirty = True
+        return entry
+
+    def get_stats(self, theme_path: Path, key: List[int]) -> Optional[Dict]:
+        """Obtener el tamaño/número de archivos guardado si su clave de validación coincide"""
+        with self._lock:
+            cached = self._stats.get(str(theme_path))
+            if cached and cached.get("key") == key:
+                return cached
+        return None
+
+    def set_stats(self, theme_path: Path, stats: Dict, key: List[int]):
+        """Guardar el tamaño/número de archivos de un tema con su clave de validación"""
+        with self._lock:
+            self._stats[str(theme_path)] = dict(stats, key=list(key))
+            self._dirty = True
+
+    def invalidate(self, theme_path: Path):
+        """Eliminar la entrada de un tema para forzar su re-validación"""
+        with self._lock:
+            if self._themes.pop(str(theme_path), None) is not None:
+                self._dirty = True
+
+    def clear(self):
+        """Vaciar el índice completo"""
+        with self._lock:
+            self._roots.clear()
+            self._themes.clear()
+            self._stats.clear()
+            self._dirty = True
+
+_shared_index: Optional[ThemeIndex] = None
+_shared_lock = threading.Lock()
+
+def get_theme_index() -> ThemeIndex:
+    """Obtener el índice compartido del proceso"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = ThemeIndex()
+        return _shared_index
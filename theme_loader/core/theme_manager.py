@@ -3,21 +3,20 @@ Theme Manager module for GNOME Theme Loader
 Handles theme installation, detection, and management
 """
 
-import gi
-gi.require_version("Gtk", "4.0")
-from gi.repository import Gtk, GLib
 from pathlib import Path
-import tempfile
-import zipfile
-import tarfile
 import os
 import shutil
-from typing import Dict, List, Optional, Tuple
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Importar módulos locales
-from ..utils.installer import install_archive
+from ..utils.installer import install_archive, list_archive_variants, ArchiveVariant
 from ..utils.gsettings import set_gtk_theme, set_shell_theme, set_icon_theme, set_cursor_theme
 from ..utils.grub import list_grub_themes, install_grub_theme, apply_grub_theme
+from ..utils.theme_record import ThemeRecord
+from .theme_scanner import ThemeScanner
+from .theme_roots import get_root_source
+from .operations import OperationFuture, run_operation
 
 class ThemeManager:
     """Gestor principal de temas"""
@@ -34,18 +33,36 @@ class ThemeManager:
         self.theme_dir.mkdir(exist_ok=True)
         self.icon_dir.mkdir(exist_ok=True)
         self.local_icon_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Escáner con índice persistente para clasificar directorios
+        self.scanner = ThemeScanner()
+        # Pares (tema oculto, tema que lo oculta) del último escaneo
+        self.shadowed_themes: List[Tuple[ThemeRecord, ThemeRecord]] = []
+    
+    def get_archive_variants(self, archive_path: Path) -> List[ArchiveVariant]:
+        """Variantes (carpetas de tema) que contiene un archivo, sin extraerlo"""
+        return list_archive_variants(archive_path) or []
+    
+    def get_archive_variants_async(self, archive_path: Path, done: Optional[Callable] = None,
+                                   dispatch: Optional[Callable] = None) -> OperationFuture:
+        """Listar las variantes en segundo plano (en tar.* es una descompresión completa); el future da la lista"""
+        def list_variants(callback=None, cancel_event=None):
+            return self.get_archive_variants(archive_path)
+        return run_operation(list_variants, done=done, dispatch=dispatch)
     
-    def install_theme_archive(self, archive_path: Path, callback=None) -> Tuple[bool, str]:
-        """Instalar un archivo de tema comprimido"""
+    def install_theme_archive(self, archive_path: Path, callback=None, variants: Optional[List[str]] = None,
+                              apply_variant: Optional[str] = None, auto_apply: bool = True,
+                              cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """Instalar un archivo de tema comprimido (solo las variantes indicadas, si se dan)"""
         try:
-            # Detectar tipo de tema
-            theme_type = self._detect_theme_type(archive_path)
-            if not theme_type:
-                return False, "No se pudo detectar el tipo de tema"
-            
-            # Instalar el tema
-            result = install_archive(archive_path, callback)
+            # install_archive clasifica el archivo (o lo toma de la caché) y devuelve (nombre, tipo)
+            result = install_archive(archive_path, callback or (lambda msg, level: None),
+                                     auto_apply=auto_apply, variants=variants, apply_variant=apply_variant,
+                                     cancel_event=cancel_event)
+            if cancel_event and cancel_event.is_set():
+                return False, "Instalación cancelada"
             if result:
+                theme_type = ", ".join(dict.fromkeys(kind for _, kind in result))
                 if callback:
                     callback(f"Tema {theme_type} instalado correctamente", "success")
                 return True, f"Tema {theme_type} instalado correctamente"
@@ -60,122 +77,45 @@ class ThemeManager:
                 callback(error_msg, "error")
             return False, error_msg
     
-    def _detect_theme_type(self, file_path: Path) -> Optional[str]:
-        """Detectar el tipo de tema basado en el contenido del archivo"""
-        try:
-            # Crear directorio temporal
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # Extraer archivo
-                if file_path.suffix == '.zip':
-                    with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                        zip_ref.extractall(temp_path)
-                elif file_path.suffix in ['.gz', '.xz', '.bz2'] or '.tar.' in file_path.name:
-                    with tarfile.open(file_path, 'r:*') as tar_ref:
-                        tar_ref.extractall(temp_path)
-                else:
-                    return None
-                
-                # Buscar archivos indicativos
-                extracted_items = list(temp_path.iterdir())
-                if len(extracted_items) == 1 and extracted_items[0].is_dir():
-                    # Un solo directorio, verificar su contenido
-                    theme_dir = extracted_items[0]
-                    
-                    # Verificar GTK theme
-                    if (theme_dir / "gtk-3.0").exists() or (theme_dir / "gtk-4.0").exists():
-                        return "gtk"
-                    
-                    # Verificar Shell theme
-                    if (theme_dir / "gnome-shell").exists():
-                        return "shell"
-                    
-                    # Verificar Icon theme
-                    if (theme_dir / "index.theme").exists() or (theme_dir / "scalable").exists():
-                        return "icons"
-                    
-                    # Verificar Cursor theme
-                    if (theme_dir / "cursors").exists():
-                        return "cursor"
-                    
-                    # Verificar GRUB theme
-                    if (theme_dir / "theme.txt").exists():
-                        return "grub"
-                
-                # Verificar múltiples directorios
-                for item in extracted_items:
-                    if item.is_dir():
-                        # Verificar GTK themes
-                        if (item / "gtk-3.0").exists() or (item / "gtk-4.0").exists():
-                            return "gtk"
-                        
-                        # Verificar Shell themes
-                        if (item / "gnome-shell").exists():
-                            return "shell"
-                        
-                        # Verificar Icon themes
-                        if (item / "index.theme").exists() or (item / "scalable").exists():
-                            return "icons"
-                        
-                        # Verificar Cursor themes
-                        if (item / "cursors").exists():
-                            return "cursor"
-                        
-                        # Verificar GRUB themes
-                        if (item / "theme.txt").exists():
-                            return "grub"
-                
-                return None
-                
-        except Exception as e:
-            print(f"Error detectando tipo de tema: {e}")
-            return None
+    def install_async(self, archive_path: Path, callback: Optional[Callable] = None, done: Optional[Callable] = None,
+                      variants: Optional[List[str]] = None, apply_variant: Optional[str] = None,
+                      auto_apply: bool = True, dispatch: Optional[Callable] = None) -> OperationFuture:
+        """Instalar un archivo en segundo plano; el future da (éxito, mensaje).
+
+        Los mensajes de callback y done(future) llegan al bucle principal.
+        """
+        return run_operation(self.install_theme_archive, archive_path, callback=callback, done=done,
+                             dispatch=dispatch, variants=variants, apply_variant=apply_variant,
+                             auto_apply=auto_apply)
     
-    def scan_themes(self):
+    def scan_themes(self) -> Dict[str, List[ThemeRecord]]:
         """Escanear temas instalados y devolver un diccionario por categorías"""
-        def list_dir(path):
-            if not path.exists():
-                return []
-            return [f for f in path.iterdir() if f.is_dir() and not f.name.startswith('.')]
-
-        themes = {
-            "gtk": [],
-            "icons": [],
-            "shell": [],
-            "cursor": [],
-            "grub": []
-        }
-
-        # GTK themes
-        for folder in list_dir(self.theme_dir):
-            themes["gtk"].append({"name": folder.name, "type": "gtk", "path": str(folder)})
-
-        # Icon themes
-        for folder in list_dir(self.icon_dir):
-            themes["icons"].append({"name": folder.name, "type": "icons", "path": str(folder)})
-        for folder in list_dir(self.local_icon_dir):
-            if not any(t["name"] == folder.name for t in themes["icons"]):
-                themes["icons"].append({"name": folder.name, "type": "icons", "path": str(folder)})
-
-        # Shell themes
-        for folder in list_dir(self.theme_dir):
-            if (folder / "gnome-shell").exists():
-                themes["shell"].append({"name": folder.name, "type": "shell", "path": str(folder)})
-
-        # Cursor themes
-        for folder in list_dir(self.icon_dir):
-            if (folder / "cursors").exists():
-                themes["cursor"].append({"name": folder.name, "type": "cursor", "path": str(folder)})
-        for folder in list_dir(self.local_icon_dir):
-            if (folder / "cursors").exists() and not any(t["name"] == folder.name for t in themes["cursor"]):
-                themes["cursor"].append({"name": folder.name, "type": "cursor", "path": str(folder)})
+        # Un tema del usuario oculta a uno del sistema con el mismo nombre
+        themes = self.scanner.scan_all_themes()
+        themes["grub"] = []
+        self.shadowed_themes = [pair for pairs in self.scanner.shadowed.values() for pair in pairs]
 
         # GRUB themes (opcional, si tienes soporte)
         # Puedes usar list_grub_themes() si ya tienes esa función
 
         return themes
     
+    def get_themes_for_dir(self, folder: Path) -> List[ThemeRecord]:
+        """Obtener las entradas de todas las categorías para un único directorio de tema"""
+        folder = Path(folder)
+        if folder.name.startswith('.') or not folder.is_dir():
+            return []
+        if folder.parent in self.scanner.theme_dirs:
+            kinds = ("gtk", "shell")
+        elif folder.parent in self.scanner.icon_dirs:
+            kinds = ("icons", "cursor")
+        else:
+            return []
+        entry = self.scanner.get_index_entry(folder)
+        types = entry["types"] if entry else []
+        source = get_root_source(folder.parent)
+        return [ThemeRecord.from_path(folder, kind, source) for kind in kinds if kind in types]
+    
     def apply_theme(self, theme_type: str, theme_name: str, callback=None) -> bool:
         """Aplicar un tema específico"""
         try:
@@ -190,7 +130,7 @@ class ThemeManager:
             elif theme_type == "cursor":
                 success = set_cursor_theme(theme_name)
             elif theme_type == "grub":
-                success = apply_grub_theme(theme_name)
+                success, _ = apply_grub_theme(theme_name)
             
             if success:
                 if callback:
@@ -0,0 +1,89 @@
+"""
+Theme Roots module for GNOME Theme Loader
+XDG Base Directory aware discovery of theme and icon search paths, with
+precedence-based deduplication of themes that share a name
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.theme_record import ThemeRecord
+
+DEFAULT_DATA_DIRS = ("/usr/local/share", "/usr/share")
+# Directorios de exportación de flatpak (los añade su perfil a XDG_DATA_DIRS)
+FLATPAK_EXPORT_DIRS = ("~/.local/share/flatpak/exports/share", "/var/lib/flatpak/exports/share")
+
+@dataclass(frozen=True)
+class ThemeRoots:
+    """Rutas de búsqueda ordenadas por precedencia (usuario primero, después sistema)"""
+    theme_dirs: Tuple[Path, ...]
+    icon_dirs: Tuple[Path, ...]
+
+_roots: Optional[ThemeRoots] = None
+_roots_lock = threading.Lock()
+
+def _data_home() -> Path:
+    value = os.environ.get("XDG_DATA_HOME")
+    # La especificación pide ignorar rutas relativas
+    if value and os.path.isabs(value):
+        return Path(value)
+    return Path.home() / ".local/share"
+
+def _data_dirs() -> List[Path]:
+    value = os.environ.get("XDG_DATA_DIRS", "")
+    dirs = [Path(d) for d in value.split(":") if d and os.path.isabs(d)]
+    if not dirs:
+        dirs = [Path(d) for d in DEFAULT_DATA_DIRS]
+    flatpak = [Path(d).expanduser() for d in FLATPAK_EXPORT_DIRS]
+    return [d for d in flatpak if d not in dirs] + dirs
+
+def _unique(paths: Iterable[Path]) -> Tuple[Path, ...]:
+    """Quitar duplicados (también por enlaces simbólicos) conservando el primero"""
+    seen = set()
+    result = []
+    for path in paths:
+        key = os.path.realpath(path)
+        if key not in seen:
+            seen.add(key)
+            result.append(path)
+    return tuple(result)
+
+def discover_theme_roots() -> ThemeRoots:
+    """Calcular las rutas de búsqueda según las especificaciones XDG y de temas de iconos"""
+    home = Path.home()
+    data_home = _data_home()
+    data_dirs = _data_dirs()
+    theme_dirs = [home / ".themes", data_home / "themes"] + [d / "themes" for d in data_dirs]
+    icon_dirs = [home / ".icons", data_home / "icons"] + [d / "icons" for d in data_dirs]
+    return ThemeRoots(_unique(theme_dirs), _unique(icon_dirs))
+
+def get_theme_roots(refresh: bool = False) -> ThemeRoots:
+    """Obtener las rutas de búsqueda de la sesión (se calculan una sola vez)"""
+    global _roots
+    with _roots_lock:
+        if _roots is None or refresh:
+            _roots = discover_theme_roots()
+        return _roots
+
+def get_root_source(root: Path) -> str:
+    """Determinar si una raíz de temas es del usuario o del sistema"""
+    return "user" if Path.home() in Path(root).parents else "system"
+
+def dedupe_records(records: Iterable[ThemeRecord]) -> Tuple[List[ThemeRecord], List[Tuple[ThemeRecord, ThemeRecord]]]:
+    """Quedarse con el primer tema de cada (tipo, nombre) según el orden de las raíces
+
+    Devuelve los temas visibles y los pares (oculto, el que lo oculta).
+    """
+    visible: Dict[Tuple[str, str], ThemeRecord] = {}
+    shadowed = []
+    for record in records:
+        key = (record.type, record.name)
+        winner = visible.get(key)
+        if winner is None:
+            visible[key] = record
+        else:
+            shadowed.append((record, winner))
+    return list(visible.values()), shadowed
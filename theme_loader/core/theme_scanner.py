@@ -4,174 +4,258 @@ Handles theme validation and scanning
 """
 
 from pathlib import Path
-from typing import Dict, List, Optional
-import configparser
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import os
+import threading
+
+from .theme_index import ThemeIndex, get_theme_index
+from .icon_inheritance import IconInheritanceGraph
+from .theme_roots import get_theme_roots, get_root_source, dedupe_records
+from ..utils.index_theme import read_index_theme
+from ..utils.theme_record import ThemeRecord
+from ..utils.xcursor import is_xcursor_file, get_cursor_theme_summary
+
+# Tipos de tema que se buscan en cada clase de raíz
+THEME_KINDS = ("gtk", "shell")
+ICON_KINDS = ("icons", "cursor")
+# Subdirectorios/archivos indicativos guardados en el índice
+THEME_MARKERS = ("gtk-3.0", "gtk-4.0", "gnome-shell", "index.theme", "cursors")
+GTK_CSS_FILES = ("gtk.css", "gtk-dark.css")
+# Hilos para el cálculo de tamaños (acotado: es trabajo de E/S sobre el mismo disco)
+STATS_WORKERS = min(4, os.cpu_count() or 1)
 
 class ThemeScanner:
     """Escáner de temas para validación y detección"""
     
-    def __init__(self):
-        self.theme_dirs = [
-            Path.home() / ".themes",
-            Path("/usr/share/themes")
-        ]
-        self.icon_dirs = [
-            Path.home() / ".icons",
-            Path.home() / ".local/share/icons",
-            Path("/usr/share/icons")
-        ]
-    
-    def scan_gtk_themes(self) -> List[Dict]:
+    def __init__(self, index: Optional[ThemeIndex] = None):
+        # Rutas de búsqueda XDG en orden de precedencia (usuario -> sistema)
+        roots = get_theme_roots()
+        self.theme_dirs = list(roots.theme_dirs)
+        self.icon_dirs = list(roots.icon_dirs)
+        # Temas ocultos por otro del mismo nombre con más precedencia, por tipo
+        self.shadowed: Dict[str, List[Tuple[ThemeRecord, ThemeRecord]]] = {}
+        # Índice persistente compartido entre escaneos
+        self.index = index or get_theme_index()
+        self._stats_executor: Optional[ThreadPoolExecutor] = None
+        self._inheritance_graph: Optional[IconInheritanceGraph] = None
+        self._inheritance_signature = None
+    
+    def scan_gtk_themes(self) -> List[ThemeRecord]:
         """Escanear temas GTK"""
-        themes = []
-        for theme_dir in self.theme_dirs:
-            if theme_dir.exists():
-                for theme_path in theme_dir.iterdir():
-                    if theme_path.is_dir() and self._is_valid_gtk_theme(theme_path):
-                        themes.append({
-                            "name": theme_path.name,
-                            "path": theme_path,
-                            "type": "gtk",
-                            "source": "user" if theme_dir == Path.home() / ".themes" else "system"
-                        })
-        return themes
+        return self._scan_type("gtk", self.theme_dirs)
     
-    def scan_shell_themes(self) -> List[Dict]:
+    def scan_shell_themes(self) -> List[ThemeRecord]:
         """Escanear temas Shell"""
-        themes = []
-        for theme_dir in self.theme_dirs:
-            if theme_dir.exists():
-                for theme_path in theme_dir.iterdir():
-                    if theme_path.is_dir() and self._is_valid_shell_theme(theme_path):
-                        themes.append({
-                            "name": theme_path.name,
-                            "path": theme_path,
-                            "type": "shell",
-                            "source": "user" if theme_dir == Path.home() / ".themes" else "system"
-                        })
-        return themes
+        return self._scan_type("shell", self.theme_dirs)
     
-    def scan_icon_themes(self) -> List[Dict]:
+    def scan_icon_themes(self) -> List[ThemeRecord]:
         """Escanear temas de iconos"""
-        themes = []
-        for icon_dir in self.icon_dirs:
-            if icon_dir.exists():
-                for icon_path in icon_dir.iterdir():
-                    if icon_path.is_dir() and self._is_valid_icon_theme(icon_path):
-                        themes.append({
-                            "name": icon_path.name,
-                            "path": icon_path,
-                            "type": "icons",
-                            "source": "user" if icon_dir.parent.name == "home" else "system"
-                        })
-        return themes
+        return self._scan_type("icons", self.icon_dirs)
     
-    def scan_cursor_themes(self) -> List[Dict]:
+    def scan_cursor_themes(self) -> List[ThemeRecord]:
         """Escanear temas de cursor"""
+        return self._scan_type("cursor", self.icon_dirs)
+    
+    def scan_all_themes(self) -> Dict[str, List[ThemeRecord]]:
+        """Escanear todos los tipos de temas en una sola pasada por raíz"""
+        themes = {"gtk": [], "shell": [], "icons": [], "cursor": []}
+        roots = [(root, THEME_KINDS) for root in self.theme_dirs]
+        roots += [(root, ICON_KINDS) for root in self.icon_dirs]
+        for root, kinds in roots:
+            source = self._get_source(root)
+            for theme_path in self.index.list_root(root):
+                entry = self.get_index_entry(theme_path)
+                if not entry:
+                    continue
+                for theme_type in entry["types"]:
+                    if theme_type in kinds:
+                        themes[theme_type].append(ThemeRecord.from_path(theme_path, theme_type, source))
+        # La escritura del índice no retrasa el resultado del escaneo
+        self.index.save_in_background()
+        for theme_type, records in themes.items():
+            themes[theme_type], self.shadowed[theme_type] = dedupe_records(records)
+        return themes
+    
+    def _scan_type(self, theme_type: str, roots: List[Path]) -> List[ThemeRecord]:
+        """Escanear un tipo de tema usando el índice persistente"""
         themes = []
-        for icon_dir in self.icon_dirs:
-            if icon_dir.exists():
-                for cursor_path in icon_dir.iterdir():
-                    if cursor_path.is_dir() and self._is_valid_cursor_theme(cursor_path):
-                        themes.append({
-                            "name": cursor_path.name,
-                            "path": cursor_path,
-                            "type": "cursor",
-                            "source": "user" if icon_dir.parent.name == "home" else "system"
-                        })
+        for root in roots:
+            source = self._get_source(root)
+            for theme_path in self.index.list_root(root):
+                entry = self.get_index_entry(theme_path)
+                if entry and theme_type in entry["types"]:
+                    themes.append(ThemeRecord.from_path(theme_path, theme_type, source))
+        self.index.save_in_background()
+        themes, self.shadowed[theme_type] = dedupe_records(themes)
         return themes
     
-    def scan_all_themes(self) -> Dict[str, List[Dict]]:
-        """Escanear todos los tipos de temas"""
-        return {
-            "gtk": self.scan_gtk_themes(),
-            "shell": self.scan_shell_themes(),
-            "icons": self.scan_icon_themes(),
-            "cursor": self.scan_cursor_themes()
+    def get_index_entry(self, theme_path: Path) -> Optional[Dict]:
+        """Obtener la clasificación indexada de un directorio de tema"""
+        return self.index.get_entry(theme_path, self._classify_theme_dir)
+    
+    def _classify_theme_dir(self, theme_path: Path) -> Dict:
+        """Clasificar un directorio para todos los tipos con un único listado
+
+        Los datos de los cursores (tamaños, animaciones) no se guardan: leerlos
+        abre cada archivo Xcursor, así que get_theme_info los lee al pedirlos.
+        """
+        children = self._list_children(theme_path)
+        validators = {
+            "gtk": (self._is_valid_gtk_theme, self._get_gtk_theme_info),
+            "shell": (self._is_valid_shell_theme, self._get_shell_theme_info),
+            "icons": (self._is_valid_icon_theme, self._get_icon_theme_info),
+            "cursor": (self._is_valid_cursor_theme, None)
+        }
+        entry = {
+            "markers": [m for m in THEME_MARKERS if m in children],
+            "types": [],
+            "metadata": {},
+            "inherits": self._get_inherits(theme_path, children)
         }
+        for kind, (is_valid, get_info) in validators.items():
+            if is_valid(theme_path, children):
+                entry["types"].append(kind)
+                if get_info is not None:
+                    entry["metadata"][kind] = get_info(theme_path, children)
+        return entry
     
-    def _is_valid_gtk_theme(self, theme_path: Path) -> bool:
+    def get_icon_inheritance_graph(self) -> IconInheritanceGraph:
+        """Obtener el grafo de herencia de los temas de iconos/cursores a partir del índice
+        
+        Se reconstruye solo si cambió algún directorio de tema; mientras tanto
+        conserva las cadenas ya resueltas.
+        """
+        parents = {}
+        signature = []
+        for root in self.icon_dirs:
+            for theme_path in self.index.list_root(root):
+                entry = self.get_index_entry(theme_path)
+                if not entry or "index.theme" not in entry["markers"]:
+                    continue
+                signature.append((str(theme_path), entry["mtime_ns"]))
+                # Los temas del usuario tienen prioridad sobre los del sistema
+                parents.setdefault(theme_path.name, entry["inherits"])
+        signature = tuple(signature)
+        if self._inheritance_graph is None or self._inheritance_signature != signature:
+            self._inheritance_graph = IconInheritanceGraph(parents)
+            self._inheritance_signature = signature
+            self.index.save_in_background()
+        return self._inheritance_graph
+    
+    def get_icon_theme_chain(self, theme_name: str) -> List[str]:
+        """Cadena de herencia resuelta de un tema de iconos"""
+        return self.get_icon_inheritance_graph().resolve(theme_name)
+    
+    def get_missing_icon_parents(self, theme_name: str) -> List[str]:
+        """Temas de los que hereda un tema de iconos y que no están instalados"""
+        return self.get_icon_inheritance_graph().get_missing_parents(theme_name)
+    
+    def _get_inherits(self, theme_path: Path, children: Dict[str, bool]) -> List[str]:
+        """Leer la clave Inherits del index.theme de un tema"""
+        if "index.theme" not in children:
+            return []
+        data = read_index_theme(theme_path) or {}
+        inherits = data.get("Icon Theme", {}).get("Inherits", "")
+        return [name.strip() for name in inherits.split(",") if name.strip()]
+    
+    def _get_source(self, root: Path) -> str:
+        """Determinar si una raíz de temas es del usuario o del sistema"""
+        return get_root_source(root)
+    
+    def _list_children(self, path: Path) -> Dict[str, bool]:
+        """Listar un directorio una sola vez (nombre -> es directorio) usando la caché de DirEntry"""
+        children = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        children[entry.name] = entry.is_dir()
+                    except OSError:
+                        children[entry.name] = False
+        except OSError:
+            pass
+        return children
+    
+    def _has_xcursor_file(self, path: Path) -> bool:
+        """Comprobar si un directorio tiene algún archivo Xcursor (o enlace a uno), parando en el primero"""
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if is_xcursor_file(entry.path):
+                        return True
+        except OSError:
+            pass
+        return False
+    
+    def _has_any_file(self, path: Path, names: Tuple[str, ...]) -> bool:
+        """Comprobar si existe alguno de los archivos dados, parando en el primero"""
+        return any(os.path.exists(os.path.join(path, name)) for name in names)
+    
+    def _is_valid_gtk_theme(self, theme_path: Path, children: Optional[Dict[str, bool]] = None) -> bool:
         """Verificar si es un tema GTK válido"""
-        gtk3_dir = theme_path / "gtk-3.0"
-        gtk4_dir = theme_path / "gtk-4.0"
+        if children is None:
+            children = self._list_children(theme_path)
+        has_gtk3 = children.get("gtk-3.0", False)
+        has_gtk4 = children.get("gtk-4.0", False)
         
         # Verificar que existe al menos una versión de GTK
-        if not (gtk3_dir.exists() or gtk4_dir.exists()):
+        if not (has_gtk3 or has_gtk4):
             return False
         
         # Verificar archivos de configuración
-        if gtk3_dir.exists():
-            gtk3_css = gtk3_dir / "gtk.css"
-            gtk3_dark_css = gtk3_dir / "gtk-dark.css"
-            if not (gtk3_css.exists() or gtk3_dark_css.exists()):
-                return False
+        if has_gtk3 and not self._has_any_file(theme_path / "gtk-3.0", GTK_CSS_FILES):
+            return False
         
-        if gtk4_dir.exists():
-            gtk4_css = gtk4_dir / "gtk.css"
-            gtk4_dark_css = gtk4_dir / "gtk-dark.css"
-            if not (gtk4_css.exists() or gtk4_dark_css.exists()):
-                return False
+        if has_gtk4 and not self._has_any_file(theme_path / "gtk-4.0", GTK_CSS_FILES):
+            return False
         
         return True
     
-    def _is_valid_shell_theme(self, theme_path: Path) -> bool:
+    def _is_valid_shell_theme(self, theme_path: Path, children: Optional[Dict[str, bool]] = None) -> bool:
         """Verificar si es un tema Shell válido"""
-        shell_dir = theme_path / "gnome-shell"
-        if not shell_dir.exists():
+        if children is None:
+            children = self._list_children(theme_path)
+        if not children.get("gnome-shell", False):
             return False
         
         # Verificar archivos principales
-        shell_css = shell_dir / "gnome-shell.css"
-        if not shell_css.exists():
-            return False
-        
-        return True
+        return self._has_any_file(theme_path / "gnome-shell", ("gnome-shell.css",))
     
-    def _is_valid_icon_theme(self, icon_path: Path) -> bool:
+    def _is_valid_icon_theme(self, icon_path: Path, children: Optional[Dict[str, bool]] = None) -> bool:
         """Verificar si es un tema de iconos válido"""
-        index_file = icon_path / "index.theme"
-        if not index_file.exists():
+        if children is None:
+            children = self._list_children(icon_path)
+        if children.get("index.theme", True):
+            # No existe o es un directorio
             return False
         
         # Verificar que el archivo index.theme es válido
-        try:
-            config = configparser.ConfigParser()
-            config.read(index_file)
-            
-            # Verificar sección [Icon Theme]
-            if "Icon Theme" not in config:
-                return False
-            
-            # Verificar que tiene al menos un directorio de iconos
-            if "Directories" not in config["Icon Theme"]:
-                return False
-            
-            return True
-        except Exception:
-            return False
+        data = read_index_theme(icon_path)
+        
+        # Verificar sección [Icon Theme] con al menos un directorio de iconos
+        return bool(data) and "Directories" in data.get("Icon Theme", {})
     
-    def _is_valid_cursor_theme(self, cursor_path: Path) -> bool:
+    def _is_valid_cursor_theme(self, cursor_path: Path, children: Optional[Dict[str, bool]] = None) -> bool:
         """Verificar si es un tema de cursor válido"""
-        cursors_dir = cursor_path / "cursors"
-        if not cursors_dir.exists():
-            return False
-        
-        # Verificar que tiene al menos algunos archivos de cursor
-        cursor_files = list(cursors_dir.glob("*.png")) + list(cursors_dir.glob("*.svg"))
-        if len(cursor_files) == 0:
+        if children is None:
+            children = self._list_children(cursor_path)
+        if not children.get("cursors", False):
             return False
         
-        return True
+        # Verificar que tiene al menos un archivo Xcursor (sin extensión, a menudo enlaces)
+        return self._has_xcursor_file(cursor_path / "cursors")
     
     def get_theme_info(self, theme_path: Path, theme_type: str) -> Optional[Dict]:
         """Obtener información detallada de un tema"""
         try:
+            stats = self.get_directory_stats(theme_path)
             info = {
                 "name": theme_path.name,
                 "path": theme_path,
                 "type": theme_type,
-                "size": self._get_directory_size(theme_path),
-                "files_count": self._count_files(theme_path)
+                "size": stats["size"],
+                "files_count": stats["files_count"]
             }
             
             # Información específica según el tipo
@@ -189,73 +273,158 @@ class ThemeScanner:
             print(f"Error obteniendo información del tema: {e}")
             return None
     
-    def _get_directory_size(self, path: Path) -> int:
-        """Obtener tamaño total de un directorio"""
-        total_size = 0
+    def get_directory_stats(self, path: Path) -> Dict:
+        """Obtener tamaño y número de archivos de un tema, cacheado por una clave barata
+        
+        La clave (inodo y mtime del tema y mtime de sus carpetas de primer
+        nivel) sale de un solo listado: reinstalar el tema o añadir o quitar una
+        carpeta de tamaño la cambia. Solo entonces se recorre el árbol completo.
+        """
+        key = self._stats_key(path)
+        if key is None:
+            return {"size": 0, "files_count": 0, "tree_mtime_ns": 0}
+        cached = self.index.get_stats(path, key)
+        if cached:
+            return cached
+        stats = self._walk_tree(path)
+        self.index.set_stats(path, stats, key)
+        return stats
+    
+    def _stats_key(self, path: Path) -> Optional[List[int]]:
+        """Inodo y mtime del tema seguidos del mtime de cada carpeta de primer nivel (por nombre)"""
         try:
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-        except Exception:
-            pass
-        return total_size
+            st = os.stat(path)
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return None
+        key = [st.st_ino, st.st_mtime_ns]
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    key.append(entry.stat(follow_symlinks=False).st_mtime_ns)
+            except OSError:
+                continue
+        return key
+    
+    def iter_directory_stats(self, paths: List[Path]) -> Iterator[Tuple[Path, Dict]]:
+        """Calcular estadísticas de varios temas en paralelo, devolviéndolas según terminan"""
+        futures = {self._get_stats_executor().submit(self.get_directory_stats, path): path for path in paths}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    print(f"Error calculando tamaño de {futures[future]}: {e}")
+        finally:
+            for future in futures:
+                future.cancel()
+            self.index.save()
+    
+    def compute_directory_stats_async(self, paths: List[Path], callback: Callable[[Path, Dict], None]) -> List[Future]:
+        """Calcular estadísticas en segundo plano llamando a callback(ruta, stats) por cada tema
+        
+        El callback se ejecuta en un hilo del pool; la UI debe reenviarlo a su bucle principal.
+        """
+        pending = [len(paths)]
+        lock = threading.Lock()
+        
+        def on_done(future, path):
+            with lock:
+                pending[0] -= 1
+                finished = pending[0] == 0
+            if not future.cancelled() and future.exception() is None:
+                callback(path, future.result())
+            if finished:
+                # Guardar el índice cuando terminen todos
+                self.index.save()
+        
+        futures = []
+        executor = self._get_stats_executor()
+        for path in paths:
+            future = executor.submit(self.get_directory_stats, path)
+            future.add_done_callback(lambda f, p=path: on_done(f, p))
+            futures.append(future)
+        return futures
     
-    def _count_files(self, path: Path) -> int:
-        """Contar archivos en un directorio"""
+    def _get_stats_executor(self) -> ThreadPoolExecutor:
+        """Pool acotado compartido para el cálculo de tamaños"""
+        if self._stats_executor is None:
+            self._stats_executor = ThreadPoolExecutor(max_workers=STATS_WORKERS, thread_name_prefix="theme-stats")
+        return self._stats_executor
+    
+    def _walk_tree(self, path: Path) -> Dict:
+        """Recorrer un árbol una vez con os.scandir acumulando tamaño, archivos y mtime máximo de directorios"""
+        size = 0
+        files_count = 0
         try:
-            return len([f for f in path.rglob("*") if f.is_file()])
-        except Exception:
-            return 0
+            tree_mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return {"size": 0, "files_count": 0, "tree_mtime_ns": 0}
+        stack = [str(path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                tree_mtime_ns = max(tree_mtime_ns, entry.stat(follow_symlinks=False).st_mtime_ns)
+                            elif entry.is_file():
+                                size += entry.stat(follow_symlinks=False).st_size
+                                files_count += 1
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return {"size": size, "files_count": files_count, "tree_mtime_ns": tree_mtime_ns}
     
-    def _get_gtk_theme_info(self, theme_path: Path) -> Dict:
+    def _get_gtk_theme_info(self, theme_path: Path, children: Optional[Dict[str, bool]] = None) -> Dict:
         """Obtener información específica de tema GTK"""
+        if children is None:
+            children = self._list_children(theme_path)
         info = {"gtk_versions": []}
         
-        if (theme_path / "gtk-3.0").exists():
+        if "gtk-3.0" in children:
             info["gtk_versions"].append("3.0")
-        if (theme_path / "gtk-4.0").exists():
+        if "gtk-4.0" in children:
             info["gtk_versions"].append("4.0")
         
         return info
     
-    def _get_shell_theme_info(self, theme_path: Path) -> Dict:
+    def _get_shell_theme_info(self, theme_path: Path, children: Optional[Dict[str, bool]] = None) -> Dict:
         """Obtener información específica de tema Shell"""
+        if children is None:
+            children = self._list_children(theme_path)
         shell_dir = theme_path / "gnome-shell"
         info = {"has_dark_variant": False}
         
-        if shell_dir.exists():
+        if children.get("gnome-shell", False):
             info["has_dark_variant"] = (shell_dir / "gnome-shell-dark.css").exists()
         
         return info
     
-    def _get_icon_theme_info(self, icon_path: Path) -> Dict:
+    def _get_icon_theme_info(self, icon_path: Path, children: Optional[Dict[str, bool]] = None) -> Dict:
         """Obtener información específica de tema de iconos"""
+        if children is None:
+            children = self._list_children(icon_path)
         info = {"directories": []}
         
-        try:
-            index_file = icon_path / "index.theme"
-            if index_file.exists():
-                config = configparser.ConfigParser()
-                config.read(index_file)
-                
-                if "Icon Theme" in config and "Directories" in config["Icon Theme"]:
-                    dirs = config["Icon Theme"]["Directories"].split(",")
-                    info["directories"] = [d.strip() for d in dirs]
-        except Exception:
-            pass
+        if "index.theme" in children:
+            data = read_index_theme(icon_path) or {}
+            dirs = data.get("Icon Theme", {}).get("Directories", "")
+            info["directories"] = [d.strip() for d in dirs.split(",") if d.strip()]
         
         return info
     
-    def _get_cursor_theme_info(self, cursor_path: Path) -> Dict:
+    def _get_cursor_theme_info(self, cursor_path: Path, children: Optional[Dict[str, bool]] = None) -> Dict:
         """Obtener información específica de tema de cursor"""
-        cursors_dir = cursor_path / "cursors"
+        if children is None:
+            children = self._list_children(cursor_path)
         info = {"cursor_count": 0}
         
-        if cursors_dir.exists():
-            try:
-                cursor_files = list(cursors_dir.glob("*.png")) + list(cursors_dir.glob("*.svg"))
-                info["cursor_count"] = len(cursor_files)
-            except Exception:
-                pass
+        if children.get("cursors", False):
+            # Solo se leen las cabeceras y el TOC de cada Xcursor
+            info.update(get_cursor_theme_summary(cursor_path / "cursors"))
         
         return info 
\ No newline at end of file
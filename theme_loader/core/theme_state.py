@@ -0,0 +1,87 @@
+"""
+Theme State module for GNOME Theme Loader
+Keeps an in-memory snapshot of the currently applied themes: the keys are read
+once and kept up to date with GSettings changed:: signals, so changes made by
+other tools (GNOME Tweaks, another instance) show up without re-querying
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..utils.gsettings import THEME_KEYS, new_settings, get_themes
+from ..utils.grub import get_current_grub_theme
+
+THEME_TYPES = ("gtk", "shell", "icons", "cursor", "grub")
+
+class ThemeStateService:
+    """Temas aplicados actualmente, actualizados por señales de GSettings"""
+
+    def __init__(self, callback: Optional[Callable[[str, Optional[str]], None]] = None):
+        # callback(tipo, nombre) cuando cambia el tema aplicado de un tipo
+        self.callback = callback
+        self._snapshot: Dict[str, Optional[str]] = {theme_type: None for theme_type in THEME_TYPES}
+        self._settings: Dict[str, object] = {}
+        self._handlers: List[Tuple[object, int]] = []
+        self._lock = threading.Lock()
+        self.started = False
+
+    def start(self) -> bool:
+        """Leer los temas aplicados una vez y suscribirse a sus cambios.
+
+        Devuelve True si hay al menos una clave observada (sin gi solo se lee
+        el estado inicial con el comando gsettings).
+        """
+        if self.started:
+            return self.is_watching()
+        self.started = True
+        pending = []
+        for theme_type, (schema_id, key) in THEME_KEYS.items():
+            if schema_id not in self._settings:
+                self._settings[schema_id] = new_settings(schema_id)
+            settings = self._settings[schema_id]
+            if settings is None or not settings.props.settings_schema.has_key(key):
+                pending.append(theme_type)
+                continue
+            handler = settings.connect(f"changed::{key}", self._on_changed, theme_type)
+            self._handlers.append((settings, handler))
+            self._snapshot[theme_type] = settings.get_string(key)
+        if pending:
+            # Esquemas que Gio no ve (o sin gi): una sola lectura con el comando gsettings
+            current = get_themes()
+            for theme_type in pending:
+                self._snapshot[theme_type] = current.get(theme_type)
+        self._snapshot["grub"] = get_current_grub_theme()
+        return self.is_watching()
+
+    def stop(self):
+        """Dejar de recibir cambios"""
+        for settings, handler in self._handlers:
+            settings.disconnect(handler)
+        self._handlers.clear()
+        self._settings.clear()
+        self.started = False
+
+    def is_watching(self) -> bool:
+        return bool(self._handlers)
+
+    def get(self, theme_type: str) -> Optional[str]:
+        """Tema aplicado de un tipo (None si no se conoce)"""
+        with self._lock:
+            return self._snapshot.get(theme_type)
+
+    def snapshot(self) -> Dict[str, Optional[str]]:
+        """Copia de todos los temas aplicados"""
+        with self._lock:
+            return dict(self._snapshot)
+
+    def update(self, theme_type: str, name: Optional[str]):
+        """Registrar un tema aplicado por este proceso (p. ej. GRUB, que no es de GSettings)"""
+        with self._lock:
+            if self._snapshot.get(theme_type) == name:
+                return
+            self._snapshot[theme_type] = name
+        if self.callback:
+            self.callback(theme_type, name)
+
+    def _on_changed(self, settings, key: str, theme_type: str):
+        self.update(theme_type, settings.get_string(key))
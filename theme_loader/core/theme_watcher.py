@@ -0,0 +1,149 @@
+"""
+Theme Watcher module for GNOME Theme Loader
+Watches theme and icon roots with Gio.FileMonitor and emits debounced per-theme events
+"""
+
+import gi
+gi.require_version("Gio", "2.0")
+from gi.repository import Gio, GLib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+import time
+
+from .theme_index import ThemeIndex
+
+class ThemeWatcher:
+    """Observador de raíces de temas que agrupa ráfagas de eventos por tema"""
+
+    DEBOUNCE_MS = 400
+    MAX_DELAY_MS = 3000
+
+    def __init__(self, roots: List[Path], callback: Callable[[str, Path], None],
+                 index: Optional[ThemeIndex] = None, debounce_ms: int = DEBOUNCE_MS):
+        # callback(evento, ruta_del_tema) con evento "added", "removed" o "changed"
+        self.roots = []
+        for root in roots:
+            if root not in self.roots:
+                self.roots.append(root)
+        self.callback = callback
+        self.index = index
+        self.debounce_ms = debounce_ms
+
+        self._root_monitors: Dict[Path, Gio.FileMonitor] = {}
+        self._theme_monitors: Dict[Path, Gio.FileMonitor] = {}
+        self._known: Set[Path] = set()
+        self._pending: Set[Path] = set()
+        self._first_pending = 0.0
+        self._timeout_id = 0
+
+    def start(self) -> bool:
+        """Empezar a observar las raíces existentes"""
+        for root in self.roots:
+            if root in self._root_monitors or not root.is_dir():
+                continue
+            monitor = self._create_monitor(root)
+            if monitor is None:
+                continue
+            monitor.connect("changed", self._on_changed, root)
+            self._root_monitors[root] = monitor
+            try:
+                for theme_path in root.iterdir():
+                    if theme_path.is_dir() and not theme_path.name.startswith("."):
+                        self._known.add(theme_path)
+                        self._watch_theme(theme_path, root)
+            except OSError:
+                continue
+        return self.is_active()
+
+    def stop(self):
+        """Dejar de observar y descartar eventos pendientes"""
+        if self._timeout_id:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = 0
+        for monitor in list(self._root_monitors.values()) + list(self._theme_monitors.values()):
+            monitor.cancel()
+        self._root_monitors.clear()
+        self._theme_monitors.clear()
+        self._known.clear()
+        self._pending.clear()
+
+    def is_active(self) -> bool:
+        """Indicar si hay al menos una raíz observada"""
+        return bool(self._root_monitors)
+
+    def _create_monitor(self, path: Path) -> Optional[Gio.FileMonitor]:
+        """Crear un monitor de directorio (None si el sistema no lo soporta)"""
+        try:
+            gfile = Gio.File.new_for_path(str(path))
+            return gfile.monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            print(f"No se pudo observar {path}: {e.message}")
+            return None
+
+    def _watch_theme(self, theme_path: Path, root: Path):
+        """Observar el primer nivel de un tema para detectar cambios internos"""
+        if theme_path in self._theme_monitors:
+            return
+        monitor = self._create_monitor(theme_path)
+        if monitor is not None:
+            monitor.connect("changed", self._on_changed, root)
+            self._theme_monitors[theme_path] = monitor
+
+    def _unwatch_theme(self, theme_path: Path):
+        monitor = self._theme_monitors.pop(theme_path, None)
+        if monitor is not None:
+            monitor.cancel()
+
+    def _on_changed(self, monitor, gfile, other_file, event_type, root: Path):
+        """Registrar el tema afectado por un evento y reprogramar el vaciado"""
+        for changed in (gfile, other_file):
+            if changed is None or changed.get_path() is None:
+                continue
+            try:
+                relative = Path(changed.get_path()).relative_to(root)
+            except ValueError:
+                continue
+            if not relative.parts or relative.parts[0].startswith("."):
+                continue
+            self._pending.add(root / relative.parts[0])
+
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if not self._timeout_id:
+            self._first_pending = now
+        elif (now - self._first_pending) * 1000 >= self.MAX_DELAY_MS:
+            # Ráfaga demasiado larga: dejar que el temporizador actual se dispare
+            return
+        else:
+            GLib.source_remove(self._timeout_id)
+        self._timeout_id = GLib.timeout_add(self.debounce_ms, self._flush)
+
+    def _flush(self):
+        """Emitir un evento por cada tema afectado desde el último vaciado"""
+        self._timeout_id = 0
+        pending, self._pending = self._pending, set()
+        for theme_path in sorted(pending):
+            root = theme_path.parent
+            exists = theme_path.is_dir()
+            if exists and theme_path not in self._known:
+                event = "added"
+                self._known.add(theme_path)
+                self._watch_theme(theme_path, root)
+            elif not exists and theme_path in self._known:
+                event = "removed"
+                self._known.discard(theme_path)
+                self._unwatch_theme(theme_path)
+            elif exists:
+                event = "changed"
+            else:
+                continue
+
+            # Invalidar solo la entrada afectada del índice persistente
+            if self.index is not None:
+                self.index.invalidate(theme_path)
+            try:
+                self.callback(event, theme_path)
+            except Exception as e:
+                print(f"Error procesando evento {event} de {theme_path}: {e}")
+        return False
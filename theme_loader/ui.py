@@ -5,15 +5,14 @@ gi.require_version("Gdk", "4.0")
 gi.require_version("Gio", "2.0")
 from gi.repository import Gtk, Adw, Gdk, Gio, GLib
 from pathlib import Path
-import tempfile
-import zipfile
-import tarfile
 import os
 
 # Importar módulos locales
 from .installer import install_archive
 from .gsettings import set_gtk_theme, set_shell_theme, set_icon_theme, set_cursor_theme
 from .grub import list_grub_themes, install_grub_theme, apply_grub_theme
+from .utils.archive_classifier import classify_archive
+from .utils.archive_formats import supported_patterns
 
 # Directorios de temas
 THEME_DIR = Path.home() / ".themes"
@@ -221,7 +220,7 @@ class DropZone(Gtk.Box):
         # Filtro para temas
         filter_theme = Gtk.FileFilter()
         filter_theme.set_name("Archivos de tema")
-        for ext in ["*.zip", "*.tar.xz", "*.tar.gz", "*.tar", "*.tgz"]:
+        for ext in supported_patterns():
             filter_theme.add_pattern(ext)
         dialog.add_filter(filter_theme)
         
@@ -608,35 +607,15 @@ class Window(Adw.ApplicationWindow):
             self.activity_log.add_message(f"Error procesando archivo: {str(e)}", "error")
 
     def _detect_theme_type(self, file_path: Path):
-        """Detectar tipo de tema (manteniendo lógica original)"""
+        """Detectar tipo de tema (manteniendo lógica original) sin extraer el archivo"""
         try:
-            with tempfile.TemporaryDirectory() as td:
-                tmp = Path(td)
-                
-                # Extraer archivo
-                if file_path.suffix.lower() == '.zip':
-                    with zipfile.ZipFile(file_path) as zf:
-                        zf.extractall(tmp)
-                elif file_path.suffix.lower() in ['.tar', '.gz', '.xz'] or \
-                     any(file_path.name.lower().endswith(ext) for ext in ['.tar.gz', '.tar.xz', '.tgz']):
-                    with tarfile.open(file_path) as tf:
-                        tf.extractall(tmp)
-                else:
-                    return "unknown"
-                
-                # Analizar contenido
-                has_grub = False
-                has_theme = False
-                
-                for root, dirs, files in os.walk(tmp):
-                    if "theme.txt" in files:
-                        has_grub = True
-                    if any(d in dirs for d in ["gtk-3.0", "gtk-4.0", "gtk-2.0", "gnome-shell"]) or \
-                       "index.theme" in files or "cursors" in dirs:
-                        has_theme = True
-                
-                return "grub" if has_grub else ("theme" if has_theme else "unknown")
-                    
+            folders = classify_archive(file_path)
+            if folders is None:
+                return "unknown"
+            kinds = {kind for folder_kinds in folders.values() for kind in folder_kinds}
+            has_grub = "grub" in kinds
+            has_theme = bool(kinds - {"grub"})
+            return "grub" if has_grub else ("theme" if has_theme else "unknown")
         except Exception:
             return "unknown"
 
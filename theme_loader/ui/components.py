@@ -12,9 +12,11 @@ from gi.repository import Gtk, Adw, Gdk, Gio, GLib  # type: ignore
 from gi.repository import GdkPixbuf  # type: ignore
 from pathlib import Path
 
+from ..utils.archive_formats import supported_patterns
+
 class ModernToast(Gtk.Box):
     """Toast personalizado para notificaciones modernas"""
-    def __init__(self, message, is_success=True):
+    def __init__(self, message, is_success=True, action_label=None, action_callback=None):
         super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
         self.set_css_classes(["toast", "success" if is_success else "error"])
         
@@ -27,6 +29,13 @@ class ModernToast(Gtk.Box):
         label = Gtk.Label(label=message)
         label.set_hexpand(True)
         self.append(label)
+        
+        # Acción opcional (p. ej. Deshacer)
+        if action_label and action_callback:
+            action_btn = Gtk.Button(label=action_label)
+            action_btn.set_css_classes(["flat", "pill"])
+            action_btn.connect("clicked", lambda btn: (btn.set_sensitive(False), action_callback()))
+            self.append(action_btn)
 
 class ThemeCard(Gtk.Box):
     """Tarjeta moderna para mostrar temas"""
@@ -124,11 +133,11 @@ class ThemeCard(Gtk.Box):
             delete_btn.connect("clicked", self._on_delete_clicked)
             actions_box.append(delete_btn)
         
-        # Etiqueta de aplicado
-        if is_applied:
-            applied_label = Gtk.Label(label="Aplicado")
-            applied_label.set_css_classes(["caption", "theme-applied-label"])
-            actions_box.append(applied_label)
+        # Etiqueta de aplicado (se muestra u oculta al cambiar el tema aplicado)
+        self.applied_label = Gtk.Label(label="Aplicado")
+        self.applied_label.set_css_classes(["caption", "theme-applied-label"])
+        self.applied_label.set_visible(is_applied)
+        actions_box.append(self.applied_label)
         
         header.append(actions_box)
         self.append(header)
@@ -144,6 +153,16 @@ class ThemeCard(Gtk.Box):
             path_label.set_margin_bottom(16)
             self.append(path_label)
         
+        # Tamaño en disco (se rellena cuando termina el cálculo en segundo plano)
+        self.size_label = Gtk.Label()
+        self.size_label.set_css_classes(["caption", "dim-label", "theme-size"])
+        self.size_label.set_xalign(0)
+        self.size_label.set_margin_start(16)
+        self.size_label.set_margin_end(16)
+        self.size_label.set_margin_bottom(12)
+        self.size_label.set_visible(False)
+        self.append(self.size_label)
+        
         # Estado de loading
         self.spinner = Gtk.Spinner()
         self.spinner.set_css_classes(["theme-spinner"])
@@ -180,6 +199,25 @@ class ThemeCard(Gtk.Box):
         if self.delete_callback:
             self.delete_callback(self.theme_type, self.name, self.path, self)
     
+    def set_applied(self, applied: bool):
+        """Marcar o desmarcar la tarjeta como tema aplicado"""
+        if applied:
+            self.add_css_class("theme-applied")
+        else:
+            self.remove_css_class("theme-applied")
+        self.applied_label.set_visible(applied)
+    
+    def set_size_info(self, size: int, files_count: int):
+        """Mostrar tamaño en disco y número de archivos"""
+        value = float(size)
+        for unit in ("B", "KB", "MB", "GB"):
+            if value < 1024 or unit == "GB":
+                break
+            value /= 1024
+        size_text = f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        self.size_label.set_text(f"{size_text} · {files_count} archivos")
+        self.size_label.set_visible(True)
+    
     def set_loading(self, loading):
         """Mostrar/ocultar estado de carga"""
         if loading:
@@ -295,11 +333,8 @@ class DropZone(Gtk.Box):
         # Filtro para archivos comprimidos
         compressed_filter = Gtk.FileFilter()
         compressed_filter.set_name("Archivos de tema")
-        compressed_filter.add_pattern("*.zip")
-        compressed_filter.add_pattern("*.tar.gz")
-        compressed_filter.add_pattern("*.tar.xz")
-        compressed_filter.add_pattern("*.tar.bz2")
-        compressed_filter.add_pattern("*.tar")
+        for pattern in supported_patterns():
+            compressed_filter.add_pattern(pattern)
         dialog.add_filter(compressed_filter)
         
         # Filtro para todos los archivos
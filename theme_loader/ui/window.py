@@ -13,7 +13,6 @@ from gi.repository import Gtk, Adw, Gdk, Gio, GLib, GObject, GdkPixbuf  # type:
 from pathlib import Path
 import subprocess
 import os
-import configparser
 import threading
 
 # Importar módulos locales
@@ -22,6 +21,15 @@ from .styles import load_styles
 from ..core.theme_manager import ThemeManager
 from ..core.theme_scanner import ThemeScanner
 from ..core.theme_applier import ThemeApplier
+from ..core.theme_state import ThemeStateService
+from ..core.operations import operation_result, run_operation
+from ..core.theme_watcher import ThemeWatcher
+from ..core.theme_roots import get_root_source
+from ..utils.index_theme import get_theme_comment
+from ..utils.theme_record import ThemeRecord
+from ..utils.trash import get_trash
+from ..utils.manifest import get_manifest
+from ..utils.archive_formats import supported_patterns
 from theme_loader.utils import list_installed_applications, list_all_theme_icons, assign_custom_icon_to_app
 
 class Window(Adw.ApplicationWindow):
@@ -37,12 +45,32 @@ class Window(Adw.ApplicationWindow):
         # Estado de la aplicación
         self.current_theme_type = "gtk"
         self.is_loading = False
-        self.applied_themes = {}  # Temas aplicados actualmente
+        self._stats_futures = []  # Cálculos de tamaño en curso
+        self._operations = []  # Aplicaciones e instalaciones en segundo plano
         
         # Inicializar componentes core
         self.theme_manager = ThemeManager()
         self.theme_scanner = ThemeScanner()
-        self.theme_applier = ThemeApplier(callback=self._log_message)
+        # Temas aplicados en el sistema, actualizados por señales de GSettings
+        # Los cambios pueden llegar desde el hilo de una operación: se reenvían al bucle principal
+        self.theme_state = ThemeStateService(
+            lambda theme_type, name: GLib.idle_add(self._on_applied_theme_changed, theme_type, name))
+        self.theme_applier = ThemeApplier(callback=self._log_message, scanner=self.theme_scanner,
+                                          state=self.theme_state)
+        # Papelera de temas: borrar/sustituir es un rename y se puede deshacer
+        self.theme_trash = get_trash()
+        
+        # Observador de directorios: actualiza solo las tarjetas afectadas
+        watched_roots = [
+            self.theme_manager.theme_dir,
+            self.theme_manager.icon_dir,
+            self.theme_manager.local_icon_dir
+        ] + self.theme_scanner.theme_dirs + self.theme_scanner.icon_dirs
+        self.theme_watcher = ThemeWatcher(
+            watched_roots,
+            self._on_theme_dir_event,
+            index=self.theme_scanner.index
+        )
         
         # Cargar estilos
         load_styles()
@@ -56,9 +84,25 @@ class Window(Adw.ApplicationWindow):
         # Conectar acciones del menú
         self._connect_menu_actions()
         
+        # Cancelar las operaciones pendientes al cerrar
+        self.connect("close-request", self._on_close_request)
+        
         # Cargar datos iniciales
         GLib.timeout_add(500, self._initial_load)
     
+    def _on_close_request(self, window):
+        """Cancelar las operaciones en segundo plano y dejar de observar cambios"""
+        for future in self._operations:
+            future.cancel()
+        self._operations = []
+        self.theme_state.stop()
+        return False
+    
+    def _track_operation(self, future):
+        """Guardar una operación en curso para poder cancelarla"""
+        self._operations = [f for f in self._operations if not f.done()] + [future]
+        return future
+    
     def _connect_menu_actions(self):
         """Conectar acciones del menú principal"""
         app = self.get_application()
@@ -533,7 +577,14 @@ class Window(Adw.ApplicationWindow):
         """Carga inicial de la aplicación"""
         self._set_loading(True)
         self._log_message("Iniciando GNOME Theme Loader...", "info")
+        # Leer los temas aplicados antes de crear las cards
+        self.theme_state.start()
         self._refresh_all_themes()
+        if not self.theme_watcher.start():
+            self._log_message("No se pudieron observar los directorios de temas", "warning")
+        # Restos de sesiones anteriores en la papelera y temas que ya no existen en el manifiesto
+        self.theme_trash.purge_expired()
+        get_manifest().prune()
         return False
     
     def _refresh_all_themes(self):
@@ -560,7 +611,35 @@ class Window(Adw.ApplicationWindow):
         self._update_current_themes_display()
         
         self._log_message(f"Escaneo completado: {total_themes} temas encontrados", "success")
+        shadowed = self.theme_manager.shadowed_themes
+        if shadowed:
+            names = ", ".join(sorted({hidden.name for hidden, _ in shadowed}))
+            self._log_message(f"{len(shadowed)} temas del sistema ocultos por otros con el mismo nombre: {names}", "info")
         self._set_loading(False)
+        
+        # Calcular tamaños en segundo plano
+        paths = {str(card.path) for theme_type in self.theme_grids for _, card in self._iter_theme_cards(theme_type)}
+        self._load_theme_sizes(sorted(paths), cancel_previous=True)
+    
+    def _load_theme_sizes(self, paths: list, cancel_previous: bool = False):
+        """Calcular tamaños de temas en el pool del escáner y mostrarlos según llegan"""
+        if cancel_previous:
+            for future in self._stats_futures:
+                future.cancel()
+            self._stats_futures = []
+        self._stats_futures = [f for f in self._stats_futures if not f.done()]
+        self._stats_futures += self.theme_scanner.compute_directory_stats_async(
+            [Path(p) for p in paths],
+            lambda path, stats: GLib.idle_add(self._on_theme_stats, path, stats)
+        )
+    
+    def _on_theme_stats(self, theme_path: Path, stats: dict):
+        """Actualizar las cards de un tema con su tamaño calculado"""
+        for theme_type in self.theme_grids:
+            for _, card in self._iter_theme_cards(theme_type):
+                if str(card.path) == str(theme_path):
+                    card.set_size_info(stats["size"], stats["files_count"])
+        return False
     
     def _populate_theme_page(self, theme_type: str, themes: list):
         """Poblar página de temas con grid mejorado"""
@@ -582,53 +661,109 @@ class Window(Adw.ApplicationWindow):
         grid.set_visible(True)
         empty_state.set_visible(False)
         
-        # Obtener tema aplicado actual
-        applied_name = self.applied_themes.get(theme_type, None)
-        
         # Agregar temas como cards mejoradas
         for theme in themes:
-            is_applied = (applied_name == theme["name"])
-            description = None
-            # Intentar leer descripción corta de index.theme si existe
-            index_path = os.path.join(theme["path"], "index.theme")
-            if os.path.exists(index_path):
-                config = configparser.ConfigParser()
-                try:
-                    config.read(index_path)
-                    if config.has_option("Desktop Entry", "Comment"):
-                        description = config.get("Desktop Entry", "Comment")
-                except Exception:
-                    pass
-            card = ThemeCard(
-                name=theme["name"],
-                theme_type=theme_type,
-                path=theme["path"],
-                apply_callback=self._apply_theme_with_feedback,
-                preview_callback=self._preview_theme,
-                delete_callback=self._delete_theme,
-                is_applied=is_applied,
-                description=description
-            )
-            grid.append(card)
+            grid.append(self._create_theme_card(theme_type, theme))
+    
+    def _create_theme_card(self, theme_type: str, theme: ThemeRecord) -> ThemeCard:
+        """Crear la card de un tema"""
+        # Obtener tema aplicado actual
+        applied_name = self.theme_state.get(theme_type)
+        is_applied = (applied_name == theme.name)
+        # Descripción corta desde index.theme (caché compartida del parser)
+        description = get_theme_comment(theme.path)
+        return ThemeCard(
+            name=theme.name,
+            theme_type=theme_type,
+            path=theme.path,
+            apply_callback=self._apply_theme_with_feedback,
+            preview_callback=self._preview_theme,
+            # Los temas del sistema no se pueden borrar sin privilegios
+            delete_callback=self._delete_theme if theme.source == "user" else None,
+            is_applied=is_applied,
+            description=description
+        )
+    
+    def _on_theme_dir_event(self, event: str, theme_path: Path):
+        """Actualizar solo las cards del tema añadido, eliminado o modificado"""
+        self._remove_theme_cards(theme_path)
+        if event != "removed":
+            for theme in self.theme_manager.get_themes_for_dir(theme_path):
+                self._add_theme_card(theme.type.value, theme)
+        messages = {
+            "added": f"Tema detectado: {theme_path.name}",
+            "removed": f"Tema eliminado: {theme_path.name}",
+            "changed": f"Tema actualizado: {theme_path.name}"
+        }
+        self._log_message(messages[event], "info")
+    
+    def _on_applied_theme_changed(self, theme_type: str, name):
+        """Mover la marca de aplicado cuando cambia el tema (desde aquí u otra aplicación)"""
+        if theme_type not in getattr(self, "theme_grids", {}):
+            return False
+        for _, card in self._iter_theme_cards(theme_type):
+            card.set_applied(card.name == name)
+        self._update_current_themes_display()
+        return False
+    
+    def _iter_theme_cards(self, theme_type: str):
+        """Iterar sobre las cards de una categoría"""
+        child = self.theme_grids[theme_type].get_first_child()
+        while child:
+            next_child = child.get_next_sibling()
+            card = child.get_child() if isinstance(child, Gtk.FlowBoxChild) else child
+            if isinstance(card, ThemeCard):
+                yield child, card
+            child = next_child
+    
+    def _remove_theme_cards(self, theme_path: Path):
+        """Quitar de todas las categorías las cards de un directorio de tema"""
+        for theme_type, grid in self.theme_grids.items():
+            for child, card in list(self._iter_theme_cards(theme_type)):
+                if str(card.path) == str(theme_path):
+                    grid.remove(child)
+            self._update_empty_state(theme_type)
+    
+    def _add_theme_card(self, theme_type: str, theme: ThemeRecord):
+        """Agregar la card de un tema si no hay otra con el mismo nombre"""
+        if theme_type not in self.theme_grids:
+            return
+        for child, card in list(self._iter_theme_cards(theme_type)):
+            if card.name == theme.name:
+                # Un tema del usuario oculta al del sistema con el mismo nombre
+                if theme.source != "user" or get_root_source(Path(card.path).parent) == "user":
+                    return
+                self.theme_grids[theme_type].remove(child)
+        self.theme_grids[theme_type].append(self._create_theme_card(theme_type, theme))
+        self._update_empty_state(theme_type)
+        self._load_theme_sizes([theme.path])
+    
+    def _update_empty_state(self, theme_type: str):
+        """Mostrar el estado vacío si la categoría no tiene cards"""
+        has_cards = any(True for _ in self._iter_theme_cards(theme_type))
+        self.theme_grids[theme_type].set_visible(has_cards)
+        self.empty_states[theme_type].set_visible(not has_cards)
     
     def _apply_theme_with_feedback(self, theme_type: str, name: str, card_widget):
         """Aplicar tema con feedback mejorado"""
         self._log_message(f"Aplicando tema {name}...", "info")
         
-        # Aplicar tema
-        success = self.theme_applier.apply_theme(theme_type, name, self._log_message)
-        
-        # Actualizar estado
-        if success:
-            self.applied_themes[theme_type] = name
-            self._show_toast(f"✓ {name} aplicado correctamente", True)
-            self._update_current_themes_display()
-        else:
-            self._show_toast(f"✗ Error al aplicar {name}", False)
+        def on_done(future):
+            # Actualizar estado (en el bucle principal)
+            if future.cancel_requested():
+                self._log_message(f"Aplicación de {name} cancelada", "warning")
+            elif operation_result(future, False):
+                self._show_toast(f"✓ {name} aplicado correctamente", True)
+                self._update_current_themes_display()
+            else:
+                self._show_toast(f"✗ Error al aplicar {name}", False)
+            
+            # Actualizar estado de la card
+            if card_widget:
+                card_widget.set_loading(False)
         
-        # Actualizar estado de la card
-        if card_widget:
-            card_widget.set_loading(False)
+        # Aplicar tema sin bloquear la ventana (gsettings, pkexec y update-grub en GRUB)
+        self._track_operation(self.theme_applier.apply_async(theme_type, name, self._log_message, done=on_done))
     
     def _preview_theme(self, theme_type: str, name: str, path: str):
         # Mostrar la vista previa en el panel derecho
@@ -703,44 +838,106 @@ class Window(Adw.ApplicationWindow):
             return
         
         self._log_message(f"Procesando archivo: {file_path.name}", "info") 
-        self._show_toast(f"📦 Procesando {file_path.name}...", True)
         
-        # Instalar tema con callback de progreso
-        installed_theme_name = {"name": None, "type": None}
-        def progress_callback(message, msg_type):
-            self._log_message(message, msg_type)
-            # Detectar nombre y tipo del tema instalado desde el mensaje
-            if msg_type == "info" and ("aplicado" in message or "aplicados" in message):
-                # Ejemplo: "GTK aplicado: Everforest-Dark"
-                parts = message.split(":")
-                if len(parts) == 2:
-                    tipo, nombre = parts[0].strip(), parts[1].strip()
-                    if "GTK" in tipo.upper():
-                        installed_theme_name["type"] = "gtk"  # type: ignore
-                        installed_theme_name["name"] = nombre
-                    elif "SHELL" in tipo.upper():
-                        installed_theme_name["type"] = "shell"  # type: ignore
-                        installed_theme_name["name"] = nombre
-                    elif "ICONOS" in tipo.upper():
-                        installed_theme_name["type"] = "icons"  # type: ignore
-                        installed_theme_name["name"] = nombre
-                    elif "CURSOR" in tipo.upper():
-                        installed_theme_name["type"] = "cursor"  # type: ignore
-                        installed_theme_name["name"] = nombre
-        
-        success, message = self.theme_manager.install_theme_archive(
-            file_path, 
-            callback=progress_callback
+        def on_variants(future):
+            if future.cancel_requested():
+                return
+            # Paquetes con varias variantes: elegir cuáles instalar y cuál aplicar
+            variants = operation_result(future, [])
+            if len(variants) > 1:
+                self._show_variants_dialog(file_path, variants)
+                return
+            self._install_archive_file(file_path)
+        
+        # Leer la lista de miembros fuera del hilo de la interfaz
+        self._track_operation(self.theme_manager.get_archive_variants_async(file_path, done=on_variants))
+    
+    def _show_variants_dialog(self, file_path: Path, variants: list):
+        """Mostrar diálogo para elegir las variantes de un paquete de temas"""
+        dialog = Adw.MessageDialog(
+            transient_for=self,
+            heading=f"{len(variants)} variantes en {file_path.name}",
+            body="Elige las variantes que quieres instalar y cuál aplicar al terminar"
         )
         
+        content = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        list_box = Gtk.ListBox()
+        list_box.set_selection_mode(Gtk.SelectionMode.NONE)
+        list_box.set_css_classes(["boxed-list"])
+        checks = []
+        for variant in variants:
+            check = Gtk.CheckButton(label=f"{variant.name} ({variant.kind})")
+            check.set_active(True)
+            check.set_margin_start(8)
+            check.set_margin_end(8)
+            list_box.append(check)
+            checks.append((variant, check))
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_min_content_height(min(48 * len(variants), 320))
+        scrolled.set_child(list_box)
+        content.append(scrolled)
+        
+        # Variante a aplicar (como mucho una: un solo cambio de estilo)
+        apply_names = ["No aplicar"] + [variant.name for variant in variants]
+        apply_dropdown = Gtk.DropDown.new_from_strings(apply_names)
+        apply_dropdown.set_selected(1)
+        apply_row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        apply_label = Gtk.Label(label="Aplicar:")
+        apply_label.set_xalign(0)
+        apply_row.append(apply_label)
+        apply_dropdown.set_hexpand(True)
+        apply_row.append(apply_dropdown)
+        content.append(apply_row)
+        
+        dialog.set_extra_child(content)
+        dialog.add_response("cancel", "Cancelar")
+        dialog.add_response("install", "Instalar")
+        dialog.set_response_appearance("install", Adw.ResponseAppearance.SUGGESTED)
+        
+        def on_response(dlg, response):
+            if response == "install":
+                selected = [variant.name for variant, check in checks if check.get_active()]
+                index = apply_dropdown.get_selected()
+                apply_variant = apply_names[index] if index > 0 else None
+                if apply_variant not in selected:
+                    apply_variant = None
+                if selected:
+                    self._install_archive_file(file_path, selected, apply_variant, auto_apply=False)
+            dialog.close()
+        
+        dialog.connect("response", on_response)
+        dialog.present()
+    
+    def _install_archive_file(self, file_path: Path, variants=None, apply_variant=None, auto_apply=True):
+        """Instalar un archivo de tema (solo las variantes indicadas, si se dan)"""
+        self._show_toast(f"📦 Procesando {file_path.name}...", True)
+        
+        def on_done(future):
+            if future.cancel_requested():
+                return
+            success, message = operation_result(future, (False, "Error durante la instalación"))
+            self._on_archive_installed(success, message)
+        
+        # Extraer e instalar en segundo plano; los mensajes llegan en orden al bucle principal.
+        # install_archive aplica como mucho una variante (apply_variant o auto_apply): un solo cambio de estilo
+        self._track_operation(self.theme_manager.install_async(
+            file_path,
+            callback=self._log_message,
+            done=on_done,
+            variants=variants,
+            apply_variant=apply_variant,
+            auto_apply=auto_apply
+        ))
+    
+    def _on_archive_installed(self, success: bool, message: str):
+        """Mostrar el resultado de una instalación (la marca de aplicado llega por el servicio de estado)"""
         if success:
             self._show_toast(f"✓ Tema instalado correctamente", True)
-            # Refrescar después de un breve delay
-            GLib.timeout_add(1000, self._refresh_all_themes)
-            # Aplicar el tema recién instalado si se detectó
-            if installed_theme_name["name"] and installed_theme_name["type"]:
-                # Buscar la card correspondiente y pasarle un dummy widget
-                self._apply_theme_with_feedback(installed_theme_name["type"], installed_theme_name["name"], card_widget=None)
+            # El observador actualiza las cards afectadas; sin él, refrescar todo
+            if not self.theme_watcher.is_active():
+                GLib.timeout_add(1000, self._refresh_all_themes)
         else:
             self._log_message(f"Error: {message}", "error")
             self._show_toast(f"✗ Error: {message}", False)
@@ -784,12 +981,9 @@ class Window(Adw.ApplicationWindow):
         # Filtros mejorados
         theme_filter = Gtk.FileFilter()
         theme_filter.set_name("Archivos de Tema")
-        theme_filter.add_pattern("*.zip")
-        theme_filter.add_pattern("*.tar.gz")
-        theme_filter.add_pattern("*.tar.xz")
-        theme_filter.add_pattern("*.tar.bz2")
-        theme_filter.add_pattern("*.7z")
-        theme_filter.add_pattern("*.rar")
+        # Solo los formatos con un backend disponible
+        for pattern in supported_patterns():
+            theme_filter.add_pattern(pattern)
         dialog.add_filter(theme_filter)
         
         compressed_filter = Gtk.FileFilter()
@@ -896,14 +1090,16 @@ class Window(Adw.ApplicationWindow):
         self._log_message("Restableciendo todos los temas...", "info")
         self._show_toast("🔄 Restableciendo temas...", True)
         
-        success = self.theme_applier.reset_to_defaults(self._log_message)
+        def on_done(future):
+            if future.cancel_requested():
+                return
+            if operation_result(future, False):
+                self._update_current_themes_display()
+                self._show_toast("✓ Temas restablecidos correctamente", True)
+            else:
+                self._show_toast("✗ Error al restablecer temas", False)
         
-        if success:
-            self.applied_themes.clear()
-            self._update_current_themes_display()
-            self._show_toast("✓ Temas restablecidos correctamente", True)
-        else:
-            self._show_toast("✗ Error al restablecer temas", False)
+        self._track_operation(self.theme_applier.reset_async(self._log_message, done=on_done))
     
     def _create_theme_backup(self):
         """Crear respaldo de la configuración actual"""
@@ -1045,9 +1241,9 @@ class Window(Adw.ApplicationWindow):
         if hasattr(self, 'activity_log'):
             self.activity_log.add_message(message, message_type)
     
-    def _show_toast(self, message: str, is_success: bool):
-        """Mostrar notificación toast mejorada"""
-        toast = ModernToast(message, is_success)
+    def _show_toast(self, message: str, is_success: bool, action_label=None, action_callback=None):
+        """Mostrar notificación toast mejorada (con una acción opcional)"""
+        toast = ModernToast(message, is_success, action_label, action_callback)
         
         # Agregar al overlay
         self.toast_overlay.add_overlay(toast)
@@ -1453,15 +1649,46 @@ class Window(Adw.ApplicationWindow):
         file_chooser.show()
 
     def _delete_theme(self, theme_type, name, path, card_widget):
-        """Eliminar tema local y refrescar la lista"""
-        import shutil
-        import os
+        """Eliminar tema local (rename a la papelera, borrado en segundo plano) y refrescar la lista"""
         try:
-            shutil.rmtree(path)
-            self._show_toast(f"Tema '{name}' eliminado", True)
-            self._refresh_all_themes()
+            manifest = get_manifest()
+            token = manifest.uninstall(Path(path))
+            if token is not None:
+                # Los archivos añadidos después de instalar vuelven a su sitio en segundo plano
+                keep = self._track_operation(run_operation(manifest.keep_extra_files, Path(path), token,
+                                                           callback=self._log_message))
+                self._show_toast(f"Tema '{name}' eliminado", True, "Deshacer",
+                                 lambda: self._undo_delete_theme(token, name, keep))
+            else:
+                self._show_toast(f"Tema '{name}' eliminado", True)
+            if not self.theme_watcher.is_active():
+                self._refresh_all_themes()
         except Exception as e:
             self._show_toast(f"Error al eliminar '{name}': {e}", False)
+    
+    def _undo_delete_theme(self, token, name, keep=None):
+        """Recuperar un tema eliminado mientras sigue en la papelera"""
+        if keep is not None and not keep.done():
+            # No seguir copiando archivos añadidos a la ruta que se va a recuperar; se recupera
+            # cuando la operación termine, sin esperarla en el hilo de la interfaz
+            keep.cancel()
+            keep.add_done_callback(lambda future: GLib.idle_add(self._restore_deleted_theme, token, name))
+            return
+        self._restore_deleted_theme(token, name)
+
+    def _restore_deleted_theme(self, token, name):
+        """Sacar un tema de la papelera y refrescar la lista"""
+        try:
+            restored = token is not None and self.theme_trash.restore(token)
+        except OSError as e:
+            self._log_message(f"Error al recuperar '{name}': {e}", "error")
+            restored = False
+        if restored:
+            self._log_message(f"Tema '{name}' recuperado", "success")
+            if not self.theme_watcher.is_active():
+                self._refresh_all_themes()
+        else:
+            self._show_toast(f"No se pudo recuperar '{name}'", False)
 
     def _restart_app(self):
         import sys, os
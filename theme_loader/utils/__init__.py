@@ -3,13 +3,54 @@ Utils module for GNOME Theme Loader
 Contiene utilidades para instalación, gsettings y GRUB
 """
 
-from .installer import install_archive, detect_type, move_to_dest, list_installed_applications, list_all_theme_icons, assign_custom_icon_to_app
-from .gsettings import set_gtk_theme, set_shell_theme, set_icon_theme, set_cursor_theme
-from .grub import list_grub_themes, install_grub_theme, apply_grub_theme, remove_grub_theme
+import importlib
+
+# Los submódulos se importan al primer acceso para que importar el paquete sea barato
+_LAZY_ATTRS = {
+    'install_archive': '.installer',
+    'list_archive_variants': '.installer',
+    'detect_type': '.installer',
+    'move_to_dest': '.installer',
+    'list_installed_applications': '.installer',
+    'list_all_theme_icons': '.installer',
+    'assign_custom_icon_to_app': '.installer',
+    'set_gtk_theme': '.gsettings',
+    'set_shell_theme': '.gsettings',
+    'set_icon_theme': '.gsettings',
+    'set_cursor_theme': '.gsettings',
+    'list_grub_themes': '.grub',
+    'install_grub_theme': '.grub',
+    'apply_grub_theme': '.grub',
+    'remove_grub_theme': '.grub',
+    'read_index_theme': '.index_theme',
+    'get_theme_comment': '.index_theme',
+    'read_xcursor_toc': '.xcursor',
+    'read_cursor_theme': '.xcursor',
+    'ThemeRecord': '.theme_record',
+    'ThemeType': '.theme_record',
+    'extract_archive': '.archive_formats',
+    'supported_patterns': '.archive_formats',
+    'UnsupportedArchiveError': '.archive_formats',
+    'ExtractionLimits': '.archive_formats',
+    'ArchiveLimitError': '.archive_formats',
+    'classify_archive': '.archive_classifier',
+    'archive_fingerprint': '.archive_cache',
+    'get_archive_cache': '.archive_cache',
+}
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
-    'install_archive', 'detect_type', 'move_to_dest',
+    'install_archive', 'list_archive_variants', 'detect_type', 'move_to_dest',
     'set_gtk_theme', 'set_shell_theme', 'set_icon_theme', 'set_cursor_theme',
     'list_grub_themes', 'install_grub_theme', 'apply_grub_theme', 'remove_grub_theme',
-    'list_installed_applications', 'list_all_theme_icons', 'assign_custom_icon_to_app'
+    'list_installed_applications', 'list_all_theme_icons', 'assign_custom_icon_to_app',
+    'read_index_theme', 'get_theme_comment', 'read_xcursor_toc', 'read_cursor_theme',
+    'ThemeRecord', 'ThemeType', 'extract_archive', 'supported_patterns', 'UnsupportedArchiveError',
+    'ExtractionLimits', 'ArchiveLimitError'
 ] 
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Archive cache for GNOME Theme Loader
+Persistent cache of archive classifications keyed by a fast content
+fingerprint (size + BLAKE2b of the head, the tail and the zip central
+directory), so archives dropped again are classified without reading them
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_FILE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "gnome-theme-loader" / "archive_cache.json"
+# Cambiar si cambian las reglas de clasificación
+CACHE_VERSION = 2
+MAX_ENTRIES = 256
+# Bytes leídos al principio y al final del archivo
+EDGE_SIZE = 64 * 1024
+# Tamaño máximo del directorio central de un zip que se incluye en la huella
+MAX_CENTRAL_DIRECTORY = 8 * 1024 * 1024
+HASH_SIZE = 20
+
+ZIP_EOCD = b"PK\x05\x06"
+ZIP_EOCD_SIZE = 22
+
+def archive_fingerprint(path: Path) -> str:
+    """Huella rápida del contenido: tamaño, primeros y últimos bytes y directorio central (zip)"""
+    digest = hashlib.blake2b(digest_size=HASH_SIZE)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        digest.update(size.to_bytes(8, "little"))
+        digest.update(f.read(EDGE_SIZE))
+        tail_start = max(0, size - EDGE_SIZE)
+        f.seek(tail_start)
+        tail = f.read()
+        digest.update(tail)
+        # En un zip el índice completo está en el directorio central, justo antes del final
+        eocd = tail.rfind(ZIP_EOCD)
+        if eocd != -1 and len(tail) - eocd >= ZIP_EOCD_SIZE:
+            cd_size, cd_offset = struct.unpack("<II", tail[eocd + 12:eocd + 20])
+            if cd_offset + cd_size <= size and cd_offset < tail_start:
+                f.seek(cd_offset)
+                digest.update(f.read(min(cd_size, MAX_CENTRAL_DIRECTORY)))
+    return digest.hexdigest()
+
+class ArchiveCache:
+    """Caché persistente huella -> carpetas de tema y sus tipos"""
+
+    def __init__(self, cache_file: Optional[Path] = None, max_entries: int = MAX_ENTRIES):
+        self.cache_file = Path(cache_file) if cache_file else CACHE_FILE
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self._entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, List[str]]]:
+        """Clasificación guardada para una huella (None si no se ha visto)"""
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                return None
+            entry["used"] = time.time()
+            self._dirty = True
+            return {folder: list(kinds) for folder, kinds in entry["folders"].items()}
+
+    def put(self, fingerprint: str, folders: Dict[str, List[str]]):
+        """Guardar la clasificación de un archivo, descartando las menos usadas si se supera el máximo"""
+        with self._lock:
+            self._entries[fingerprint] = {"folders": folders, "used": time.time()}
+            if len(self._entries) > self.max_entries:
+                oldest = sorted(self._entries, key=lambda key: self._entries[key]["used"])
+                for key in oldest[:len(self._entries) - self.max_entries]:
+                    del self._entries[key]
+            self._dirty = True
+
+    def save(self):
+        """Guardar la caché en disco de forma atómica si hubo cambios"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": CACHE_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"No se pudo guardar la caché de archivos: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+
+_cache: Optional[ArchiveCache] = None
+_cache_lock = threading.Lock()
+
+def get_archive_cache() -> ArchiveCache:
+    """Obtener la caché compartida por todo el proceso"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArchiveCache()
+        return _cache
@@ -0,0 +1,182 @@
+"""
+Archive classifier for GNOME Theme Loader
+Classifies the theme folders of an archive from its member list only
+(zip central directory, streamed tar headers, 7z/rar headers), without
+extracting anything; results are cached by content fingerprint
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .archive_formats import list_members, ArchiveMember, ARCHIVE_ERRORS
+from .archive_cache import archive_fingerprint, get_archive_cache
+
+# Orden de prioridad cuando hay que devolver un único tipo
+THEME_TYPE_ORDER = ("gtk", "shell", "icons", "cursor", "grub")
+IGNORED_NAMES = ("__MACOSX",)
+# Últimas listas de miembros leídas (huella -> miembros): listar las variantes y después
+# instalar comparten la lectura, que en un tar.* es una descompresión completa
+RECENT_MEMBERS = 2
+
+_recent_members: "OrderedDict[str, List[ArchiveMember]]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+class PathTrie:
+    """Árbol de rutas en memoria: cada directorio es un dict, cada archivo None"""
+
+    def __init__(self):
+        self.root: Dict[str, Optional[dict]] = {}
+
+    def add(self, name: str, is_dir: bool = False):
+        """Añadir una ruta del archivo (normalizada, sin componentes peligrosos)"""
+        parts = [p for p in name.replace("\\", "/").split("/") if p and p != "."]
+        if not parts or ".." in parts:
+            return
+        node = self.root
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is None:
+                child = node[part] = {}
+            node = child
+        last = parts[-1]
+        if is_dir or name.endswith("/"):
+            if node.get(last) is None:
+                node[last] = {}
+        else:
+            node.setdefault(last, None)
+
+    @classmethod
+    def from_members(cls, members: Iterable[ArchiveMember]) -> "PathTrie":
+        trie = cls()
+        for member in members:
+            trie.add(member.name, member.is_dir)
+        return trie
+
+def iter_archive_members(archive_path: Path) -> Optional[List[ArchiveMember]]:
+    """Listar los miembros leyendo solo metadatos; None si no es un archivo soportado"""
+    try:
+        return list_members(archive_path)
+    except ARCHIVE_ERRORS:
+        return None
+
+def classify_node(node: Dict[str, Optional[dict]]) -> List[str]:
+    """Tipos de tema que contiene un directorio según sus hijos directos"""
+    def is_dir(name):
+        return isinstance(node.get(name), dict)
+
+    def is_file(name):
+        return name in node and node[name] is None
+
+    kinds = []
+    if is_dir("gtk-3.0") or is_dir("gtk-4.0"):
+        kinds.append("gtk")
+    if is_dir("gnome-shell"):
+        kinds.append("shell")
+    # Un index.theme con solo cursors/ es un tema de cursores, no de iconos
+    if (is_file("index.theme") and any(is_dir(n) for n in node if n != "cursors")) or is_dir("scalable"):
+        kinds.append("icons")
+    if is_dir("cursors"):
+        kinds.append("cursor")
+    if is_file("theme.txt"):
+        kinds.append("grub")
+    return kinds
+
+def find_theme_folders(trie: PathTrie) -> Dict[str, List[str]]:
+    """Carpetas de tema del archivo (ruta relativa -> tipos), sin descender dentro de un tema
+
+    Si el propio archivo es un tema (gtk-3.0/ en la raíz), su carpeta es "".
+    """
+    found: Dict[str, List[str]] = {}
+    root_kinds = classify_node(trie.root)
+    if root_kinds:
+        found[""] = root_kinds
+        return found
+
+    stack = [("", trie.root)]
+    while stack:
+        prefix, node = stack.pop()
+        for name, child in sorted(node.items(), reverse=True):
+            if child is None or name.startswith(".") or name in IGNORED_NAMES:
+                continue
+            path = f"{prefix}{name}"
+            kinds = classify_node(child)
+            if kinds:
+                found[path] = kinds
+            else:
+                stack.append((f"{path}/", child))
+    return dict(sorted(found.items()))
+
+def _fingerprint(archive_path: Path) -> Optional[str]:
+    try:
+        return archive_fingerprint(archive_path)
+    except OSError:
+        return None
+
+def _remember_members(fingerprint: str, members: List[ArchiveMember]):
+    with _recent_lock:
+        _recent_members[fingerprint] = members
+        _recent_members.move_to_end(fingerprint)
+        while len(_recent_members) > RECENT_MEMBERS:
+            _recent_members.popitem(last=False)
+
+def known_archive(archive_path: Path) -> Tuple[Optional[Dict[str, List[str]]], Optional[List[ArchiveMember]]]:
+    """Clasificación en caché y lista de miembros leída hace poco de un archivo (None si no se tienen)"""
+    fingerprint = _fingerprint(archive_path)
+    if not fingerprint:
+        return None, None
+    with _recent_lock:
+        members = _recent_members.get(fingerprint)
+    return get_archive_cache().get(fingerprint), members
+
+def classify_archive(archive_path: Path, members: Optional[List[ArchiveMember]] = None) -> Optional[Dict[str, List[str]]]:
+    """Clasificar todas las carpetas de tema de un archivo; None si no se puede leer
+
+    Los archivos ya vistos (misma huella de contenido) se resuelven desde la
+    caché sin leer su lista de miembros. Con members (ya leídos) no se vuelve a
+    recorrer el archivo si no está en caché.
+    """
+    fingerprint = _fingerprint(archive_path)
+    cache = get_archive_cache()
+    if fingerprint:
+        folders = cache.get(fingerprint)
+        if folders is not None:
+            return folders
+    if members is None:
+        members = iter_archive_members(archive_path)
+    if members is None:
+        return None
+    folders = classify_members(members)
+    if fingerprint:
+        _remember_members(fingerprint, members)
+        cache.put(fingerprint, folders)
+        cache.save()
+    return folders
+
+def classify_members(members: Iterable[ArchiveMember]) -> Dict[str, List[str]]:
+    """Clasificar las carpetas de tema de una lista de miembros ya leída
+
+    Solo depende del contenido ("" para un tema en la raíz), no del nombre del
+    archivo, así que se puede guardar en la caché por huella.
+    """
+    return find_theme_folders(PathTrie.from_members(members))
+
+def detect_archive_theme_type(archive_path: Path) -> Optional[str]:
+    """Tipo de tema principal de un archivo (gtk > shell > icons > cursor > grub)"""
+    folders = classify_archive(archive_path)
+    if not folders:
+        return None
+    kinds = {kind for folder_kinds in folders.values() for kind in folder_kinds}
+    for kind in THEME_TYPE_ORDER:
+        if kind in kinds:
+            return kind
+    return None
+
+def archive_stem(archive_path: Path) -> str:
+    """Nombre del archivo sin extensiones de compresión (Tema.tar.gz -> Tema)"""
+    name = archive_path.name
+    for suffix in (".tar.gz", ".tar.xz", ".tar.bz2", ".tar.zst", ".tgz", ".tbz2", ".txz", ".tar", ".zip"):
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return archive_path.stem
@@ -0,0 +1,494 @@
+"""
+Archive formats for GNOME Theme Loader
+Registry of archive formats detected by magic bytes, with streaming readers for
+zip, tar.{gz,xz,bz2,zst}, 7z and rar. Optional fast backends (zstandard,
+libarchive-c, py7zr, rarfile) are used when installed. Extraction is bounded:
+sizes, member count, compression ratio and free space are checked from the
+metadata before writing, and streamed members go through a size-capped writer.
+"""
+
+import bz2
+import gzip
+import importlib
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .extractor import extract_zip, safe_relative_parts, real_parent_within, safe_link_target, COPY_BUFFER
+
+# Filtro seguro de tarfile (Python 3.12+, y versiones parcheadas anteriores)
+TAR_EXTRACT_ARGS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+# Bytes leídos para reconocer el formato (la firma ustar de tar está en el byte 257)
+SNIFF_SIZE = 512
+
+# Por debajo de este tamaño no se comprueba la tasa de compresión (archivos pequeños y repetitivos)
+RATIO_MIN_BYTES = 1024 * 1024
+MiB = 1024 * 1024
+
+TargetFor = Optional[Callable[[str], Optional[Path]]]
+
+class UnsupportedArchiveError(Exception):
+    """Formato desconocido o sin un backend instalado para leerlo"""
+
+class ArchiveLimitError(Exception):
+    """El archivo supera los límites de extracción o no cabe en el destino"""
+
+class ArchiveMember(NamedTuple):
+    """Miembro de un archivo según sus metadatos (tamaños en bytes, 0 si se desconocen)"""
+    name: str
+    is_dir: bool
+    size: int = 0
+    compressed_size: int = 0
+
+@dataclass(frozen=True)
+class ExtractionLimits:
+    """Límites de extracción; 0 desactiva cada uno"""
+    max_total_bytes: int = 2048 * MiB
+    max_members: int = 200_000
+    max_ratio: float = 200.0
+    # Espacio que debe quedar libre en el destino después de extraer
+    reserve_bytes: int = 64 * MiB
+
+    @classmethod
+    def from_env(cls) -> "ExtractionLimits":
+        """Límites por defecto, configurables con GNOME_THEME_LOADER_MAX_EXTRACT_* y
+        GNOME_THEME_LOADER_EXTRACT_RESERVE_MB (un valor no válido usa el de por defecto)"""
+        defaults = cls()
+        return cls(
+            max_total_bytes=_env_number("GNOME_THEME_LOADER_MAX_EXTRACT_MB", defaults.max_total_bytes // MiB, int) * MiB,
+            max_members=_env_number("GNOME_THEME_LOADER_MAX_EXTRACT_MEMBERS", defaults.max_members, int),
+            max_ratio=_env_number("GNOME_THEME_LOADER_MAX_EXTRACT_RATIO", defaults.max_ratio, float),
+            reserve_bytes=_env_number("GNOME_THEME_LOADER_EXTRACT_RESERVE_MB", defaults.reserve_bytes // MiB, int) * MiB,
+        )
+
+def _env_number(name: str, default, parse: Callable):
+    """Número no negativo de una variable de entorno; default (con aviso) si no es válido"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = parse(value)
+    except ValueError:
+        number = -1
+    if number < 0 or number != number:
+        print(f"Valor no válido en {name}: {value!r}, se usa {default}")
+        return default
+    return number
+
+DEFAULT_LIMITS = ExtractionLimits.from_env()
+
+# Errores de lectura esperables con archivos dañados o no soportados
+ARCHIVE_ERRORS = (UnsupportedArchiveError, tarfile.TarError, zipfile.BadZipFile, lzma.LZMAError, OSError, EOFError)
+
+@dataclass(frozen=True)
+class ArchiveFormat:
+    """Formato registrado: firma, extensiones y operaciones de lectura"""
+    name: str
+    extensions: Tuple[str, ...]
+    matches: Callable[[bytes], bool]
+    list_members: Callable[[Path], List[ArchiveMember]]
+    extract: Callable[[Path, Path, TargetFor, Optional[int], "ByteBudget"], int]
+    is_available: Callable[[], bool] = lambda: True
+
+_formats: Dict[str, ArchiveFormat] = {}
+_modules: Dict[str, object] = {}
+
+def register_format(archive_format: ArchiveFormat):
+    """Registrar (o sustituir) un formato; se prueban en orden de registro"""
+    _formats[archive_format.name] = archive_format
+
+def _optional_module(name: str):
+    """Importar un backend opcional una sola vez (None si no está instalado)"""
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+def sniff_format(path: Path) -> Optional[ArchiveFormat]:
+    """Reconocer el formato de un archivo por su firma, sin mirar la extensión"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_SIZE)
+    except OSError:
+        return None
+    for archive_format in _formats.values():
+        if archive_format.matches(head):
+            return archive_format
+    return None
+
+def get_format(path: Path) -> ArchiveFormat:
+    """Formato de un archivo con backend disponible, o UnsupportedArchiveError"""
+    archive_format = sniff_format(path)
+    if archive_format is None:
+        raise UnsupportedArchiveError(f"Formato no reconocido: {Path(path).name}")
+    if not archive_format.is_available():
+        raise UnsupportedArchiveError(f"No hay ningún backend instalado para {archive_format.name}")
+    return archive_format
+
+def list_members(path: Path) -> List[ArchiveMember]:
+    """Listar los miembros de un archivo leyendo solo metadatos o cabeceras"""
+    return get_format(path).list_members(Path(path))
+
+def extract_archive(path: Path, dest: Path, target_for: TargetFor = None, workers: Optional[int] = None,
+                    limits: Optional[ExtractionLimits] = None,
+                    members: Optional[List[ArchiveMember]] = None) -> int:
+    """Extraer un archivo en dest (target_for elige o descarta la ruta de cada miembro)
+
+    Antes de escribir nada se comprueban los límites con los metadatos de los
+    miembros que se van a extraer (members evita volver a listarlos). Lanza
+    ArchiveLimitError si no se cumplen.
+    """
+    path, dest = Path(path), Path(dest)
+    archive_format = get_format(path)
+    limits = limits or DEFAULT_LIMITS
+    if members is None:
+        members = archive_format.list_members(path)
+    selected = [m for m in members if not m.is_dir and _resolve_target(m.name, dest, target_for) is not None]
+    check_extraction_limits(path, selected, dest, limits)
+    return archive_format.extract(path, dest, target_for, workers, ByteBudget(limits.max_total_bytes))
+
+def check_extraction_limits(path: Path, members: Iterable[ArchiveMember], dest: Path, limits: ExtractionLimits):
+    """Rechazar antes de extraer los archivos demasiado grandes, con demasiados miembros o sospechosos de ser bombas"""
+    members = list(members)
+    total = sum(m.size for m in members)
+    if limits.max_members and len(members) > limits.max_members:
+        raise ArchiveLimitError(f"{Path(path).name} tiene {len(members)} archivos (límite: {limits.max_members})")
+    if limits.max_total_bytes and total > limits.max_total_bytes:
+        raise ArchiveLimitError(f"{Path(path).name} ocupa {total / MiB:.0f} MiB descomprimido "
+                                f"(límite: {limits.max_total_bytes / MiB:.0f} MiB)")
+    if limits.max_ratio:
+        archive_size = max(1, os.path.getsize(path))
+        suspicious = [m for m in members
+                      if m.compressed_size and m.size >= RATIO_MIN_BYTES and m.size / m.compressed_size > limits.max_ratio]
+        if suspicious or (total >= RATIO_MIN_BYTES and total / archive_size > limits.max_ratio):
+            raise ArchiveLimitError(f"{Path(path).name} tiene una tasa de compresión sospechosa "
+                                    f"(más de {limits.max_ratio:.0f}:1)")
+    free = shutil.disk_usage(_existing_parent(dest)).free
+    if total + limits.reserve_bytes > free:
+        raise ArchiveLimitError(f"No hay espacio suficiente para {Path(path).name}: "
+                                f"necesita {total / MiB:.0f} MiB, quedan {free / MiB:.0f} MiB libres")
+
+class ByteBudget:
+    """Contador de bytes escritos que corta la extracción al superar el máximo (0 = sin límite)"""
+
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.written = 0
+        # Los zip pueden extraerse desde varios hilos
+        self._lock = threading.Lock()
+
+    def take(self, count: int):
+        with self._lock:
+            self.written += count
+            written = self.written
+        if self.max_bytes and written > self.max_bytes:
+            raise ArchiveLimitError(f"La extracción supera el límite de {self.max_bytes / MiB:.0f} MiB")
+
+def supported_patterns() -> List[str]:
+    """Patrones de nombre (*.zip, *.tar.gz...) de los formatos con backend disponible"""
+    return [f"*{ext}" for f in _formats.values() if f.is_available() for ext in f.extensions]
+
+# ----- Utilidades comunes -----
+
+def _is_within(path: str, root: str) -> bool:
+    return os.path.commonpath([path, root]) == root
+
+def _existing_parent(path: Path) -> Path:
+    path = Path(os.path.abspath(path))
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
+
+def _resolve_target(name: str, dest: Path, target_for: TargetFor) -> Optional[Path]:
+    """Ruta destino de un miembro, siempre dentro de dest (comprobación léxica)"""
+    if target_for is not None:
+        target = target_for(name)
+    else:
+        parts = safe_relative_parts(name)
+        target = dest.joinpath(*parts) if parts else None
+    if target is None or not _is_within(os.path.abspath(target), os.path.abspath(dest)):
+        return None
+    return target
+
+def _write_target(name: str, dest: Path, target_for: TargetFor, real_dest: str) -> Optional[Path]:
+    """Ruta donde escribir un miembro ahora: además de la comprobación léxica, su
+    directorio no puede salir de dest a través de un enlace extraído antes"""
+    target = _resolve_target(name, dest, target_for)
+    if target is None or not real_parent_within(target, real_dest):
+        return None
+    return target
+
+def _safe_symlink(link_target: str, target: Path, real_dest: str) -> bool:
+    """Crear un enlace simbólico relativo que no salga de dest (real_dest, ya resuelto)"""
+    if not safe_link_target(link_target, target, real_dest):
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.is_symlink():
+        target.unlink()
+    elif target.exists():
+        # Un directorio o archivo ya extraído con el mismo nombre: se conserva
+        return False
+    os.symlink(link_target, target)
+    return True
+
+def _write_stream(target: Path, chunks, budget: ByteBudget, mode: int = 0):
+    """Escribir un miembro por bloques descontándolos del presupuesto"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.is_symlink():
+        target.unlink()
+    with open(target, "wb") as dst:
+        for chunk in chunks:
+            budget.take(len(chunk))
+            dst.write(chunk)
+    if mode & 0o777:
+        os.chmod(target, mode & 0o777)
+
+def _read_chunks(src) -> Iterator[bytes]:
+    while True:
+        chunk = src.read(COPY_BUFFER)
+        if not chunk:
+            return
+        yield chunk
+
+def _move_extracted(tmp: Path, dest: Path, target_for: TargetFor) -> int:
+    """Renombrar lo extraído en tmp (dentro de dest) a la ruta elegida para cada miembro"""
+    count = 0
+    real_dest = os.path.realpath(dest)
+    for dirpath, dirnames, filenames in os.walk(tmp):
+        for name in filenames + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]:
+            source = os.path.join(dirpath, name)
+            rel = os.path.relpath(source, tmp).replace(os.sep, "/")
+            target = _write_target(rel, dest, target_for, real_dest)
+            if target is None:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+            count += 1
+    return count
+
+# ----- zip -----
+
+def _zip_members(path: Path) -> List[ArchiveMember]:
+    with zipfile.ZipFile(path) as zf:
+        return [ArchiveMember(info.filename, info.is_dir(), info.file_size, info.compress_size)
+                for info in zf.infolist()]
+
+def _zip_extract(path: Path, dest: Path, target_for: TargetFor, workers: Optional[int], budget: ByteBudget) -> int:
+    # Además de la comprobación previa con file_size, lo escrito pasa por el presupuesto
+    return extract_zip(path, dest, workers, target_for, budget.take)
+
+# ----- tar (sin comprimir, gz, xz, bz2, zst) -----
+
+def _zstd_open(path: Path):
+    """Abrir un flujo zstd con el backend disponible"""
+    zstandard = _optional_module("zstandard")
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    zstd = _optional_module("compression.zstd")
+    if zstd is not None:
+        return zstd.open(path, "rb")
+    raise UnsupportedArchiveError("Instala 'zstandard' o 'libarchive-c' para abrir archivos .tar.zst")
+
+_TAR_OPENERS = {
+    "tar": lambda path: open(path, "rb"),
+    "tar.gz": lambda path: gzip.open(path, "rb"),
+    "tar.xz": lambda path: lzma.open(path, "rb"),
+    "tar.bz2": lambda path: bz2.open(path, "rb"),
+    "tar.zst": _zstd_open,
+}
+
+def _zstd_python_available() -> bool:
+    return _optional_module("zstandard") is not None or _optional_module("compression.zstd") is not None
+
+def _tar_members(codec: str):
+    def list_tar(path: Path) -> List[ArchiveMember]:
+        if codec == "tar.zst" and not _zstd_python_available():
+            return _libarchive_members(path)
+        # Modo flujo: cabeceras en orden, el contenido se descomprime y se descarta
+        with _TAR_OPENERS[codec](path) as stream, tarfile.open(fileobj=stream, mode="r|") as tf:
+            return [ArchiveMember(member.name, member.isdir(), member.size if member.isfile() else 0)
+                    for member in tf]
+    return list_tar
+
+def _tar_extract(codec: str):
+    def extract_tar(path: Path, dest: Path, target_for: TargetFor, workers: Optional[int], budget: ByteBudget) -> int:
+        if codec == "tar.zst" and not _zstd_python_available():
+            return _libarchive_extract(path, dest, target_for, workers, budget)
+        count = 0
+        real_dest = os.path.realpath(dest)
+        with _TAR_OPENERS[codec](path) as stream, tarfile.open(fileobj=stream, mode="r|") as tf:
+            for member in tf:
+                # Se comprueba al escribir cada miembro: los enlaces anteriores ya existen
+                target = _write_target(member.name, dest, target_for, real_dest)
+                if target is None:
+                    continue
+                if member.isfile():
+                    # Contenido por el escritor limitado, sin fiarse del tamaño de la cabecera
+                    _write_stream(target, _read_chunks(tf.extractfile(member)), budget, member.mode)
+                    count += 1
+                    continue
+                if member.issym():
+                    _safe_symlink(member.linkname, target, real_dest)
+                    continue
+                if not member.isdir() and not member.islnk():
+                    continue
+                if member.islnk():
+                    link_target = _write_target(member.linkname, dest, target_for, real_dest)
+                    if link_target is None:
+                        continue
+                    member.linkname = os.path.relpath(link_target, dest)
+                member.name = os.path.relpath(target, dest)
+                tf.extract(member, dest, **TAR_EXTRACT_ARGS)
+        return count
+    return extract_tar
+
+# ----- libarchive (7z, rar y zst sin otro backend) -----
+
+def _libarchive_members(path: Path) -> List[ArchiveMember]:
+    libarchive = _optional_module("libarchive")
+    if libarchive is None:
+        raise UnsupportedArchiveError(f"Instala 'libarchive-c' para abrir {path.name}")
+    with libarchive.file_reader(str(path)) as archive:
+        return [ArchiveMember(entry.pathname, entry.isdir, entry.size or 0) for entry in archive]
+
+def _libarchive_extract(path: Path, dest: Path, target_for: TargetFor, workers: Optional[int], budget: ByteBudget) -> int:
+    libarchive = _optional_module("libarchive")
+    if libarchive is None:
+        raise UnsupportedArchiveError(f"Instala 'libarchive-c' para abrir {path.name}")
+    count = 0
+    real_dest = os.path.realpath(dest)
+    with libarchive.file_reader(str(path)) as archive:
+        for entry in archive:
+            target = _write_target(entry.pathname, dest, target_for, real_dest)
+            if target is None:
+                continue
+            if entry.isdir:
+                target.mkdir(parents=True, exist_ok=True)
+            elif entry.issym:
+                _safe_symlink(entry.linkpath, target, real_dest)
+            elif entry.isfile:
+                _write_stream(target, entry.get_blocks(), budget, entry.perm)
+                count += 1
+    return count
+
+# ----- 7z -----
+
+def _7z_members(path: Path) -> List[ArchiveMember]:
+    if _optional_module("libarchive") is not None:
+        return _libarchive_members(path)
+    py7zr = _optional_module("py7zr")
+    if py7zr is None:
+        raise UnsupportedArchiveError("Instala 'libarchive-c' o 'py7zr' para abrir archivos .7z")
+    with py7zr.SevenZipFile(path, "r") as archive:
+        return [ArchiveMember(info.filename, info.is_directory, info.uncompressed or 0, info.compressed or 0)
+                for info in archive.list()]
+
+def _7z_extract(path: Path, dest: Path, target_for: TargetFor, workers: Optional[int], budget: ByteBudget) -> int:
+    if _optional_module("libarchive") is not None:
+        return _libarchive_extract(path, dest, target_for, workers, budget)
+    py7zr = _optional_module("py7zr")
+    if py7zr is None:
+        raise UnsupportedArchiveError("Instala 'libarchive-c' o 'py7zr' para abrir archivos .7z")
+    # py7zr escribe por su cuenta: el límite se aplica con los tamaños de los metadatos
+    wanted = [m for m in _7z_members(path) if not m.is_dir and _resolve_target(m.name, dest, target_for) is not None]
+    if not wanted:
+        return 0
+    # py7zr no permite renombrar al extraer: se extrae junto al destino y se renombra
+    dest.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".extract-", dir=dest))
+    try:
+        with py7zr.SevenZipFile(path, "r") as archive:
+            budget.take(sum(m.size for m in wanted))
+            archive.extract(path=tmp, targets=[m.name for m in wanted])
+        return _move_extracted(tmp, dest, target_for)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+# ----- rar -----
+
+def _rar_members(path: Path) -> List[ArchiveMember]:
+    if _optional_module("libarchive") is not None:
+        return _libarchive_members(path)
+    rarfile = _optional_module("rarfile")
+    if rarfile is None:
+        raise UnsupportedArchiveError("Instala 'libarchive-c' o 'rarfile' para abrir archivos .rar")
+    with rarfile.RarFile(path) as archive:
+        return [ArchiveMember(info.filename, info.is_dir(), info.file_size, info.compress_size)
+                for info in archive.infolist()]
+
+def _rar_extract(path: Path, dest: Path, target_for: TargetFor, workers: Optional[int], budget: ByteBudget) -> int:
+    if _optional_module("libarchive") is not None:
+        return _libarchive_extract(path, dest, target_for, workers, budget)
+    rarfile = _optional_module("rarfile")
+    if rarfile is None:
+        raise UnsupportedArchiveError("Instala 'libarchive-c' o 'rarfile' para abrir archivos .rar")
+    count = 0
+    real_dest = os.path.realpath(dest)
+    with rarfile.RarFile(path) as archive:
+        for info in archive.infolist():
+            target = _write_target(info.filename, dest, target_for, real_dest)
+            if target is None:
+                continue
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+            elif info.is_symlink():
+                _safe_symlink(archive.read(info).decode("utf-8", "surrogateescape"), target, real_dest)
+            else:
+                with archive.open(info) as src:
+                    _write_stream(target, _read_chunks(src), budget)
+                count += 1
+    return count
+
+def _has_7z_backend() -> bool:
+    return _optional_module("libarchive") is not None or _optional_module("py7zr") is not None
+
+def _has_rar_backend() -> bool:
+    return _optional_module("libarchive") is not None or _optional_module("rarfile") is not None
+
+def _has_zst_backend() -> bool:
+    return _zstd_python_available() or _optional_module("libarchive") is not None
+
+# ----- Registro de formatos incluidos -----
+
+register_format(ArchiveFormat(
+    "zip", (".zip",),
+    lambda head: head[:4] in (b"PK\x03\x04", b"PK\x05\x06", b"PK\x07\x08"),
+    _zip_members, _zip_extract
+))
+register_format(ArchiveFormat(
+    "tar.gz", (".tar.gz", ".tgz"), lambda head: head.startswith(b"\x1f\x8b"),
+    _tar_members("tar.gz"), _tar_extract("tar.gz")
+))
+register_format(ArchiveFormat(
+    "tar.xz", (".tar.xz", ".txz"), lambda head: head.startswith(b"\xfd7zXZ\x00"),
+    _tar_members("tar.xz"), _tar_extract("tar.xz")
+))
+register_format(ArchiveFormat(
+    "tar.bz2", (".tar.bz2", ".tbz2"), lambda head: head.startswith(b"BZh"),
+    _tar_members("tar.bz2"), _tar_extract("tar.bz2")
+))
+register_format(ArchiveFormat(
+    "tar.zst", (".tar.zst", ".tzst"), lambda head: head.startswith(b"\x28\xb5\x2f\xfd"),
+    _tar_members("tar.zst"), _tar_extract("tar.zst"), _has_zst_backend
+))
+register_format(ArchiveFormat(
+    "tar", (".tar",), lambda head: head[257:262] == b"ustar",
+    _tar_members("tar"), _tar_extract("tar")
+))
+register_format(ArchiveFormat(
+    "7z", (".7z",), lambda head: head.startswith(b"7z\xbc\xaf\x27\x1c"),
+    _7z_members, _7z_extract, _has_7z_backend
+))
+register_format(ArchiveFormat(
+    "rar", (".rar",), lambda head: head.startswith(b"Rar!\x1a\x07"),
+    _rar_members, _rar_extract, _has_rar_backend
+))
@@ -0,0 +1,165 @@
+"""
+Deduplication for GNOME Theme Loader
+Content-addressed dedup of installed themes: candidate files are grouped by
+size, filtered by a hash of their first bytes and confirmed with a full hash
+(in parallel); identical files are then replaced by reflinks (btrfs/xfs) or
+hardlinks
+"""
+
+import errno
+import fcntl
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .extractor import DEFAULT_WORKERS, COPY_BUFFER
+
+# Deduplicar al instalar (desactivado por defecto; GNOME_THEME_LOADER_DEDUP=1 lo activa)
+DEDUP_ON_INSTALL = os.environ.get("GNOME_THEME_LOADER_DEDUP", "") not in ("", "0")
+# Bytes del hash parcial que descarta la mayoría de candidatos sin leer el archivo entero
+PARTIAL_SIZE = 4096
+HASH_SIZE = 16
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int)): el destino comparte los bloques del origen
+FICLONE = 0x40049409
+DEDUP_MODES = ("auto", "reflink", "hardlink")
+
+class DedupResult(NamedTuple):
+    """Resultado de una pasada de deduplicación"""
+    groups: int
+    files: int
+    bytes_saved: int
+
+class _Candidate(NamedTuple):
+    path: str
+    size: int
+    dev: int
+    ino: int
+    mode: int
+    uid: int
+
+def _hash(path: str, limit: Optional[int] = None) -> bytes:
+    digest = hashlib.blake2b(digest_size=HASH_SIZE)
+    with open(path, "rb") as f:
+        if limit is not None:
+            digest.update(f.read(limit))
+        else:
+            while True:
+                chunk = f.read(COPY_BUFFER)
+                if not chunk:
+                    break
+                digest.update(chunk)
+    return digest.digest()
+
+def _walk_files(roots: Iterable[Path]) -> List[_Candidate]:
+    files = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            # No entrar en directorios de staging ni de papelera
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.lstat(full)
+                except OSError:
+                    continue
+                if st.st_size and os.path.isfile(full) and not os.path.islink(full):
+                    files.append(_Candidate(full, st.st_size, st.st_dev, st.st_ino, st.st_mode, st.st_uid))
+    return files
+
+def _refine(groups: List[List[_Candidate]], pool: ThreadPoolExecutor, limit: Optional[int]) -> List[List[_Candidate]]:
+    """Partir cada grupo por el hash (parcial o completo) de sus archivos"""
+    # Un inodo se lee una sola vez aunque tenga varios enlaces
+    unique = {(c.dev, c.ino): c.path for group in groups for c in group}
+    keys = list(unique)
+    digests = dict(zip(keys, pool.map(lambda key: _hash(unique[key], limit), keys)))
+    refined = []
+    for group in groups:
+        by_hash: Dict[bytes, List[_Candidate]] = defaultdict(list)
+        for candidate in group:
+            by_hash[digests[(candidate.dev, candidate.ino)]].append(candidate)
+        refined.extend(g for g in by_hash.values() if len({(c.dev, c.ino) for c in g}) > 1)
+    return refined
+
+def find_duplicates(roots: Iterable[Path], only_under: Optional[Iterable[Path]] = None,
+                    workers: Optional[int] = None) -> List[List[_Candidate]]:
+    """Grupos de archivos idénticos (mismo sistema de archivos, modo y dueño)
+
+    Con only_under solo se devuelven los grupos que contienen algún archivo
+    dentro de esas rutas (p. ej. los temas recién instalados).
+    """
+    files = _walk_files(roots)
+    prefixes = tuple(os.path.join(os.path.abspath(p), "") for p in only_under) if only_under is not None else None
+
+    by_size: Dict[Tuple, List[_Candidate]] = defaultdict(list)
+    for candidate in files:
+        # Los enlaces duros comparten modo y dueño: solo se agrupa lo que puede enlazarse sin cambiarlos
+        by_size[(candidate.size, candidate.dev, candidate.mode, candidate.uid)].append(candidate)
+    groups = [g for g in by_size.values() if len({(c.dev, c.ino) for c in g}) > 1]
+    if prefixes is not None:
+        groups = [g for g in groups if any(c.path.startswith(prefixes) for c in g)]
+    if not groups:
+        return []
+
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS, thread_name_prefix="dedup") as pool:
+        # Hash parcial primero; el completo solo si el archivo es más grande que lo ya leído
+        groups = _refine(groups, pool, PARTIAL_SIZE)
+        small = [g for g in groups if g[0].size <= PARTIAL_SIZE]
+        large = [g for g in groups if g[0].size > PARTIAL_SIZE]
+        return small + _refine(large, pool, None)
+
+def _reflink(source: str, target: str):
+    """Crear target como copia reflink de source (OSError si el sistema de archivos no lo permite)"""
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+def _replace_with(source: str, duplicate: str, mode: str) -> str:
+    """Sustituir duplicate por un reflink o un enlace duro a source de forma atómica; devuelve el método usado"""
+    tmp = os.path.join(os.path.dirname(duplicate), f".dedup-{os.getpid()}-{os.path.basename(duplicate)}")
+    if mode in ("auto", "reflink"):
+        try:
+            _reflink(source, tmp)
+            st = os.stat(duplicate)
+            os.chmod(tmp, st.st_mode & 0o7777)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(tmp, duplicate)
+            return "reflink"
+        except OSError as e:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            if mode == "reflink" or e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL):
+                raise
+    os.link(source, tmp)
+    os.replace(tmp, duplicate)
+    return "hardlink"
+
+def dedup(roots: Iterable[Path], only_under: Optional[Iterable[Path]] = None, mode: str = "auto",
+          dry_run: bool = False, workers: Optional[int] = None) -> DedupResult:
+    """Deduplicar los archivos idénticos de roots (reflink si se puede, si no enlace duro)"""
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Modo de deduplicación desconocido: {mode}")
+    groups = find_duplicates([Path(r) for r in roots if Path(r).is_dir()], only_under, workers)
+    linked = 0
+    saved = 0
+    for group in groups:
+        # El primero de cada inodo es el original; el resto pasa a compartir sus datos
+        group = sorted(group, key=lambda c: c.path)
+        source = group[0]
+        seen = {(source.dev, source.ino)}
+        for candidate in group[1:]:
+            if (candidate.dev, candidate.ino) == (source.dev, source.ino):
+                continue
+            # Otro enlace de un inodo ya contado: se enlaza, pero no libera espacio de nuevo
+            first_link = (candidate.dev, candidate.ino) not in seen
+            seen.add((candidate.dev, candidate.ino))
+            if not dry_run:
+                try:
+                    _replace_with(source.path, candidate.path, mode)
+                except OSError as e:
+                    print(f"No se pudo deduplicar {candidate.path}: {e}")
+                    continue
+            linked += 1
+            saved += candidate.size if first_link else 0
+    return DedupResult(len(groups), linked, saved)
@@ -0,0 +1,168 @@
+"""
+Extractor for GNOME Theme Loader
+Zip extraction with directories created up front and symlinks/permissions
+restored; members can optionally be sharded across a thread pool (zlib
+releases the GIL)
+"""
+
+import os
+import shutil
+import stat
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+def _env_workers(name: str, default: int) -> int:
+    """Número de hilos de una variable de entorno; default si falta o no es un entero positivo"""
+    try:
+        value = int(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+# Hilos para calcular hashes (dedup, manifiesto)
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+# Hilos de extracción: en serie salvo que se pida con GNOME_THEME_LOADER_EXTRACT_WORKERS.
+# En bench_extract.py los hilos no mejoran a zipfile.extractall: el coste está en
+# abrir y crear archivos, no en descomprimir
+EXTRACT_WORKERS = _env_workers("GNOME_THEME_LOADER_EXTRACT_WORKERS", 1)
+# Por debajo de este número de archivos no compensa arrancar hilos
+PARALLEL_THRESHOLD = 64
+COPY_BUFFER = 1024 * 1024
+
+def safe_relative_parts(name: str) -> Optional[List[str]]:
+    """Componentes de una ruta de miembro, o None si intenta salir del destino"""
+    parts = [p for p in name.replace("\\", "/").split("/") if p and p != "."]
+    if not parts or ".." in parts:
+        return None
+    return parts
+
+def _unix_mode(info: zipfile.ZipInfo) -> int:
+    """Modo Unix guardado en el miembro (0 si el zip no se creó en Unix)"""
+    return info.external_attr >> 16 if info.create_system == 3 else 0
+
+def _is_within(path: str, root: str) -> bool:
+    return os.path.commonpath([path, root]) == root
+
+def real_parent_within(target: Path, real_root: str) -> bool:
+    """Comprobar que el directorio de target, resolviendo los enlaces ya creados, está dentro de real_root"""
+    return _is_within(os.path.realpath(target.parent), real_root)
+
+def safe_link_target(link_target: str, target: Path, real_root: str) -> bool:
+    """Comprobar que un enlace relativo creado en target apunta dentro de real_root.
+
+    La comprobación resuelve los enlaces ya extraídos: una cadena como
+    x/a -> .. seguida de x/a/b -> .. no puede subir por encima de la raíz.
+    """
+    if os.path.isabs(link_target):
+        return False
+    parent = os.path.realpath(target.parent)
+    return _is_within(parent, real_root) and _is_within(os.path.realpath(os.path.join(parent, link_target)), real_root)
+
+def extract_zip(archive_path: Path, dest: Path, workers: Optional[int] = None,
+                target_for: Optional[Callable[[str], Optional[Path]]] = None,
+                take_bytes: Optional[Callable[[int], None]] = None) -> int:
+    """Extraer un zip en dest (repartiendo los archivos entre hilos si workers > 1)
+
+    target_for(nombre) permite elegir (o descartar con None) la ruta de cada
+    miembro; debe quedar dentro de dest. take_bytes(n) se llama antes de escribir
+    cada bloque y puede cortar la extracción lanzando una excepción. Devuelve el
+    número de archivos escritos.
+    """
+    dest = Path(dest)
+    root = os.path.abspath(dest)
+    workers = workers or EXTRACT_WORKERS
+
+    files: List[Tuple[zipfile.ZipInfo, Path]] = []
+    links: List[Tuple[zipfile.ZipInfo, Path]] = []
+    dirs: Dict[Path, int] = {dest: 0}
+
+    with zipfile.ZipFile(archive_path) as zf:
+        for info in zf.infolist():
+            if target_for is not None:
+                target = target_for(info.filename)
+            else:
+                parts = safe_relative_parts(info.filename)
+                target = dest.joinpath(*parts) if parts else None
+            # Comprobación léxica: los enlaces se crean al final, no pueden desviar rutas
+            if target is None or not _is_within(os.path.abspath(target), root):
+                continue
+            mode = _unix_mode(info)
+            if info.is_dir():
+                dirs[target] = mode
+                continue
+            parent = target.parent
+            while parent not in dirs:
+                dirs[parent] = 0
+                parent = parent.parent
+            if stat.S_ISLNK(mode):
+                links.append((info, target))
+            else:
+                files.append((info, target))
+
+        # Una sola pasada de creación de directorios, de menos a más profundo
+        for directory in sorted(dirs, key=lambda d: len(d.parts)):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        if workers > 1 and len(files) >= PARALLEL_THRESHOLD:
+            shards = _shard(files, workers)
+            with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="extract") as pool:
+                # Cada hilo abre su propio ZipFile: los objetos ZipFile no son seguros entre hilos
+                list(pool.map(lambda shard: _extract_shard(archive_path, shard, take_bytes), shards))
+        else:
+            _extract_members(zf, files, take_bytes)
+
+        # Los enlaces se comprueban resolviendo los ya creados (x/a -> .. y luego x/a/b -> ..)
+        real_root = os.path.realpath(dest)
+        for info, target in links:
+            link_target = zf.read(info).decode("utf-8", "surrogateescape")
+            if not safe_link_target(link_target, target, real_root):
+                continue
+            if target.is_symlink():
+                target.unlink()
+            elif target.exists():
+                # Un directorio o archivo del zip con el mismo nombre: se conserva
+                continue
+            os.symlink(link_target, target)
+
+    # Permisos de directorios al final, por si alguno no es escribible
+    for directory, mode in sorted(dirs.items(), key=lambda d: -len(d[0].parts)):
+        if mode & 0o777:
+            os.chmod(directory, (mode & 0o777) | 0o700)
+    return len(files)
+
+def _shard(files: List[Tuple[zipfile.ZipInfo, Path]], count: int) -> List[List[Tuple[zipfile.ZipInfo, Path]]]:
+    """Repartir los miembros entre hilos equilibrando el tamaño comprimido"""
+    shards: List[List[Tuple[zipfile.ZipInfo, Path]]] = [[] for _ in range(count)]
+    loads = [0] * count
+    for item in sorted(files, key=lambda item: item[0].compress_size, reverse=True):
+        i = loads.index(min(loads))
+        shards[i].append(item)
+        loads[i] += item[0].compress_size + 512
+    # Dentro de cada hilo, leer en el orden del archivo para no saltar por el disco
+    return [sorted(shard, key=lambda item: item[0].header_offset) for shard in shards if shard]
+
+def _extract_shard(archive_path: Path, shard: List[Tuple[zipfile.ZipInfo, Path]],
+                   take_bytes: Optional[Callable[[int], None]]):
+    with zipfile.ZipFile(archive_path) as zf:
+        _extract_members(zf, shard, take_bytes)
+
+def _extract_members(zf: zipfile.ZipFile, members: List[Tuple[zipfile.ZipInfo, Path]],
+                     take_bytes: Optional[Callable[[int], None]] = None):
+    for info, target in members:
+        if target.is_symlink():
+            target.unlink()
+        with zf.open(info) as src, open(target, "wb") as dst:
+            if take_bytes is None:
+                shutil.copyfileobj(src, dst, COPY_BUFFER)
+            else:
+                while True:
+                    chunk = src.read(COPY_BUFFER)
+                    if not chunk:
+                        break
+                    take_bytes(len(chunk))
+                    dst.write(chunk)
+        mode = _unix_mode(info) & 0o777
+        if mode:
+            os.chmod(target, mode)
@@ -2,10 +2,11 @@ import os
 import subprocess
 from pathlib import Path
 import tempfile
-import tarfile
-import zipfile
 import re
 import shutil
+from typing import Optional
+
+from .archive_formats import sniff_format, extract_archive
 
 GRUB_THEMES_DIR = Path("/boot/grub/themes")
 GRUB_CONFIG = Path("/etc/default/grub")
@@ -39,21 +40,11 @@ def run_pkexec(cmd):
     return False, error_msg.strip()
 
 def detect_archive_type(archive_path: Path):
-    """Detectar tipo de archivo comprimido de forma más robusta"""
-    suffixes = archive_path.suffixes
-    name_lower = archive_path.name.lower()
-    
-    # ZIP
-    if archive_path.suffix.lower() == ".zip":
-        return "zip"
-    
-    # TAR variants
-    if (name_lower.endswith(".tar.gz") or name_lower.endswith(".tgz") or
-        name_lower.endswith(".tar.xz") or name_lower.endswith(".tar.bz2") or
-        name_lower.endswith(".tar")):
-        return "tar"
-    
-    return None
+    """Detectar el formato de un archivo comprimido por su firma (None si no está soportado)"""
+    archive_format = sniff_format(archive_path)
+    if archive_format is None or not archive_format.is_available():
+        return None
+    return archive_format.name
 
 def find_theme_directory(base_path: Path):
     """Buscar directorio que contenga theme.txt de forma más inteligente"""
@@ -91,7 +82,7 @@ def get_update_grub_cmd():
     else:
         return None
 
-def install_grub_theme(archive_path: Path, theme_name: str):
+def install_grub_theme(archive_path: Path, theme_name: str, workers: Optional[int] = None):
     """Instalar un tema GRUB desde un archivo comprimido"""
     if not archive_path.exists():
         return False, "El archivo no existe"
@@ -104,13 +95,7 @@ def install_grub_theme(archive_path: Path, theme_name: str):
         with tempfile.TemporaryDirectory() as td:
             tmp = Path(td)
             
-            # Descomprimir según el tipo
-            if archive_type == "zip":
-                with zipfile.ZipFile(archive_path) as zf:
-                    zf.extractall(tmp)
-            elif archive_type == "tar":
-                with tarfile.open(archive_path) as tf:
-                    tf.extractall(tmp)
+            extract_archive(archive_path, tmp, workers=workers)
             
             # Buscar carpeta con theme.txt
             theme_dir = find_theme_directory(tmp)
@@ -135,6 +120,19 @@ def install_grub_theme(archive_path: Path, theme_name: str):
     except Exception as e:
         return False, f"Error durante la instalación: {str(e)}"
 
+def get_current_grub_theme() -> Optional[str]:
+    """Tema GRUB configurado en GRUB_THEME (None si no hay o no se puede leer)"""
+    try:
+        content = GRUB_CONFIG.read_text(errors="replace")
+    except OSError:
+        return None
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith("GRUB_THEME="):
+            theme_path = Path(line.split("=", 1)[1].strip().strip('"').strip("'"))
+            return theme_path.parent.name or None
+    return None
+
 def apply_grub_theme(theme_name: str):
     """Aplicar un tema GRUB (modifica config y ejecuta update-grub)"""
     try:
@@ -1,37 +1,174 @@
+"""
+GSettings for GNOME Theme Loader
+Writes theme keys in-process through Gio.Settings, batching the keys of each
+schema in one delay()/apply() transaction; falls back to the gsettings command
+only when gi or a schema (e.g. the user-theme extension) is not available
+"""
+
+import os
 import subprocess
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-def set_gtk_theme(theme_name: str) -> bool:
+INTERFACE_SCHEMA = "org.gnome.desktop.interface"
+USER_THEME_SCHEMA = "org.gnome.shell.extensions.user-theme"
+USER_THEME_UUID = "user-theme@gnome-shell-extensions.gcampax.github.com"
+
+# Tipo de tema -> (esquema, clave)
+THEME_KEYS = {
+    "gtk": (INTERFACE_SCHEMA, "gtk-theme"),
+    "shell": (USER_THEME_SCHEMA, "name"),
+    "icons": (INTERFACE_SCHEMA, "icon-theme"),
+    "cursor": (INTERFACE_SCHEMA, "cursor-theme"),
+}
+
+# Esquemas compilados de la extensión user-theme cuando se instala fuera del sistema
+EXTENSION_SCHEMA_DIRS = [
+    Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "gnome-shell" / "extensions" / USER_THEME_UUID / "schemas",
+    Path("/usr/share/gnome-shell/extensions") / USER_THEME_UUID / "schemas",
+]
+
+_gio = None
+# Una transacción a la vez (se aplica desde el hilo de la interfaz y desde el pool de operaciones)
+_lock = threading.Lock()
+
+def _load_gio():
+    """Gio de PyGObject, importado al primer uso; None si gi no está instalado"""
+    global _gio
+    if _gio is None:
+        try:
+            from gi.repository import Gio
+            _gio = Gio
+        except (ImportError, ValueError):
+            _gio = False
+    return _gio or None
+
+def _extension_schema_dir(schema_id: str) -> Optional[Path]:
+    if schema_id != USER_THEME_SCHEMA:
+        return None
+    return next((d for d in EXTENSION_SCHEMA_DIRS if (d / "gschemas.compiled").exists()), None)
+
+def _lookup_schema(Gio, schema_id: str):
+    source = Gio.SettingsSchemaSource.get_default()
+    schema = source.lookup(schema_id, True) if source else None
+    schema_dir = _extension_schema_dir(schema_id)
+    if schema is None and schema_dir:
+        try:
+            schema = Gio.SettingsSchemaSource.new_from_directory(str(schema_dir), source, False).lookup(schema_id, False)
+        except Exception:
+            schema = None
+    return schema
+
+def new_settings(schema_id: str):
+    """Nuevo Gio.Settings para un esquema; None si gi o el esquema no están instalados"""
+    Gio = _load_gio()
+    if Gio is None:
+        return None
+    schema = _lookup_schema(Gio, schema_id)
+    return Gio.Settings.new_full(schema, None, None) if schema is not None else None
+
+def _delayed_settings(schema_id: str):
+    """Gio.Settings nuevo en modo diferido (delay) para un esquema; None si no está instalado
+
+    Se crea uno por transacción en el hilo que escribe: Gio.Settings no es
+    seguro entre hilos, así que no se comparte con otros hilos.
+    """
+    settings = new_settings(schema_id)
+    if settings is not None:
+        # Los cambios se acumulan hasta apply(): una sola escritura por transacción
+        settings.delay()
+    return settings
+
+def _get_with_subprocess(schema_id: str, key: str) -> Optional[str]:
+    cmd = ["gsettings"]
+    schema_dir = _extension_schema_dir(schema_id)
+    if schema_dir:
+        cmd += ["--schemadir", str(schema_dir)]
     try:
-        subprocess.run([
-            "gsettings", "set", "org.gnome.desktop.interface", "gtk-theme", theme_name
-        ], check=True)
-        return True
+        result = subprocess.run(cmd + ["get", schema_id, key], capture_output=True, text=True, check=True)
     except Exception:
-        return False
+        return None
+    value = result.stdout.strip()
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == "'" else value
 
-def set_shell_theme(theme_name: str) -> bool:
+def get_themes() -> Dict[str, Optional[str]]:
+    """Temas configurados ahora mismo: tipo -> nombre (None si no se puede leer)"""
+    themes = {}
+    settings_by_schema = {}
+    for kind, (schema_id, key) in THEME_KEYS.items():
+        if schema_id not in settings_by_schema:
+            settings_by_schema[schema_id] = new_settings(schema_id)
+        settings = settings_by_schema[schema_id]
+        if settings is not None and settings.props.settings_schema.has_key(key):
+            themes[kind] = settings.get_string(key)
+        else:
+            themes[kind] = _get_with_subprocess(schema_id, key)
+    return themes
+
+def _set_with_subprocess(schema_id: str, key: str, value: str) -> bool:
+    cmd = ["gsettings"]
+    schema_dir = _extension_schema_dir(schema_id)
+    if schema_dir:
+        cmd += ["--schemadir", str(schema_dir)]
     try:
-        subprocess.run([
-            "gsettings", "set", "org.gnome.shell.extensions.user-theme", "name", theme_name
-        ], check=True)
+        subprocess.run(cmd + ["set", schema_id, key, value], check=True)
         return True
     except Exception:
         return False
 
+def settings_backend() -> str:
+    """Backend usado para escribir: "gio" (en proceso) o "subprocess" (comando gsettings)"""
+    return "gio" if _load_gio() else "subprocess"
+
+def set_themes(themes: Dict[str, str]) -> Dict[str, bool]:
+    """Aplicar varios temas de una vez: tipo -> nombre, devuelve tipo -> éxito.
+
+    Las claves de un mismo esquema se escriben en una transacción
+    (delay/apply): o se aplican todas o ninguna, con una sola escritura y un
+    solo cambio de estilo del escritorio. Los esquemas que Gio no encuentra
+    se escriben con el comando gsettings.
+    """
+    results = {}
+    by_schema: Dict[str, List[Tuple[str, str, str]]] = defaultdict(list)
+    for kind, name in themes.items():
+        if kind not in THEME_KEYS:
+            results[kind] = False
+            continue
+        schema_id, key = THEME_KEYS[kind]
+        by_schema[schema_id].append((kind, key, name))
+
+    with _lock:
+        applied = False
+        for schema_id, entries in by_schema.items():
+            settings = _delayed_settings(schema_id)
+            if settings is None or not all(settings.props.settings_schema.has_key(key) for _, key, _ in entries):
+                for kind, key, name in entries:
+                    results[kind] = _set_with_subprocess(schema_id, key, name)
+                continue
+            # set_string devuelve False si la clave no se puede escribir (bloqueada por el administrador)
+            ok = all(settings.set_string(key, name) for _, key, name in entries)
+            if ok:
+                settings.apply()
+                applied = True
+            else:
+                settings.revert()
+            for kind, _, _ in entries:
+                results[kind] = ok
+        if applied:
+            # Esperar a que dconf reciba la escritura, como al salir del comando gsettings
+            _load_gio().Settings.sync()
+    return results
+
+def set_gtk_theme(theme_name: str) -> bool:
+    return set_themes({"gtk": theme_name})["gtk"]
+
+def set_shell_theme(theme_name: str) -> bool:
+    return set_themes({"shell": theme_name})["shell"]
+
 def set_icon_theme(theme_name: str) -> bool:
-    try:
-        subprocess.run([
-            "gsettings", "set", "org.gnome.desktop.interface", "icon-theme", theme_name
-        ], check=True)
-        return True
-    except Exception:
-        return False
+    return set_themes({"icons": theme_name})["icons"]
 
 def set_cursor_theme(theme_name: str) -> bool:
-    try:
-        subprocess.run([
-            "gsettings", "set", "org.gnome.desktop.interface", "cursor-theme", theme_name
-        ], check=True)
-        return True
-    except Exception:
-        return False 
\ No newline at end of file
+    return set_themes({"cursor": theme_name})["cursor"]
@@ -0,0 +1,145 @@
+"""
+index.theme parser for GNOME Theme Loader
+Lightweight freedesktop key-file parser with a process-wide memoized cache
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# Secciones de cabecera de los index.theme de iconos, cursores y temas GTK
+HEADER_SECTIONS = ("Icon Theme", "Desktop Entry", "X-GNOME-Metatheme")
+
+_ESCAPES = {"s": " ", "n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+
+_cache: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[int, int, Dict[str, Dict[str, str]]]] = {}
+_cache_lock = threading.Lock()
+
+def _unescape(value: str) -> str:
+    """Decodificar las secuencias de escape de un valor (\\s, \\n, \\t, \\r, \\\\)"""
+    if "\\" not in value:
+        return value
+    result = []
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char == "\\" and i + 1 < len(value):
+            result.append(_ESCAPES.get(value[i + 1], "\\" + value[i + 1]))
+            i += 2
+        else:
+            result.append(char)
+            i += 1
+    return "".join(result)
+
+def parse_key_file(lines: Iterable[str], sections: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+    """Parsear un key-file freedesktop
+
+    Con sections solo se guardan esas secciones y el parseo termina en la primera
+    sección no pedida que aparezca después de una pedida, de modo que no se leen
+    los cientos de secciones de directorios de un tema de iconos grande. Las
+    claves localizadas (Name[es]) se conservan tal cual.
+    """
+    wanted = set(sections) if sections is not None else None
+    result: Dict[str, Dict[str, str]] = {}
+    current: Optional[Dict[str, str]] = None
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            name = line[1:-1]
+            if wanted is None or name in wanted:
+                current = result.setdefault(name, {})
+            elif result:
+                break
+            else:
+                current = None
+            continue
+        if current is None or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        current[key.strip()] = _unescape(value.strip())
+
+    return result
+
+def read_index_theme(path, sections: Optional[Iterable[str]] = HEADER_SECTIONS) -> Optional[Dict[str, Dict[str, str]]]:
+    """Leer un index.theme (o el index.theme de un directorio), parseando cada archivo una vez por cambio
+
+    La caché es de todo el proceso y se indexa por (ruta, mtime, tamaño). El
+    diccionario devuelto es compartido: no debe modificarse.
+    """
+    path = Path(path)
+    if path.name != "index.theme":
+        path = path / "index.theme"
+    sections_key = tuple(sections) if sections is not None else None
+    key = (str(path), sections_key)
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            parsed = parse_key_file(f, sections_key)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        _cache[key] = (st.st_mtime_ns, st.st_size, parsed)
+    return parsed
+
+def clear_cache():
+    """Vaciar la caché de index.theme"""
+    with _cache_lock:
+        _cache.clear()
+
+def _locale_candidates() -> Tuple[str, ...]:
+    """Variantes del locale actual en orden de preferencia (es_ES@x, es_ES, es@x, es)"""
+    for var in ("LC_ALL", "LC_MESSAGES", "LANG"):
+        value = os.environ.get(var)
+        if value:
+            break
+    else:
+        return ()
+    lang, _, modifier = value.partition("@")
+    lang = lang.split(".", 1)[0]
+    if lang in ("C", "POSIX"):
+        return ()
+    base, _, country = lang.partition("_")
+    candidates = []
+    if country and modifier:
+        candidates.append(f"{base}_{country}@{modifier}")
+    if country:
+        candidates.append(f"{base}_{country}")
+    if modifier:
+        candidates.append(f"{base}@{modifier}")
+    candidates.append(base)
+    return tuple(candidates)
+
+def get_localized(section: Dict[str, str], key: str) -> Optional[str]:
+    """Obtener el valor localizado de una clave (Key[locale]) con caída a la clave sin localizar"""
+    for locale in _locale_candidates():
+        value = section.get(f"{key}[{locale}]")
+        if value:
+            return value
+    return section.get(key)
+
+def get_theme_comment(theme_path) -> Optional[str]:
+    """Obtener el comentario (localizado) de un tema desde su index.theme"""
+    data = read_index_theme(theme_path)
+    if not data:
+        return None
+    for section in HEADER_SECTIONS:
+        if section in data:
+            comment = get_localized(data[section], "Comment")
+            if comment:
+                return comment
+    return None
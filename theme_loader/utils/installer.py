@@ -1,44 +1,193 @@
-import tempfile, tarfile, zipfile, shutil
-from pathlib import Path
+import os, errno, tempfile, shutil, sqlite3, threading
+from pathlib import Path, PurePosixPath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple
 from .gsettings import set_gtk_theme, set_shell_theme, set_icon_theme, set_cursor_theme
+from .archive_classifier import iter_archive_members, classify_archive, known_archive, archive_stem
+from .extractor import safe_relative_parts
+from .archive_formats import extract_archive, ArchiveMember, ExtractionLimits, ArchiveLimitError, ARCHIVE_ERRORS
+from .trash import get_trash
+from .manifest import get_manifest, hash_file, scan_tree
+from .dedup import dedup, DEDUP_ON_INSTALL
 
 THEME_DIR = Path.home() / ".themes"
 ICON_DIR  = Path.home() / ".icons"
+# Prefijo del directorio de extracción, oculto y en el mismo sistema de archivos que el destino
+STAGING_PREFIX = ".staging-"
+INSTALL_KINDS = ("gtk", "shell", "icons", "cursor")
 
-def install_archive(path: Path, msg_callback):
-    with tempfile.TemporaryDirectory() as td:
-        tmp = Path(td)
-        # descomprime
-        if path.suffix == ".zip":
-            with zipfile.ZipFile(path) as zf:
-                zf.extractall(tmp)
-        elif path.suffix in {".gz", ".xz", ".tar"} or path.suffixes[-2:] == [".tar", ".xz"]:
-            with tarfile.open(path) as tf:
-                tf.extractall(tmp)
-        else:
-            msg_callback(f"Formato no soportado: {path.name}", "error")
-            return
-        # detecta carpetas de tema
-        for candidate in tmp.iterdir():
-            if not candidate.is_dir():
-                continue
-            kind = detect_type(candidate)
-            if not kind:
+class ArchiveVariant(NamedTuple):
+    """Carpeta de tema instalable dentro de un archivo"""
+    folder: str
+    name: str
+    kind: str
+
+def list_archive_variants(path: Path, members: List[ArchiveMember] | None = None) -> List[ArchiveVariant] | None:
+    """Listar las variantes (carpetas de tema) de un archivo sin extraerlo; None si no se puede leer"""
+    path = Path(path)
+    folders = classify_archive(path, members)
+    if folders is None:
+        return None
+    return variants_from_folders(path, folders)
+
+def variants_from_folders(path: Path, folders: Dict[str, List[str]]) -> List[ArchiveVariant]:
+    """Variantes instalables de una clasificación (carpeta -> tipos)
+
+    Un tema en la raíz del archivo (carpeta "") toma el nombre del archivo.
+    """
+    variants = []
+    names = set()
+    for folder, kinds in folders.items():
+        kind = next((k for k in INSTALL_KINDS if k in kinds), None)
+        name = PurePosixPath(folder).name or archive_stem(path)
+        if kind and name not in names:
+            names.add(name)
+            variants.append(ArchiveVariant(folder, name, kind))
+    return variants
+
+def install_archive(path: Path, msg_callback, auto_apply: bool = True, workers: int | None = None,
+                    variants: Iterable[str] | None = None, apply_variant: str | None = None,
+                    limits: ExtractionLimits | None = None, source_url: str | None = None,
+                    content_id: str | None = None, dedup_files: bool | None = None,
+                    cancel_event: threading.Event | None = None):
+    """Instalar los temas de un archivo extrayéndolo una sola vez.
+
+    Solo se extraen las variantes elegidas (variants, por nombre; todas si es
+    None), en un directorio .staging-XXXX dentro de cada destino, y después se
+    renombran a su sitio en paralelo. Como mucho se aplica una variante al final:
+    apply_variant, o la primera instalada si auto_apply. Los límites de
+    extracción (limits) se comprueban antes de escribir nada. Cada variante
+    instalada se registra en el manifiesto con su origen (source_url,
+    content_id) y el hash de sus archivos. Con dedup_files (por defecto
+    GNOME_THEME_LOADER_DEDUP) los archivos idénticos a los de otros temas
+    instalados pasan a compartir datos. Si se activa cancel_event, la
+    instalación se detiene antes de extraer o de mover nada a su sitio.
+    Devuelve la lista de (nombre, tipo) instalados.
+    """
+    path = Path(path)
+
+    def cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            msg_callback(f"Instalación cancelada: {path.name}", "warning")
+            return True
+        return False
+
+    # Una sola lectura de la lista de miembros para clasificar y comprobar límites, reutilizando
+    # la de list_archive_variants si se acaba de hacer; un archivo ya visto se clasifica desde la caché
+    folders, members = known_archive(path)
+    if folders is None:
+        members = members or iter_archive_members(path)
+        folders = classify_archive(path, members) if members is not None else None
+    available = variants_from_folders(path, folders) if folders is not None else None
+    if available is None:
+        msg_callback(f"Formato no soportado: {path.name}", "error")
+        return []
+    if variants is not None:
+        wanted = set(variants)
+        available = [v for v in available if v.name in wanted]
+    if not available:
+        msg_callback(f"No se encontraron temas en {path.name}", "error")
+        return []
+    if cancelled():
+        return []
+
+    # Un solo directorio de staging junto al primer destino y una sola pasada por el archivo;
+    # cada tipo en su subcarpeta para que no choquen variantes con el mismo nombre
+    first_base = dest_base_for(available[0].kind)
+    first_base.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=first_base))
+    installed = []
+    placed = []
+    try:
+        targets = {variant.folder: staging / dest_base_for(variant.kind).name / variant.name
+                   for variant in available}
+        try:
+            extract_folders(path, staging, targets, workers, limits, members)
+        except ArchiveLimitError as e:
+            msg_callback(f"❌ {e}", "error")
+            return []
+        except ARCHIVE_ERRORS as e:
+            # Con la clasificación en caché el archivo se abre aquí por primera vez
+            msg_callback(f"Error extrayendo {path.name}: {e}", "error")
+            return []
+        if cancelled():
+            return []
+
+        ready = [v for v in available if targets[v.folder].is_dir()]
+        for variant in available:
+            if variant not in ready:
+                msg_callback(f"No se extrajo ningún archivo de {variant.name} ({path.name})", "error")
+        with ThreadPoolExecutor(max_workers=min(8, len(ready) or 1)) as pool:
+            archive_hash = pool.submit(hash_file, path)
+            futures = [(v, pool.submit(place_and_scan, targets[v.folder], dest_base_for(v.kind))) for v in ready]
+        # Mensajes y manifiesto desde el hilo que llama (puede ser el de la interfaz)
+        manifest = get_manifest()
+        for variant, future in futures:
+            try:
+                dest, files = future.result()
+            except OSError as e:
+                msg_callback(f"Error instalando {variant.name}: {e}", "error")
                 continue
-            move_to_dest(candidate, kind, msg_callback)
-            # Aplicar el tema automáticamente
-            if kind == "gtk":
-                ok = set_gtk_theme(candidate.name)
-                msg_callback(f"GTK aplicado: {candidate.name}" if ok else f"Error al aplicar GTK: {candidate.name}", "info" if ok else "error")
-            elif kind == "shell":
-                ok = set_shell_theme(candidate.name)
-                msg_callback(f"Shell aplicado: {candidate.name}" if ok else f"Error al aplicar Shell: {candidate.name}", "info" if ok else "error")
-            elif kind == "icons":
-                ok = set_icon_theme(candidate.name)
-                msg_callback(f"Iconos aplicados: {candidate.name}" if ok else f"Error al aplicar iconos: {candidate.name}", "info" if ok else "error")
-            elif kind == "cursor":
-                ok = set_cursor_theme(candidate.name)
-                msg_callback(f"Cursor aplicado: {candidate.name}" if ok else f"Error al aplicar cursor: {candidate.name}", "info" if ok else "error")
+            msg_callback(f"✅ {variant.name} instalado en {dest_base_for(variant.kind)}", "success")
+            installed.append((variant.name, variant.kind))
+            placed.append(dest)
+            try:
+                manifest.record(dest, variant.name, variant.kind, files, source_url or path.resolve().as_uri(),
+                                content_id, path.name, archive_hash.result().hex())
+            except (sqlite3.Error, OSError) as e:
+                msg_callback(f"No se pudo registrar {variant.name} en el manifiesto: {e}", "warning")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    if placed and (DEDUP_ON_INSTALL if dedup_files is None else dedup_files):
+        dedup_installed(placed, msg_callback)
+
+    # Una sola aplicación: el escritorio se reestiliza una vez
+    if cancel_event is not None and cancel_event.is_set():
+        return installed
+    to_apply = next((i for i in installed if i[0] == apply_variant), None)
+    if to_apply is None and apply_variant is None and auto_apply and installed:
+        to_apply = installed[0]
+    if to_apply is not None:
+        apply_installed(to_apply[0], to_apply[1], msg_callback)
+    return installed
+
+def apply_installed(name: str, kind: str, msg_callback):
+    """Aplicar un tema recién instalado"""
+    if kind == "gtk":
+        ok = set_gtk_theme(name)
+        msg_callback(f"GTK aplicado: {name}" if ok else f"Error al aplicar GTK: {name}", "info" if ok else "error")
+    elif kind == "shell":
+        ok = set_shell_theme(name)
+        msg_callback(f"Shell aplicado: {name}" if ok else f"Error al aplicar Shell: {name}", "info" if ok else "error")
+    elif kind == "icons":
+        ok = set_icon_theme(name)
+        msg_callback(f"Iconos aplicados: {name}" if ok else f"Error al aplicar iconos: {name}", "info" if ok else "error")
+    elif kind == "cursor":
+        ok = set_cursor_theme(name)
+        msg_callback(f"Cursor aplicado: {name}" if ok else f"Error al aplicar cursor: {name}", "info" if ok else "error")
+
+def extract_folders(path: Path, dest: Path, targets, workers: int | None = None,
+                    limits: ExtractionLimits | None = None, members: List[ArchiveMember] | None = None):
+    """Extraer en una sola pasada solo los miembros de las carpetas indicadas.
+
+    targets: carpeta dentro del archivo ("" para la raíz) -> directorio destino,
+    siempre dentro de dest. Cualquier formato del registro.
+    """
+    def target_for(name):
+        parts = safe_relative_parts(name)
+        if parts is None:
+            return None
+        for i in range(len(parts) + 1):
+            folder = "/".join(parts[:i])
+            if folder in targets:
+                return targets[folder].joinpath(*parts[i:])
+        return None
+
+    extract_archive(path, dest, target_for, workers, limits, members)
+
+def dest_base_for(kind: str) -> Path:
+    return THEME_DIR if kind in {"gtk", "shell"} else ICON_DIR
 
 def detect_type(folder: Path) -> str | None:
     if (folder / "gtk-4.0").exists():
@@ -52,13 +201,41 @@ def detect_type(folder: Path) -> str | None:
     return None
 
 def move_to_dest(folder: Path, kind: str, msg_callback):
-    dest_base = THEME_DIR if kind in {"gtk", "shell"} else ICON_DIR
+    dest_base = dest_base_for(kind)
+    dest = rename_into_place(folder, dest_base)
+    msg_callback(f"✅ {folder.name} instalado en {dest_base}", "success")
+    if DEDUP_ON_INSTALL:
+        dedup_installed([dest], msg_callback)
+
+def dedup_installed(paths: List[Path], msg_callback):
+    """Enlazar los archivos de temas recién instalados con sus copias idénticas en los demás temas"""
+    result = dedup({THEME_DIR, ICON_DIR} | {Path(p).parent for p in paths}, only_under=paths)
+    if result.files:
+        msg_callback(f"♻️ {result.files} archivos duplicados enlazados ({result.bytes_saved / 1024 / 1024:.1f} MiB ahorrados)",
+                     "info")
+
+def place_and_scan(folder: Path, dest_base: Path):
+    """Mover una variante a su sitio y leer sus archivos para el manifiesto"""
+    dest = rename_into_place(folder, dest_base)
+    return dest, scan_tree(dest)
+
+def rename_into_place(folder: Path, dest_base: Path) -> Path:
+    """Mover una carpeta a dest_base con os.rename, apartando a la papelera la versión existente"""
     dest_base.mkdir(exist_ok=True)
     dest = dest_base / folder.name
-    if dest.exists():
-        shutil.rmtree(dest)
-    shutil.move(str(folder), dest)
-    msg_callback(f"✅ {folder.name} instalado en {dest_base}", "success")
+    # La versión anterior se aparta con un rename (se puede deshacer durante unos segundos)
+    trash = get_trash()
+    old_token = trash.move(dest)
+    try:
+        os.rename(folder, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            if old_token is not None:
+                trash.restore(old_token)
+            raise
+        # Origen en otro sistema de archivos (p. ej. /tmp): copiar
+        shutil.move(str(folder), dest)
+    return dest
 
 def list_installed_applications():
     """Listar aplicaciones instaladas (archivos .desktop) en el sistema."""
@@ -98,37 +275,23 @@ def list_installed_applications():
                 continue
     return apps
 
-def list_all_theme_icons():
-    """Listar todos los iconos de todos los temas agrupados por nombre de tema."""
-    icon_dirs = [
-        Path.home() / ".icons",
-        Path.home() / ".local/share/icons",
-        Path("/usr/share/icons")
-    ]
+def list_all_theme_icons(size=48):
+    """Listar la mejor ruta de cada icono de cada tema (para el tamaño dado), agrupada por nombre de tema."""
+    # Importación diferida: core depende de utils
+    from ..core.icon_lookup import IconLookup
+    lookup = IconLookup()
     themes = {}
-    for base in icon_dirs:
+    for base in lookup.scanner.icon_dirs:
         if not base.exists():
             continue
         for theme_dir in base.iterdir():
-            if not theme_dir.is_dir() or not (theme_dir / "index.theme").exists():
-                continue
             theme_name = theme_dir.name
-            icons = set()
-            # Buscar en subdirectorios típicos
-            for subdir in ["apps", "actions", "places", "devices", "categories", "mimetypes", "status"]:
-                subpath = theme_dir / subdir
-                if not subpath.exists():
-                    continue
-                for icon_file in subpath.rglob("*.svg"):
-                    icons.add(str(icon_file))
-                for icon_file in subpath.rglob("*.png"):
-                    icons.add(str(icon_file))
+            if theme_name in themes or not theme_dir.is_dir() or not (theme_dir / "index.theme").exists():
+                continue
+            icons = lookup.list_theme_icons(theme_name, size)
             if icons:
-                if theme_name not in themes:
-                    themes[theme_name] = set()
-                themes[theme_name].update(icons)
-    # Convertir sets a listas
-    return {k: sorted(list(v)) for k, v in themes.items()}
+                themes[theme_name] = icons
+    return themes
 
 def assign_custom_icon_to_app(desktop_file_path, icon_name):
     """Crea un override en ~/.local/share/applications/ para el .desktop dado, cambiando solo la línea Icon= de forma segura."""
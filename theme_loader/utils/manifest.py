@@ -0,0 +1,349 @@
+"""
+Install manifest for GNOME Theme Loader
+SQLite record of every installed theme: origin (source URL, content id,
+archive hash) and per-file size/mtime/hash. Allows exact uninstall, a fast
+verify that only rehashes files whose mtime changed, and diffs between versions
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from .extractor import DEFAULT_WORKERS, COPY_BUFFER
+from .trash import get_trash
+
+DATA_DIR = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "gnome-theme-loader"
+MANIFEST_FILE = DATA_DIR / "manifest.sqlite"
+# Versiones guardadas por ruta de tema (la actual y la anterior, para diff)
+KEEP_VERSIONS = 2
+HASH_SIZE = 16
+# Archivos que se generan después de instalar y pertenecen al tema
+GENERATED_FILES = ("icon-theme.cache",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS installs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source_url TEXT,
+    content_id TEXT,
+    archive_name TEXT,
+    archive_hash TEXT,
+    installed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS installs_path ON installs (path);
+CREATE INDEX IF NOT EXISTS installs_name ON installs (name);
+CREATE TABLE IF NOT EXISTS files (
+    install_id INTEGER NOT NULL REFERENCES installs (id) ON DELETE CASCADE,
+    relpath TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash BLOB,
+    link TEXT,
+    PRIMARY KEY (install_id, relpath)
+) WITHOUT ROWID;
+"""
+
+class FileEntry(NamedTuple):
+    """Archivo instalado (los enlaces simbólicos guardan su destino en link y no tienen hash)"""
+    relpath: str
+    size: int
+    mtime_ns: int
+    hash: Optional[bytes]
+    link: Optional[str] = None
+
+class InstallRecord(NamedTuple):
+    """Instalación registrada"""
+    id: int
+    path: str
+    name: str
+    kind: str
+    source_url: Optional[str]
+    content_id: Optional[str]
+    archive_name: Optional[str]
+    archive_hash: Optional[str]
+    installed_at: float
+
+class VerifyResult(NamedTuple):
+    """Resultado de verificar un tema contra su manifiesto"""
+    missing: List[str]
+    modified: List[str]
+    extra: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.modified
+
+class ManifestDiff(NamedTuple):
+    """Cambios entre dos versiones instaladas de un tema"""
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
+
+def hash_file(path: Path) -> bytes:
+    """Hash BLAKE2b del contenido de un archivo"""
+    digest = hashlib.blake2b(digest_size=HASH_SIZE)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(COPY_BUFFER)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.digest()
+
+def scan_tree(root: Path, workers: Optional[int] = None) -> List[FileEntry]:
+    """Listar los archivos de un tema con su tamaño, mtime y hash (hash en varios hilos)"""
+    root = Path(root)
+    files: List[tuple] = []
+    links: List[FileEntry] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]:
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root).replace(os.sep, "/")
+            st = os.lstat(full)
+            if os.path.islink(full):
+                links.append(FileEntry(rel, 0, 0, None, os.readlink(full)))
+            else:
+                files.append((rel, full, st.st_size, st.st_mtime_ns))
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS, thread_name_prefix="manifest") as pool:
+        hashes = pool.map(lambda item: hash_file(Path(item[1])), files)
+        entries = [FileEntry(rel, size, mtime_ns, digest)
+                   for (rel, _, size, mtime_ns), digest in zip(files, hashes)]
+    return entries + links
+
+def _diff_entries(old: Dict[str, FileEntry], new: Dict[str, FileEntry]) -> ManifestDiff:
+    return ManifestDiff(
+        added=sorted(set(new) - set(old)),
+        removed=sorted(set(old) - set(new)),
+        changed=sorted(rel for rel in set(old) & set(new)
+                       if (old[rel].hash, old[rel].link) != (new[rel].hash, new[rel].link)),
+    )
+
+class ThemeManifest:
+    """Manifiesto de instalaciones en SQLite (una conexión por operación, seguro entre hilos)"""
+
+    def __init__(self, manifest_file: Optional[Path] = None):
+        self.manifest_file = Path(manifest_file) if manifest_file else MANIFEST_FILE
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if not self._initialized:
+                self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.manifest_file, timeout=10)
+        conn.execute("PRAGMA foreign_keys = ON")
+        with self._lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+        return conn
+
+    def record(self, path: Path, name: str, kind: str, files: Optional[List[FileEntry]] = None,
+               source_url: Optional[str] = None, content_id: Optional[str] = None,
+               archive_name: Optional[str] = None, archive_hash: Optional[str] = None) -> Optional[ManifestDiff]:
+        """Registrar una instalación; devuelve los cambios respecto a la versión anterior (si la hay)"""
+        path = os.path.abspath(path)
+        if files is None:
+            files = scan_tree(Path(path))
+        conn = self._connect()
+        try:
+            with conn:
+                previous = self._latest(conn, path)
+                cursor = conn.execute(
+                    "INSERT INTO installs (path, name, kind, source_url, content_id, archive_name, archive_hash,"
+                    " installed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, name, kind, source_url, content_id, archive_name, archive_hash, time.time()))
+                install_id = cursor.lastrowid
+                conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                                 [(install_id, *entry) for entry in files])
+                # Solo se conservan las últimas versiones de cada ruta
+                conn.execute("DELETE FROM installs WHERE path = ? AND id NOT IN "
+                             "(SELECT id FROM installs WHERE path = ? ORDER BY id DESC LIMIT ?)",
+                             (path, path, KEEP_VERSIONS))
+            if previous is None:
+                return None
+            return _diff_entries(self._files(conn, previous.id), {entry.relpath: entry for entry in files})
+        finally:
+            conn.close()
+
+    def get(self, path: Path) -> Optional[InstallRecord]:
+        """Instalación actual registrada para una ruta"""
+        conn = self._connect()
+        try:
+            return self._latest(conn, os.path.abspath(path))
+        finally:
+            conn.close()
+
+    def find(self, name: str) -> List[InstallRecord]:
+        """Instalaciones actuales con un nombre de tema"""
+        return [record for record in self.list_installs() if record.name == name]
+
+    def list_installs(self) -> List[InstallRecord]:
+        """Instalación actual de cada ruta registrada"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT * FROM installs WHERE id IN (SELECT MAX(id) FROM installs GROUP BY path)"
+                                " ORDER BY name").fetchall()
+            return [InstallRecord(*row) for row in rows]
+        finally:
+            conn.close()
+
+    def get_files(self, path: Path) -> Dict[str, FileEntry]:
+        """Archivos registrados en la instalación actual de una ruta"""
+        conn = self._connect()
+        try:
+            record = self._latest(conn, os.path.abspath(path))
+            return self._files(conn, record.id) if record else {}
+        finally:
+            conn.close()
+
+    def verify(self, path: Path) -> Optional[VerifyResult]:
+        """Comparar un tema con su manifiesto: stat de cada archivo y hash solo si cambió el mtime"""
+        path = Path(os.path.abspath(path))
+        conn = self._connect()
+        try:
+            record = self._latest(conn, str(path))
+            if record is None:
+                return None
+            expected = self._files(conn, record.id)
+            missing, modified, touched = [], [], []
+            for rel, entry in expected.items():
+                full = path / rel
+                try:
+                    st = os.lstat(full)
+                except OSError:
+                    missing.append(rel)
+                    continue
+                if entry.link is not None:
+                    if not os.path.islink(full) or os.readlink(full) != entry.link:
+                        modified.append(rel)
+                elif st.st_size != entry.size:
+                    modified.append(rel)
+                elif st.st_mtime_ns != entry.mtime_ns:
+                    # Sospechoso: mismo tamaño, otro mtime; se decide por el hash
+                    if hash_file(full) != entry.hash:
+                        modified.append(rel)
+                    else:
+                        touched.append((st.st_mtime_ns, record.id, rel))
+            if touched:
+                # Guardar el nuevo mtime para no volver a leer el archivo la próxima vez
+                with conn:
+                    conn.executemany("UPDATE files SET mtime_ns = ? WHERE install_id = ? AND relpath = ?", touched)
+            extra = sorted(set(self._disk_files(path)) - set(expected))
+            return VerifyResult(sorted(missing), sorted(modified), extra)
+        finally:
+            conn.close()
+
+    def diff(self, path: Path) -> Optional[ManifestDiff]:
+        """Cambios entre la versión anterior y la actual de un tema (None si solo hay una)"""
+        conn = self._connect()
+        try:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM installs WHERE path = ? ORDER BY id DESC LIMIT 2", (os.path.abspath(path),))]
+            if len(ids) < 2:
+                return None
+            return _diff_entries(self._files(conn, ids[1]), self._files(conn, ids[0]))
+        finally:
+            conn.close()
+
+    def uninstall(self, path: Path) -> Optional[str]:
+        """Apartar el tema entero a la papelera (un rename atómico) y devolver el token para deshacer
+
+        No recorre el tema: los archivos añadidos después de instalar se
+        devuelven a su sitio con keep_extra_files(), que puede ejecutarse en
+        segundo plano. El registro se elimina con prune() cuando la ruta ya no
+        existe (deshacer lo recupera).
+        """
+        return get_trash().move(Path(os.path.abspath(path)))
+
+    def keep_extra_files(self, path: Path, token: Optional[str], callback=None,
+                         cancel_event: Optional[threading.Event] = None) -> List[str]:
+        """Devolver a path los archivos del tema desinstalado que no se instalaron (añadidos después)
+
+        Se copian desde la papelera, que conserva el tema completo para poder
+        deshacer. Si se conserva algo, se olvida el registro de la ruta: lo que
+        queda ya no es el tema instalado. Devuelve las rutas relativas conservadas.
+        """
+        path = Path(os.path.abspath(path))
+        trashed = get_trash().trashed_path(token) if token else None
+        expected = set(self.get_files(path))
+        if trashed is None or not expected:
+            return []
+        extra = sorted(rel for rel in self._disk_files(trashed)
+                       if rel not in expected and Path(rel).name not in GENERATED_FILES)
+        kept = []
+        for rel in extra:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            source = trashed / rel
+            target = path / rel
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if source.is_symlink():
+                    os.symlink(os.readlink(source), target)
+                else:
+                    shutil.copy2(source, target)
+            except OSError as e:
+                if callback:
+                    callback(f"No se pudo conservar {rel}: {e}", "warning")
+                continue
+            kept.append(rel)
+        if kept:
+            self.forget(path)
+            if callback:
+                callback(f"Se conservan {len(kept)} archivos añadidos en {path}", "info")
+        return kept
+
+    def forget(self, path: Path):
+        """Eliminar todas las versiones registradas de una ruta"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM installs WHERE path = ?", (os.path.abspath(path),))
+        finally:
+            conn.close()
+
+    def prune(self) -> int:
+        """Olvidar las instalaciones cuya carpeta ya no existe; devuelve cuántas rutas se eliminaron"""
+        missing = {record.path for record in self.list_installs() if not os.path.lexists(record.path)}
+        for path in missing:
+            self.forget(Path(path))
+        return len(missing)
+
+    @staticmethod
+    def _latest(conn: sqlite3.Connection, path: str) -> Optional[InstallRecord]:
+        row = conn.execute("SELECT * FROM installs WHERE path = ? ORDER BY id DESC LIMIT 1", (path,)).fetchone()
+        return InstallRecord(*row) if row else None
+
+    @staticmethod
+    def _files(conn: sqlite3.Connection, install_id: int) -> Dict[str, FileEntry]:
+        rows = conn.execute("SELECT relpath, size, mtime_ns, hash, link FROM files WHERE install_id = ?",
+                            (install_id,))
+        return {row[0]: FileEntry(*row) for row in rows}
+
+    @staticmethod
+    def _disk_files(root: Path) -> List[str]:
+        found = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in filenames + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]:
+                found.append(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/"))
+        return found
+
+_manifest: Optional[ThemeManifest] = None
+_manifest_lock = threading.Lock()
+
+def get_manifest() -> ThemeManifest:
+    """Obtener el manifiesto compartido por todo el proceso"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = ThemeManifest()
+        return _manifest
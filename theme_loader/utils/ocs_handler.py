@@ -8,14 +8,17 @@ import subprocess
 import os
 import shutil
 import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import requests
-import zipfile
-import tarfile
 import json
 import re
 
+from .theme_record import ThemeRecord
+from .archive_formats import sniff_format, extract_archive, list_members
+from .manifest import get_manifest, hash_file
+
 class OCSHandler:
     """Manejador del protocolo OCS para instalación de temas"""
     
@@ -37,6 +40,9 @@ class OCSHandler:
             'plymouth_themes': '/usr/share/plymouth/themes'
         }
         
+        # Hilos para extraer zips (None: valor por defecto del extractor)
+        self.extract_workers: Optional[int] = None
+        
         # Alias para compatibilidad
         self.type_aliases = {
             'gnome_shell_themes': 'themes',
@@ -134,22 +140,9 @@ class OCSHandler:
         try:
             print(f"Extrayendo: {archive_path.name}")
             
-            if archive_path.suffix in ['.zip']:
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_to)
-                    
-            elif archive_path.suffix in ['.tar.gz', '.tgz']:
-                with tarfile.open(archive_path, 'r:gz') as tar_ref:
-                    tar_ref.extractall(extract_to)
-                    
-            elif archive_path.suffix in ['.tar.xz', '.txz']:
-                with tarfile.open(archive_path, 'r:xz') as tar_ref:
-                    tar_ref.extractall(extract_to)
-                    
-            elif archive_path.suffix in ['.tar.bz2', '.tbz2']:
-                with tarfile.open(archive_path, 'r:bz2') as tar_ref:
-                    tar_ref.extractall(extract_to)
-                    
+            # El formato se reconoce por su firma (el sufijo de Path solo ve ".gz" en ".tar.gz")
+            if sniff_format(archive_path) is not None:
+                extract_archive(archive_path, extract_to, workers=self.extract_workers)
             else:
                 # Si no es un archivo comprimido, copiarlo directamente
                 shutil.copy2(archive_path, extract_to / archive_path.name)
@@ -181,10 +174,15 @@ class OCSHandler:
             if callback:
                 callback(f"Archivo descargado: {archive_path.name}", "info")
             
+            # Carpetas de primer nivel del archivo, para registrarlas en el manifiesto
+            top_level = self._top_level_folders(archive_path)
+            
             # Extraer archivo
             success = self.extract_archive(archive_path, install_path)
             
             if success:
+                self._record_install(install_path, top_level, params, archive_path)
+                
                 # Limpiar archivo temporal
                 archive_path.unlink(missing_ok=True)
                 archive_path.parent.rmdir()
@@ -201,6 +199,30 @@ class OCSHandler:
                 callback(f"Error: {str(e)}", "error")
             return False, str(e)
     
+    def _top_level_folders(self, archive_path: Path) -> List[str]:
+        """Nombres de las carpetas de primer nivel de un archivo comprimido"""
+        if sniff_format(archive_path) is None:
+            return []
+        names = set()
+        for member in list_members(archive_path):
+            parts = [p for p in member.name.replace("\\", "/").split("/") if p and p != "."]
+            if len(parts) > 1 or (parts and member.is_dir):
+                names.add(parts[0])
+        return sorted(names)
+    
+    def _record_install(self, install_path: Path, folders: List[str], params: Dict[str, str], archive_path: Path):
+        """Registrar en el manifiesto las carpetas instaladas con su URL de origen"""
+        try:
+            archive_hash = hash_file(archive_path).hex()
+            for folder in folders:
+                theme_path = install_path / folder
+                if theme_path.is_dir():
+                    get_manifest().record(theme_path, folder, params['type'], source_url=params['url'],
+                                          content_id=params.get('content_id'), archive_name=archive_path.name,
+                                          archive_hash=archive_hash)
+        except Exception as e:
+            print(f"No se pudo registrar la instalación en el manifiesto: {e}")
+    
     def create_ocs_url(self, url: str, install_type: str, filename: str = None) -> str:
         """Crear URL OCS a partir de parámetros"""
         params = {
@@ -249,7 +271,7 @@ class OCSHandler:
                 'url': theme_url
             }
     
-    def list_installed_themes(self, theme_type: str = 'themes') -> list:
+    def list_installed_themes(self, theme_type: str = 'themes') -> List[ThemeRecord]:
         """Listar temas instalados de un tipo específico"""
         install_path = self.get_install_path(theme_type)
         
@@ -259,11 +281,7 @@ class OCSHandler:
         themes = []
         for item in install_path.iterdir():
             if item.is_dir():
-                themes.append({
-                    'name': item.name,
-                    'path': str(item),
-                    'type': theme_type
-                })
+                themes.append(ThemeRecord.from_ocs(item, theme_type))
         
         return themes
     
@@ -274,10 +292,12 @@ class OCSHandler:
             theme_path = install_path / theme_name
             
             if theme_path.exists():
-                if theme_path.is_dir():
-                    shutil.rmtree(theme_path)
-                else:
-                    theme_path.unlink()
+                # Rename a la papelera; los archivos añadidos después vuelven a su sitio en segundo plano
+                manifest = get_manifest()
+                token = manifest.uninstall(theme_path)
+                # Sin daemon: el proceso no termina hasta haber copiado los archivos conservados
+                threading.Thread(target=manifest.keep_extra_files, args=(theme_path, token),
+                                 name="keep-extra-files").start()
                 return True
             else:
                 return False
@@ -0,0 +1,83 @@
+"""
+Theme Record module for GNOME Theme Loader
+Immutable, compact record describing an installed theme, shared by every scanner
+"""
+
+import sys
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Union
+
+class ThemeType(str, Enum):
+    """Tipos de tema conocidos (comparables directamente con sus cadenas)"""
+    GTK = "gtk"
+    SHELL = "shell"
+    ICONS = "icons"
+    CURSOR = "cursor"
+    GRUB = "grub"
+    OTHER = "other"
+
+    def __str__(self) -> str:
+        return self.value
+
+    @classmethod
+    def from_value(cls, value) -> "ThemeType":
+        """Convertir una cadena a ThemeType (OTHER si no es un tipo conocido)"""
+        try:
+            return cls(value)
+        except ValueError:
+            return cls.OTHER
+
+# Tipos OCS (ocs://install?type=...) -> ThemeType; el resto es OTHER
+OCS_TYPE_MAP = {
+    "themes": ThemeType.GTK,
+    "gtk2_themes": ThemeType.GTK,
+    "gtk3_themes": ThemeType.GTK,
+    "gtk4_themes": ThemeType.GTK,
+    "shell_themes": ThemeType.SHELL,
+    "gnome_shell_themes": ThemeType.SHELL,
+    "icons": ThemeType.ICONS,
+    "icon_themes": ThemeType.ICONS,
+    "cursors": ThemeType.CURSOR,
+    "cursor_themes": ThemeType.CURSOR,
+    "grub_themes": ThemeType.GRUB,
+}
+
+@dataclass(frozen=True, slots=True)
+class ThemeRecord:
+    """Tema instalado: nombre (internado), ruta, tipo y origen ("user" o "system")"""
+    name: str
+    path: str
+    type: ThemeType
+    source: str = "user"
+
+    def __post_init__(self):
+        # Los nombres se repiten entre tipos y raíces: internarlos abarata memoria y hashing
+        object.__setattr__(self, "name", sys.intern(self.name))
+        object.__setattr__(self, "path", str(self.path))
+        object.__setattr__(self, "type", ThemeType.from_value(self.type))
+        object.__setattr__(self, "source", sys.intern(self.source))
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path], theme_type: Union[str, ThemeType], source: str = "user") -> "ThemeRecord":
+        """Crear un registro a partir del directorio del tema"""
+        path = Path(path)
+        return cls(path.name, str(path), theme_type, source)
+
+    @classmethod
+    def from_ocs(cls, path: Union[str, Path], ocs_type: str) -> "ThemeRecord":
+        """Crear un registro para un tema instalado con un tipo OCS"""
+        return cls.from_path(path, OCS_TYPE_MAP.get(ocs_type, ThemeType.OTHER))
+
+    @property
+    def directory(self) -> Path:
+        return Path(self.path)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Serializar para el índice en disco o JSON"""
+        return {"name": self.name, "path": self.path, "type": self.type.value, "source": self.source}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "ThemeRecord":
+        return cls(data["name"], data["path"], data["type"], data.get("source", "user"))
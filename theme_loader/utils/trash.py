@@ -0,0 +1,196 @@
+"""
+Theme trash for GNOME Theme Loader
+Removes or replaces themes with an atomic rename into a trash area; the real
+deletion runs on a background thread after a short undo window, or right away
+with flush() in processes without a main loop (CLI)
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+TRASH_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "gnome-theme-loader" / "trash"
+# Segundos que se conserva un tema borrado o sustituido para poder deshacer
+UNDO_SECONDS = 30
+# Carpeta de respaldo junto al tema cuando la papelera está en otro sistema de archivos
+LOCAL_TRASH_PREFIX = ".trash-"
+ORIGIN_FILE = ".origin"
+# Directorios de temas del usuario donde puede haber carpetas de respaldo (.trash-*)
+LOCAL_TRASH_ROOTS = [
+    Path.home() / ".themes",
+    Path.home() / ".icons",
+    Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "themes",
+    Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "icons",
+]
+
+class ThemeTrash:
+    """Papelera de temas con deshacer inmediato y purga en segundo plano"""
+
+    def __init__(self, trash_dir: Path = TRASH_DIR, keep_seconds: float = UNDO_SECONDS):
+        self.trash_dir = Path(trash_dir)
+        self.keep_seconds = keep_seconds
+        # token -> (ruta original, ruta en la papelera)
+        self._entries: Dict[str, tuple] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._threads: List[threading.Thread] = []
+        # Directorios donde se han creado carpetas de respaldo en esta sesión
+        self._local_roots = set()
+        self._lock = threading.Lock()
+
+    def move(self, path: Path) -> Optional[str]:
+        """Apartar un tema con un rename atómico; devuelve el token para deshacer (None si no existe)"""
+        path = Path(path)
+        if not path.exists() and not path.is_symlink():
+            return None
+        try:
+            self.trash_dir.mkdir(parents=True, exist_ok=True)
+            holder = Path(tempfile.mkdtemp(prefix=f"{time.time_ns()}-", dir=self.trash_dir))
+        except OSError:
+            holder = None
+        if holder is not None:
+            try:
+                os.rename(path, holder / path.name)
+            except OSError as e:
+                os.rmdir(holder)
+                if e.errno != errno.EXDEV:
+                    raise
+                holder = None
+        if holder is None:
+            # Papelera en otro sistema de archivos: apartar junto al tema (mismo sistema de archivos)
+            holder = Path(tempfile.mkdtemp(prefix=LOCAL_TRASH_PREFIX, dir=path.parent))
+            os.rename(path, holder / path.name)
+            with self._lock:
+                self._local_roots.add(path.parent)
+        (holder / ORIGIN_FILE).write_text(str(path), encoding="utf-8")
+
+        token = holder.name
+        with self._lock:
+            self._entries[token] = (path, holder)
+            timer = threading.Timer(self.keep_seconds, self.purge, (token,))
+            timer.daemon = True
+            self._timers[token] = timer
+        timer.start()
+        return token
+
+    def trashed_path(self, token: str) -> Optional[Path]:
+        """Ruta del tema dentro de la papelera mientras se puede deshacer (None si ya no está)"""
+        with self._lock:
+            entry = self._entries.get(token)
+        if entry is None:
+            return None
+        original, holder = entry
+        return holder / original.name
+
+    def restore(self, token: str) -> bool:
+        """Deshacer: devolver el tema a su ruta original (apartando lo que ocupe su lugar)"""
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            timer = self._timers.pop(token, None)
+        if timer is not None:
+            timer.cancel()
+        if entry is None:
+            return False
+        original, holder = entry
+        trashed = holder / original.name
+        if not trashed.exists() and not trashed.is_symlink():
+            return False
+        # Si se sustituyó por una versión nueva, esa pasa a la papelera
+        if original.exists() or original.is_symlink():
+            self.move(original)
+        os.rename(trashed, original)
+        self._remove_in_background(holder)
+        return True
+
+    def purge(self, token: str):
+        """Borrar definitivamente una entrada en segundo plano"""
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            timer = self._timers.pop(token, None)
+        if timer is not None:
+            timer.cancel()
+        if entry is not None:
+            self._remove_in_background(entry[1])
+
+    def purge_expired(self, roots: Optional[Iterable[Path]] = None, wait: bool = False):
+        """Borrar las entradas de sesiones anteriores ya caducadas
+
+        Incluye las carpetas de respaldo (.trash-*) de roots (por defecto los
+        directorios de temas del usuario y los usados en esta sesión). Con wait
+        se borra en este hilo; si no, en segundo plano.
+        """
+        with self._lock:
+            local_roots = set(LOCAL_TRASH_ROOTS if roots is None else roots) | self._local_roots
+
+        def run():
+            now = time.time()
+            holders = []
+            try:
+                holders += list(self.trash_dir.iterdir())
+            except OSError:
+                pass
+            for root in local_roots:
+                try:
+                    holders += [p for p in Path(root).iterdir() if p.name.startswith(LOCAL_TRASH_PREFIX)]
+                except OSError:
+                    continue
+            with self._lock:
+                active = {holder for _, holder in self._entries.values()}
+            for holder in holders:
+                try:
+                    expired = now - holder.stat().st_mtime > self.keep_seconds
+                except OSError:
+                    continue
+                if holder not in active and expired:
+                    shutil.rmtree(holder, ignore_errors=True)
+
+        if wait:
+            run()
+        else:
+            self._start_thread(run)
+
+    def flush(self):
+        """Borrar ya todas las entradas y esperar a que terminen los borrados pendientes
+
+        Para procesos que terminan enseguida (CLI): los temporizadores y los
+        hilos de la papelera son daemon y no llegarían a ejecutarse.
+        """
+        with self._lock:
+            tokens = list(self._entries)
+        for token in tokens:
+            with self._lock:
+                entry = self._entries.pop(token, None)
+                timer = self._timers.pop(token, None)
+            if timer is not None:
+                timer.cancel()
+            if entry is not None:
+                shutil.rmtree(entry[1], ignore_errors=True)
+        self.purge_expired(wait=True)
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join()
+
+    def _remove_in_background(self, holder: Path):
+        self._start_thread(shutil.rmtree, holder, True)
+
+    def _start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, name="trash-purge", daemon=True)
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+
+_trash: Optional[ThemeTrash] = None
+_trash_lock = threading.Lock()
+
+def get_trash() -> ThemeTrash:
+    """Obtener la papelera compartida por todo el proceso"""
+    global _trash
+    with _trash_lock:
+        if _trash is None:
+            _trash = ThemeTrash()
+        return _trash
@@ -0,0 +1,148 @@
+"""
+Xcursor reader for GNOME Theme Loader
+Reads only the header and table of contents of Xcursor files (no image decoding)
+"""
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+XCURSOR_MAGIC = b"Xcur"
+XCURSOR_IMAGE_TYPE = 0xfffd0002
+# Cabecera: magic, tamaño de cabecera, versión, número de entradas del TOC
+_HEADER = struct.Struct("<4sIII")
+# Entrada del TOC: tipo, subtipo (tamaño nominal para imágenes), posición
+_TOC_ENTRY = struct.Struct("<III")
+MAX_TOC_ENTRIES = 0x10000
+
+_cache: Dict[str, Tuple[int, Dict]] = {}
+_cache_lock = threading.Lock()
+
+def read_xcursor_toc(path) -> Optional[Dict[int, int]]:
+    """Leer el TOC de un archivo Xcursor: {tamaño nominal: número de fotogramas}
+
+    El archivo se mapea en memoria y solo se tocan las páginas de la cabecera y
+    del TOC. Devuelve None si no es un Xcursor válido.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, header_size, _version, ntoc = _HEADER.unpack_from(mm, 0)
+                if magic != XCURSOR_MAGIC or ntoc > MAX_TOC_ENTRIES:
+                    return None
+                if header_size < _HEADER.size or header_size + ntoc * _TOC_ENTRY.size > size:
+                    return None
+                frames: Dict[int, int] = {}
+                for i in range(ntoc):
+                    chunk_type, subtype, _position = _TOC_ENTRY.unpack_from(mm, header_size + i * _TOC_ENTRY.size)
+                    if chunk_type == XCURSOR_IMAGE_TYPE:
+                        frames[subtype] = frames.get(subtype, 0) + 1
+                return frames or None
+    except (OSError, ValueError):
+        return None
+
+def is_xcursor_file(path) -> bool:
+    """Comprobar solo la firma de un archivo Xcursor"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(XCURSOR_MAGIC)) == XCURSOR_MAGIC
+    except OSError:
+        return False
+
+def read_cursor_theme(cursors_dir) -> Dict:
+    """Indexar un directorio cursors/: cursores con sus tamaños y fotogramas, y alias (enlaces simbólicos)
+
+    Resultado: {"cursors": {nombre: {"sizes": [...], "frames": {tamaño: n}}},
+    "aliases": {nombre: destino}}. Se cachea por directorio y mtime; el
+    diccionario devuelto es compartido y no debe modificarse.
+    """
+    cursors_dir = Path(cursors_dir)
+    key = str(cursors_dir)
+    try:
+        mtime = os.stat(cursors_dir).st_mtime_ns
+    except OSError:
+        return {"cursors": {}, "aliases": {}}
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    cursors: Dict[str, Dict] = {}
+    links: Dict[str, str] = {}
+    try:
+        with os.scandir(cursors_dir) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    try:
+                        links[entry.name] = os.readlink(entry.path)
+                    except OSError:
+                        pass
+                    continue
+                if not entry.is_file():
+                    continue
+                frames = read_xcursor_toc(entry.path)
+                if frames:
+                    cursors[entry.name] = {
+                        "sizes": sorted(frames),
+                        "frames": {str(s): n for s, n in sorted(frames.items())}
+                    }
+    except OSError:
+        pass
+
+    aliases = {}
+    for name, target in links.items():
+        resolved = _resolve_alias(target, links)
+        if resolved in cursors:
+            aliases[name] = resolved
+        elif resolved is None:
+            # Enlace que sale del directorio: leerlo a través del enlace
+            frames = read_xcursor_toc(cursors_dir / name)
+            if frames:
+                cursors[name] = {
+                    "sizes": sorted(frames),
+                    "frames": {str(s): n for s, n in sorted(frames.items())}
+                }
+
+    result = {"cursors": cursors, "aliases": aliases}
+    with _cache_lock:
+        _cache[key] = (mtime, result)
+    return result
+
+def _resolve_alias(target: str, links: Dict[str, str]) -> Optional[str]:
+    """Seguir cadenas de enlaces dentro del mismo directorio hasta un archivo real"""
+    seen = set()
+    while "/" not in target:
+        if target not in links:
+            return target
+        if target in seen:
+            return ""
+        seen.add(target)
+        target = links[target]
+    return None
+
+def get_cursor_theme_summary(cursors_dir) -> Dict:
+    """Resumen serializable de un tema de cursores para el índice de temas"""
+    data = read_cursor_theme(cursors_dir)
+    sizes = sorted({s for cursor in data["cursors"].values() for s in cursor["sizes"]})
+    animated: List[str] = sorted(
+        name for name, cursor in data["cursors"].items()
+        if any(n > 1 for n in cursor["frames"].values())
+    )
+    return {
+        "cursor_count": len(data["cursors"]) + len(data["aliases"]),
+        "alias_count": len(data["aliases"]),
+        "sizes": sizes,
+        "animated_count": len(animated)
+    }
+
+def clear_cache():
+    """Vaciar la caché de directorios de cursores"""
+    with _cache_lock:
+        _cache.clear()